@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Komisja, KomisjaPunktObrad, KomisjaSesja, Obecnosc, PunktObrad, Sesja
+from .models import Komisja, KomisjaPunktObrad, KomisjaSesja, Obecnosc, PunktObrad, Sesja, ZadanieEksportu
 
 
 class PunktObradInline(admin.TabularInline):
@@ -53,3 +53,10 @@ class KomisjaSesjaAdmin(admin.ModelAdmin):
 	search_fields = ("nazwa", "komisja__nazwa")
 	ordering = ("-data",)
 	inlines = (KomisjaPunktObradInline,)
+
+
+@admin.register(ZadanieEksportu)
+class ZadanieEksportuAdmin(admin.ModelAdmin):
+	list_display = ("id", "typ", "status", "zlecil", "utworzone", "zakonczone")
+	list_filter = ("typ", "status")
+	readonly_fields = ("utworzone", "rozpoczete", "zakonczone")
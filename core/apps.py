@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import czlonkostwo, podsumowanie, publikacja, statystyki, wyszukiwanie
+        from .pdf_fonts import warm_pdf_fonts
+
+        warm_pdf_fonts()
+        wyszukiwanie.podlacz_sygnaly()
+        czlonkostwo.podlacz_sygnaly()
+        podsumowanie.podlacz_sygnaly()
+        statystyki.podlacz_sygnaly()
+        publikacja.podlacz_sygnaly()
@@ -0,0 +1,258 @@
+"""Zbiorczy eksport protokołów (np. za cały rok) jako strumieniowany ZIP.
+
+Protokoły renderowane są przez cache PDF (niezmienione sesje nie są
+renderowane ponownie), a archiwum wypisywane jest kawałkami – w pamięci
+nigdy nie leży cały plik ZIP. Obok PDF-ów do archiwum trafia zrzut wyników
+głosowań w formatach CSV i JSON.
+
+Pulę procesów (ARCHIWUM_PROCESY) uruchamia tylko zadanie „archiwum”
+wykonywane przez przetwarzaj_zadania; widok HTTP i wątki zadań w procesie
+aplikacji renderują sekwencyjnie, żeby nie uruchamiać kopii Django
+w procesie serwera WWW.
+"""
+
+import csv
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import zipfile
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from . import migawki
+from .models import Glos, Glosowanie, MigawkaSesji, Sesja
+
+CHUNK_SIZE = 64 * 1024
+
+CSV_COLUMNS = [
+    "sesja_id", "sesja", "data", "punkt", "podpunkt", "glosowanie_id", "glosowanie",
+    "typ", "jawnosc", "wiekszosc", "za", "przeciw", "wstrzymuje", "prog", "wynik", "kandydaci",
+]
+
+
+def zakres_dat(rok=None, od=None, do=None):
+    """Zwraca (od, do) jako daty; podany zakres od–do ma pierwszeństwo przed rokiem.
+
+    Rzuca ValueError przy błędnych danych.
+    """
+    if od or do:
+        if not od or not do:
+            raise ValueError("Podaj obie daty zakresu od–do.")
+        od, do = date.fromisoformat(od), date.fromisoformat(do)
+        if od > do:
+            raise ValueError("Data początkowa jest późniejsza niż końcowa.")
+        return od, do
+    if not rok:
+        raise ValueError("Podaj rok albo zakres dat od–do.")
+    rok = int(rok)
+    return date(rok, 1, 1), date(rok, 12, 31)
+
+
+def sesje_w_zakresie(od, do):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(od, time.min), tz)
+    koniec = timezone.make_aware(datetime.combine(do + timedelta(days=1), time.min), tz)
+    return Sesja.objects.filter(jest_usunieta=False, data__gte=start, data__lt=koniec).order_by("data", "id")
+
+
+def _otworz_protokol(sesja_id):
+    """Zwraca (nazwa pliku, otwarty PDF) protokołu z cache, renderując go w razie braku."""
+    from .pdf_cache import get_or_render, protokol_fingerprint
+    from .pdf_dokumenty import protokol_pdf_bytes, protokol_pdf_filename
+
+    sesja = Sesja.objects.get(id=sesja_id)
+    fh = get_or_render(sesja.id, protokol_fingerprint(sesja), lambda: protokol_pdf_bytes(sesja))
+    return f"{sesja.id:05d}_{protokol_pdf_filename(sesja)}", fh
+
+
+def _render_protokol(sesja_id):
+    """Renderuje protokół do cache w procesie potomnym; zwraca id sesji."""
+    _, fh = _otworz_protokol(sesja_id)
+    fh.close()
+    return sesja_id
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+def _liczba_procesow():
+    return int(getattr(settings, "ARCHIWUM_PROCESY", min(4, os.cpu_count() or 1)))
+
+
+def _iter_rendered(sesja_ids, procesy):
+    """Zwraca (nazwa pliku, otwarty PDF) w kolejności sesji, z ograniczoną liczbą zadań w locie.
+
+    Procesy potomne tylko wypełniają cache; plik otwiera proces główny, który
+    renderuje go ponownie, gdyby w międzyczasie został usunięty z cache.
+    """
+    if procesy <= 1:
+        for sesja_id in sesja_ids:
+            yield _otworz_protokol(sesja_id)
+        return
+
+    # spawn: procesy potomne otwierają własne połączenia z bazą zamiast dziedziczyć gniazda rodzica
+    pool = ProcessPoolExecutor(
+        max_workers=procesy,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    )
+    try:
+        ids = iter(sesja_ids)
+        pending = deque(pool.submit(_render_protokol, sid) for sid in itertools.islice(ids, procesy * 2))
+        while pending:
+            future = pending.popleft()
+            nastepna = next(ids, None)
+            if nastepna is not None:
+                pending.append(pool.submit(_render_protokol, nastepna))
+            yield _otworz_protokol(future.result())
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _iter_glosowania(sesja_ids):
+    """Rekordy wyników głosowań (słowniki) dla podanych sesji, w kolejności dat sesji.
+
+    Sesje zamrożone (core.migawki) czytane są z migawki, pozostałe z tabel bieżących.
+    """
+    zamrozone = set(MigawkaSesji.objects.filter(sesja_id__in=sesja_ids).values_list("sesja_id", flat=True))
+    kolejnosc = Sesja.objects.filter(id__in=sesja_ids).order_by("data", "id").values_list("id", flat=True)
+    biezace = itertools.groupby(
+        _iter_glosowania_biezace([sid for sid in sesja_ids if sid not in zamrozone]),
+        key=lambda rekord: rekord["sesja_id"],
+    )
+    grupa = next(biezace, None)
+    for sesja_id in list(kolejnosc):
+        if sesja_id in zamrozone:
+            yield from migawki.rekordy_glosowan(
+                MigawkaSesji.objects.filter(sesja_id=sesja_id).values_list("dane", flat=True).get()
+            )
+        elif grupa is not None and grupa[0] == sesja_id:
+            yield from grupa[1]
+            grupa = next(biezace, None)
+
+
+def _iter_glosowania_biezace(sesja_ids):
+    """Rekordy wyników głosowań z tabel bieżących."""
+    liczniki = defaultdict(lambda: {"za": 0, "przeciw": 0, "wstrzymuje": 0})
+    kandydaci = defaultdict(list)
+    wiersze = (
+        Glos.objects.filter(glosowanie__punkt_obrad__sesja_id__in=sesja_ids)
+        .values_list("glosowanie_id", "glos", "kandydat__nazwisko", "kandydat__imie")
+        .annotate(liczba=Count("id"))
+        .order_by("glosowanie_id", "-liczba", "kandydat__nazwisko", "kandydat__imie")
+    )
+    for glosowanie_id, glos, nazwisko, imie, liczba in wiersze:
+        if nazwisko is not None:
+            kandydaci[glosowanie_id].append({"nazwisko": nazwisko, "imie": imie, "glosy": liczba})
+        elif glos:
+            liczniki[glosowanie_id][glos] += liczba
+
+    glosowania = (
+        Glosowanie.objects.filter(punkt_obrad__sesja_id__in=sesja_ids)
+        .select_related("punkt_obrad__sesja", "podpunkt_obrad")
+        .order_by("punkt_obrad__sesja__data", "punkt_obrad__sesja_id", "punkt_obrad__numer", "podpunkt_obrad__numer", "id")
+    )
+    for g in glosowania.iterator():
+        sesja = g.punkt_obrad.sesja
+        c = liczniki[g.id]
+        rekord = {
+            "sesja_id": sesja.id,
+            "sesja": sesja.nazwa,
+            "data": timezone.localtime(sesja.data).isoformat(),
+            "punkt": g.punkt_obrad.numer,
+            "podpunkt": g.podpunkt_obrad.numer if g.podpunkt_obrad_id else None,
+            "glosowanie_id": g.id,
+            "glosowanie": g.nazwa,
+            "typ": g.typ,
+            "jawnosc": g.jawnosc,
+            "wiekszosc": g.wiekszosc,
+            "za": c["za"],
+            "przeciw": c["przeciw"],
+            "wstrzymuje": c["wstrzymuje"],
+            "prog": None,
+            "wynik": None,
+            "kandydaci": kandydaci.get(g.id, []),
+        }
+        if g.typ != "kandydaci":
+            wynik = g.wynik_z_licznikow(c["za"], c["przeciw"], c["wstrzymuje"])
+            rekord["prog"] = wynik["prog"]
+            rekord["wynik"] = "przeszło" if wynik["przeszedl"] else "nie przeszło"
+        yield rekord
+
+
+class _ZipStream:
+    """Nieprzewijalny bufor dla zipfile; pop() oddaje to, co zapisano od poprzedniego wywołania."""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_archiwum_zip(sesja_ids, procesy=None):
+    """Generator kolejnych (niepustych) fragmentów archiwum ZIP z protokołami i zrzutem głosowań.
+
+    procesy: liczba procesów renderujących; None – według ARCHIWUM_PROCESY.
+    """
+    return (chunk for chunk in _iter_zip_parts(list(sesja_ids), procesy) if chunk)
+
+
+def _iter_zip_parts(sesja_ids, procesy):
+    procesy = _liczba_procesow() if procesy is None else procesy
+    stream = _ZipStream()
+
+    with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for nazwa, src in _iter_rendered(sesja_ids, procesy):
+            with src, zf.open(f"protokoly/{nazwa}", "w") as dst:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                    dst.write(chunk)
+                    yield stream.pop()
+            yield stream.pop()
+
+        with zf.open("glosowania.csv", "w") as raw:
+            with io.TextIOWrapper(raw, encoding="utf-8", newline="") as out:
+                writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS)
+                writer.writeheader()
+                for rekord in _iter_glosowania(sesja_ids):
+                    rekord["kandydaci"] = "; ".join(
+                        f"{k['nazwisko']} {k['imie']}: {k['glosy']}" for k in rekord["kandydaci"]
+                    )
+                    writer.writerow(rekord)
+                    out.flush()
+                    yield stream.pop()
+        yield stream.pop()
+
+        with zf.open("glosowania.json", "w") as raw:
+            raw.write(b"[")
+            for idx, rekord in enumerate(_iter_glosowania(sesja_ids)):
+                raw.write((b",\n" if idx else b"\n") + json.dumps(rekord, ensure_ascii=False).encode("utf-8"))
+                yield stream.pop()
+            raw.write(b"\n]\n")
+        yield stream.pop()
+
+    yield stream.pop()
@@ -0,0 +1,75 @@
+"""Zbiór komisji użytkownika (członek lub przewodniczący) trzymany w cache.
+
+Klucz zawiera globalny numer wersji; każda zmiana składu komisji
+(dodanie/usunięcie członka, nowa komisja, zmiana przewodniczącego)
+podbija wersję, więc wszystkie zapamiętane zbiory tracą ważność naraz.
+Zmiany składu są rzadkie, a sprawdzenia uprawnień – przy każdym żądaniu
+komisji (także przy oddawaniu głosu).
+
+Numer wersji leży we wspólnym magazynie stanu (core.stan_wspolny), więc
+podbicie w jednym procesie unieważnia zbiory zapamiętane w cache pozostałych;
+KOMISJE_CACHE_TTL ogranicza dodatkowo czas życia wpisu.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from . import stan_wspolny
+from .models import Komisja
+
+WERSJA_KEY = "komisje:czlonkostwo:wersja"
+
+
+def _ttl():
+    return int(getattr(settings, "KOMISJE_CACHE_TTL", 300))
+
+
+def _klucz(user_id):
+    return f"komisje:czlonkostwo:{stan_wspolny.wersja(WERSJA_KEY)}:{user_id}"
+
+
+def komisje_uzytkownika(user):
+    """frozenset id komisji, w których użytkownik jest członkiem lub przewodniczącym."""
+    if not getattr(user, "is_authenticated", False):
+        return frozenset()
+    # w obrębie jednego żądania request.user to ten sam obiekt – pamiętamy wynik na nim
+    memo = getattr(user, "_komisje_ids", None)
+    if memo is not None:
+        return memo
+
+    key = _klucz(user.id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(
+            Komisja.objects.filter(Q(czlonkowie=user) | Q(przewodniczacy=user)).values_list("id", flat=True).distinct()
+        )
+        cache.set(key, ids, timeout=_ttl())
+    user._komisje_ids = ids
+    return ids
+
+
+def uniewaznij():
+    """Podbija wersję – wszystkie zapamiętane zbiory komisji przestają obowiązywać."""
+    stan_wspolny.podbij(WERSJA_KEY)
+
+
+def _po_zmianie(**kwargs):
+    if kwargs.get("raw"):
+        return
+    uniewaznij()
+    # i ponownie po zatwierdzeniu: inny proces mógł w międzyczasie zapamiętać stary skład
+    transaction.on_commit(uniewaznij)
+
+
+def _po_zmianie_czlonkow(action, **kwargs):
+    if action in {"post_add", "post_remove", "post_clear"}:
+        _po_zmianie()
+
+
+def podlacz_sygnaly():
+    post_save.connect(_po_zmianie, sender=Komisja, dispatch_uid="czlonkostwo_komisja_save")
+    post_delete.connect(_po_zmianie, sender=Komisja, dispatch_uid="czlonkostwo_komisja_delete")
+    m2m_changed.connect(_po_zmianie_czlonkow, sender=Komisja.czlonkowie.through, dispatch_uid="czlonkostwo_czlonkowie")
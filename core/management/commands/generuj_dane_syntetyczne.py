@@ -0,0 +1,253 @@
+# core/management/commands/generuj_dane_syntetyczne.py
+
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import Uzytkownik
+from core import czlonkostwo, statystyki, wyszukiwanie
+from core.models import (
+    Glos,
+    Glosowanie,
+    Kandydat,
+    Komisja,
+    KomisjaGlos,
+    KomisjaGlosowanie,
+    KomisjaPodpunktObrad,
+    KomisjaPunktObrad,
+    KomisjaSesja,
+    KomisjaWniosek,
+    Obecnosc,
+    PodpunktObrad,
+    PunktObrad,
+    Sesja,
+    Wniosek,
+)
+
+# dane syntetyczne rozpoznajemy po prefiksach – pozwala to je usunąć bez
+# ruszania prawdziwych sesji i kont
+PREFIKS_NAZWY = "[synt]"
+PREFIKS_LOGINU = "synt."
+PREFIKS_SYGNATURY = "SYNT/"
+
+GLOSY = ("za", "za", "za", "przeciw", "wstrzymuje")
+PARTIA = 1000
+
+
+def usun_dane_syntetyczne():
+    """Usuwa wcześniej wygenerowane dane; zwraca liczbę usuniętych obiektów."""
+    usuniete = 0
+    # Komisja.przewodniczacy i KomisjaWniosek.autor są PROTECT – komisje najpierw
+    usuniete += Komisja.objects.filter(nazwa__startswith=PREFIKS_NAZWY).delete()[0]
+    usuniete += Sesja.objects.filter(nazwa__startswith=PREFIKS_NAZWY).delete()[0]
+    usuniete += Uzytkownik.objects.filter(username__startswith=PREFIKS_LOGINU).delete()[0]
+    return usuniete
+
+
+def generuj(*, sesje, punkty, podpunkty, radni, komisje, wnioski, seed, aktywna=False):
+    """Tworzy syntetyczny zbiór danych (bulk_create) i zwraca {model: liczba}.
+
+    Ten sam ``seed`` i te same parametry dają te same treści i głosy, więc
+    pomiary kolejnych wersji można porównywać na identycznych danych.
+    """
+    los = random.Random(seed)
+    teraz = timezone.now()
+    liczby = {}
+
+    def zapisz(model, obiekty):
+        wynik = model.objects.bulk_create(obiekty, batch_size=PARTIA)
+        liczby[model.__name__] = liczby.get(model.__name__, 0) + len(wynik)
+        return wynik
+
+    haslo = make_password(None)
+    konta = zapisz(Uzytkownik, [
+        Uzytkownik(
+            username=f"{PREFIKS_LOGINU}radny{i:03d}",
+            imie=f"Radny{i:03d}",
+            nazwisko=f"Syntetyczny{i:03d}",
+            rola="radny",
+            password=haslo,
+            must_change_password=False,
+        )
+        for i in range(1, radni + 1)
+    ] + [
+        Uzytkownik(username=f"{PREFIKS_LOGINU}prezydium", imie="Prezydium", nazwisko="Syntetyczne",
+                   rola="prezydium", password=haslo, must_change_password=False),
+    ])
+    rada = konta[:radni]
+
+    # --- sesje rady ---
+    sesje_rady = zapisz(Sesja, [
+        Sesja(
+            nazwa=f"{PREFIKS_NAZWY} Sesja {i:03d}",
+            data=teraz - timedelta(days=7 * (sesje - i)),
+            opis=f"Syntetyczna sesja nr {i}",
+            aktywna=False,
+            opublikowana=True,
+        )
+        for i in range(1, sesje + 1)
+    ])
+    punkty_rady = zapisz(PunktObrad, [
+        PunktObrad(sesja=s, numer=n, tytul=f"Punkt {n}: projekt uchwały {los.randint(1, 999)}",
+                   opis=f"**Uzasadnienie** punktu {n}\n\n- wniosek komisji\n- opinia prawna")
+        for s in sesje_rady
+        for n in range(1, punkty + 1)
+    ])
+    zapisz(PodpunktObrad, [
+        PodpunktObrad(punkt_nadrzedny=p, numer=n, tytul=f"Podpunkt {p.numer}.{n}")
+        for p in punkty_rady
+        for n in range(1, podpunkty + 1)
+    ])
+    # co dziesiąty punkt to wybory (głosowanie na kandydatów)
+    wybory = [p for p in punkty_rady if p.numer % 10 == 0]
+    kandydaci = zapisz(Kandydat, [
+        Kandydat(punkt_obrad=p, imie=f"Kandydat{n}", nazwisko=f"Punktu{p.id}")
+        for p in wybory
+        for n in range(1, 4)
+    ])
+    kandydaci_punktu = {}
+    for k in kandydaci:
+        kandydaci_punktu.setdefault(k.punkt_obrad_id, []).append(k)
+    glosowania = zapisz(Glosowanie, [
+        Glosowanie(
+            punkt_obrad=p,
+            nazwa=f"Głosowanie nad punktem {p.numer}",
+            typ="kandydaci" if p.id in kandydaci_punktu else "zwykle",
+            jawnosc="tajne" if p.id in kandydaci_punktu else "jawne",
+        )
+        for p in punkty_rady
+    ])
+    zapisz(Obecnosc, [
+        Obecnosc(sesja=s, radny=r, obecny=los.random() < 0.9)
+        for s in sesje_rady
+        for r in rada
+    ])
+    glosy = []
+    for g in glosowania:
+        kandydaci_g = kandydaci_punktu.get(g.punkt_obrad_id)
+        for r in rada:
+            if kandydaci_g:
+                glosy.append(Glos(glosowanie=g, uzytkownik=r, kandydat=los.choice(kandydaci_g)))
+            else:
+                glosy.append(Glos(glosowanie=g, uzytkownik=r, glos=los.choice(GLOSY)))
+    zapisz(Glos, glosy)
+
+    start_sygnatur = Wniosek.objects.filter(sygnatura__startswith=PREFIKS_SYGNATURY).count()
+    zapisz(Wniosek, [
+        Wniosek(
+            radny=r,
+            punkt_obrad=los.choice(punkty_rady),
+            sygnatura=f"{PREFIKS_SYGNATURY}{start_sygnatur + i:06d}",
+            tresc=f"Wniosek w sprawie {los.choice(('drogi', 'szkoły', 'budżetu', 'oświetlenia'))} nr {i}",
+            typ=los.choice(("wniosek", "zapytanie")),
+            zatwierdzony=los.random() < 0.5,
+        )
+        for i, r in enumerate((r for r in rada for _ in range(wnioski)), start=1)
+    ])
+
+    # --- komisje ---
+    komisje_obj = zapisz(Komisja, [
+        Komisja(nazwa=f"{PREFIKS_NAZWY} Komisja {i}", przewodniczacy=rada[(i - 1) % len(rada)])
+        for i in range(1, komisje + 1)
+    ]) if rada else []
+    czlonkowie = {k.id: los.sample(rada, min(len(rada), 9)) for k in komisje_obj}
+    Czlonek = Komisja.czlonkowie.through
+    zapisz(Czlonek, [
+        Czlonek(komisja=k, uzytkownik=r)
+        for k in komisje_obj
+        for r in czlonkowie[k.id]
+    ])
+    posiedzenia = zapisz(KomisjaSesja, [
+        KomisjaSesja(komisja=k, nazwa=f"{PREFIKS_NAZWY} Posiedzenie {n}", data=teraz - timedelta(days=14 * n), aktywna=False)
+        for k in komisje_obj
+        for n in range(1, sesje + 1)
+    ])
+    punkty_komisji = zapisz(KomisjaPunktObrad, [
+        KomisjaPunktObrad(sesja=s, numer=n, tytul=f"Opinia do punktu {n}")
+        for s in posiedzenia
+        for n in range(1, max(punkty // 2, 1) + 1)
+    ])
+    zapisz(KomisjaPodpunktObrad, [
+        KomisjaPodpunktObrad(punkt_nadrzedny=p, numer=n, tytul=f"Podpunkt {p.numer}.{n}")
+        for p in punkty_komisji
+        for n in range(1, podpunkty + 1)
+    ])
+    posiedzenia_komisji = {}
+    for s in posiedzenia:
+        posiedzenia_komisji.setdefault(s.komisja_id, []).append(s)
+    glosowania_komisji = zapisz(KomisjaGlosowanie, [
+        KomisjaGlosowanie(punkt_obrad=p, nazwa=f"Opinia do punktu {p.numer}")
+        for p in punkty_komisji
+    ])
+    zapisz(KomisjaGlos, [
+        KomisjaGlos(glosowanie=g, uzytkownik=r, glos=los.choice(GLOSY))
+        for g in glosowania_komisji
+        for r in czlonkowie[g.punkt_obrad.sesja.komisja_id]
+    ])
+    zapisz(KomisjaWniosek, [
+        KomisjaWniosek(komisja=k, sesja=los.choice(posiedzenia_komisji[k.id]),
+                       autor=los.choice(czlonkowie[k.id]), tresc=f"Postulat komisji nr {n}", typ="postulat")
+        for k in komisje_obj
+        for n in range(1, wnioski + 1)
+    ])
+
+    if aktywna and sesje_rady:
+        sesje_rady[-1].ustaw_aktywna()
+    return liczby
+
+
+class Command(BaseCommand):
+    help = (
+        "Generuje syntetyczne dane do pomiarów wydajności (sesje, punkty, głosowania, komisje, wnioski) "
+        "przez bulk_create; dane mają prefiks „[synt]” / „synt.” i można je usunąć opcją --wyczysc"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sesje", type=int, default=10, help="Liczba sesji rady (i posiedzeń na komisję)")
+        parser.add_argument("--punkty", type=int, default=30, help="Liczba punktów obrad na sesję")
+        parser.add_argument("--podpunkty", type=int, default=2, help="Liczba podpunktów na punkt")
+        parser.add_argument("--radni", type=int, default=40, help="Liczba kont radnych")
+        parser.add_argument("--komisje", type=int, default=5, help="Liczba komisji")
+        parser.add_argument("--wnioski", type=int, default=5, help="Wnioski na radnego (i postulaty na komisję)")
+        parser.add_argument("--seed", type=int, default=1, help="Ziarno generatora – te same dane przy każdym uruchomieniu")
+        parser.add_argument("--aktywna", action="store_true", help="Ustaw ostatnią wygenerowaną sesję jako aktywną")
+        parser.add_argument("--wyczysc", action="store_true", help="Najpierw usuń poprzednio wygenerowane dane")
+        parser.add_argument("--bez-indeksu", action="store_true", help="Nie przebudowuj indeksu wyszukiwania")
+
+    def handle(self, *args, **options):
+        if options["radni"] < 1 or options["sesje"] < 1:
+            raise CommandError("--radni i --sesje muszą wynosić co najmniej 1")
+        if options["wyczysc"]:
+            self.stdout.write(f"Usunięto obiektów: {usun_dane_syntetyczne()}")
+        elif Uzytkownik.objects.filter(username__startswith=PREFIKS_LOGINU).exists():
+            raise CommandError("Dane syntetyczne już istnieją – użyj --wyczysc, aby wygenerować je od nowa")
+
+        start = time.perf_counter()
+        with transaction.atomic():
+            liczby = generuj(
+                sesje=options["sesje"],
+                punkty=options["punkty"],
+                podpunkty=options["podpunkty"],
+                radni=options["radni"],
+                komisje=options["komisje"],
+                wnioski=options["wnioski"],
+                seed=options["seed"],
+                aktywna=options["aktywna"],
+            )
+            # bulk_create nie wysyła sygnałów – indeks, statystyki radnych i wersję
+            # członkostwa uzupełniamy sami
+            if not options["bez_indeksu"]:
+                wyszukiwanie.przebuduj()
+            statystyki.przebuduj()
+        czlonkostwo.uniewaznij()
+
+        for model, liczba in liczby.items():
+            self.stdout.write(f"  {model}: {liczba}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Wygenerowano {sum(liczby.values())} obiektów w {time.perf_counter() - start:.1f} s"
+        ))
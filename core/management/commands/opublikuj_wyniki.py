@@ -0,0 +1,29 @@
+# core/management/commands/opublikuj_wyniki.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import publikacja
+from core.models import Sesja
+
+
+class Command(BaseCommand):
+    help = (
+        "Renderuje od nowa statyczne strony i pliki JSON wyników opublikowanych sesji "
+        "(MEDIA_ROOT/PUBLIKACJA_KATALOG) – np. po zmianie szablonów albo przeniesieniu MEDIA_ROOT"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sesja", type=int, help="ID jednej sesji (domyślnie wszystkie opublikowane)")
+
+    def handle(self, *args, **options):
+        sesje = Sesja.objects.filter(opublikowana=True, jest_usunieta=False).order_by("data", "id")
+        if options["sesja"]:
+            sesje = sesje.filter(id=options["sesja"])
+            if not sesje.exists():
+                raise CommandError(f"Sesja {options['sesja']} nie istnieje albo nie jest opublikowana")
+        liczba = 0
+        for sesja in sesje:
+            publikacja.opublikuj(sesja, odswiez=False)
+            liczba += 1
+        publikacja.odswiez_liste()
+        self.stdout.write(self.style.SUCCESS(f"Opublikowano sesji: {liczba}"))
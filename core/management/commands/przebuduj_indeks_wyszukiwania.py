@@ -0,0 +1,15 @@
+# core/management/commands/przebuduj_indeks_wyszukiwania.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import wyszukiwanie
+
+
+class Command(BaseCommand):
+    help = "Buduje od zera indeks wyszukiwania (wnioski, wnioski komisji, punkty i podpunkty obrad)"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            liczba = wyszukiwanie.przebuduj()
+        self.stdout.write(self.style.SUCCESS(f"Zaindeksowano obiektów: {liczba}"))
@@ -0,0 +1,16 @@
+# core/management/commands/przebuduj_statystyki_radnych.py
+
+from django.core.management.base import BaseCommand
+
+from core import statystyki
+
+
+class Command(BaseCommand):
+    help = (
+        "Liczy od zera statystyki radnych per kadencja (obecności, głosy, wnioski) – "
+        "np. po zmianie KADENCJE, dat sesji albo imporcie danych z pominięciem sygnałów"
+    )
+
+    def handle(self, *args, **options):
+        liczba = statystyki.przebuduj()
+        self.stdout.write(self.style.SUCCESS(f"Zapisano wierszy statystyk: {liczba}"))
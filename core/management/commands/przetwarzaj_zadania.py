@@ -0,0 +1,61 @@
+# core/management/commands/przetwarzaj_zadania.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import zadania
+
+
+class Command(BaseCommand):
+    help = "Wykonuje zadania eksportu (PDF, archiwa) z kolejki w bazie danych"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--raz",
+            action="store_true",
+            help="Wykonaj oczekujące zadania i zakończ (bez pętli).",
+        )
+        parser.add_argument(
+            "--interwal",
+            type=float,
+            default=2.0,
+            help="Co ile sekund sprawdzać kolejkę.",
+        )
+        parser.add_argument(
+            "--przechowuj-dni",
+            type=int,
+            default=None,
+            help="Po ilu dniach usuwać zakończone zadania i ich pliki (domyślnie ZADANIA_PRZECHOWUJ_DNI, 7).",
+        )
+        parser.add_argument(
+            "--odzyskaj-po",
+            type=int,
+            default=30,
+            help="Po ilu minutach zadanie „w toku” uznać za porzucone i wznowić.",
+        )
+
+    def handle(self, *args, **options):
+        interwal = options["interwal"]
+        odzyskaj_po = options["odzyskaj_po"]
+        ostatnie_sprzatanie = None
+
+        while True:
+            # sprzątanie starych zadań – przy starcie, a potem co godzinę
+            if ostatnie_sprzatanie is None or time.monotonic() - ostatnie_sprzatanie >= 3600:
+                usuniete = zadania.usun_zakonczone(po_dniach=options["przechowuj_dni"])
+                ostatnie_sprzatanie = time.monotonic()
+                if usuniete:
+                    self.stdout.write(f"Usunięto stare zadania: {usuniete}")
+
+            odzyskane = zadania.odzyskaj_porzucone(po_minutach=odzyskaj_po)
+            if odzyskane:
+                self.stdout.write(self.style.WARNING(f"Wznowiono porzucone zadania: {odzyskane}"))
+
+            wykonane = zadania.wykonaj_oczekujace()
+            if wykonane:
+                self.stdout.write(self.style.SUCCESS(f"Wykonano zadania: {wykonane}"))
+
+            if options["raz"]:
+                return
+            time.sleep(interwal)
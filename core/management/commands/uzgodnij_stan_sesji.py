@@ -0,0 +1,64 @@
+# core/management/commands/uzgodnij_stan_sesji.py
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core.models import KomisjaPodpunktObrad, KomisjaPunktObrad, KomisjaSesja, PodpunktObrad, Sesja
+
+
+def wyczysc_wygasle_przerwy():
+    """Czyści pola przerw, które już minęły; zwraca liczbę sesji."""
+    return sum(
+        1 for sesja in Sesja.objects.filter(przerwa_start__isnull=False) if sesja.wyczysc_wygasla_przerwe()
+    )
+
+
+def uzgodnij_wskazniki():
+    """Ustawia brakujące wskaźniki aktywnego (pod)punktu na podstawie flag „aktywny”.
+
+    To samo wyliczają w locie endpointy ekranów, ale bez zapisu – tu zapisujemy
+    wynik, żeby kolejne odczyty trafiały od razu we wskaźnik.
+    """
+    zmienione = 0
+    for sesja in Sesja.objects.filter(aktywny_podpunkt__isnull=True, punkty__podpunkty__aktywny=True).distinct():
+        podpunkt = (
+            PodpunktObrad.objects.filter(punkt_nadrzedny__sesja=sesja, aktywny=True)
+            .order_by("punkt_nadrzedny__numer", "numer")
+            .first()
+        )
+        if podpunkt is not None:
+            zmienione += Sesja.objects.filter(id=sesja.id, aktywny_podpunkt__isnull=True).update(aktywny_podpunkt=podpunkt)
+
+    kandydaci = KomisjaSesja.objects.filter(
+        Q(aktywny_podpunkt__isnull=True, punkty__podpunkty__aktywny=True)
+        | Q(aktywny_punkt__isnull=True, punkty__aktywny=True)
+    ).distinct()
+    for sesja in kandydaci:
+        zmiany = {}
+        if sesja.aktywny_podpunkt_id is None:
+            podpunkt = (
+                KomisjaPodpunktObrad.objects.filter(punkt_nadrzedny__sesja=sesja, aktywny=True)
+                .order_by("punkt_nadrzedny__numer", "numer")
+                .first()
+            )
+            if podpunkt is not None:
+                zmiany["aktywny_podpunkt"] = podpunkt
+        if sesja.aktywny_punkt_id is None:
+            punkt = KomisjaPunktObrad.objects.filter(sesja=sesja, aktywny=True).order_by("numer").first()
+            if punkt is not None:
+                zmiany["aktywny_punkt"] = punkt
+        if zmiany:
+            zmienione += KomisjaSesja.objects.filter(id=sesja.id).update(**zmiany)
+    return zmienione
+
+
+class Command(BaseCommand):
+    help = (
+        "Uzgadnia stan sesji poza ścieżką odczytu: czyści wygasłe przerwy i uzupełnia "
+        "wskaźniki aktywnego punktu/podpunktu (do uruchamiania okresowo, np. z crona)"
+    )
+
+    def handle(self, *args, **options):
+        przerwy = wyczysc_wygasle_przerwy()
+        wskazniki = uzgodnij_wskazniki()
+        self.stdout.write(self.style.SUCCESS(f"Wygasłe przerwy: {przerwy}, uzupełnione wskaźniki: {wskazniki}"))
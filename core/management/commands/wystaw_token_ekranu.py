@@ -0,0 +1,31 @@
+# core/management/commands/wystaw_token_ekranu.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from core import tokeny_ekranu
+from core.models import KomisjaSesja, Sesja
+
+
+class Command(BaseCommand):
+    help = "Wystawia podpisany link do ekranu sesji (rzutnik) działający bez logowania, tylko do odczytu"
+
+    def add_arguments(self, parser):
+        grupa = parser.add_mutually_exclusive_group(required=True)
+        grupa.add_argument("--sesja", type=int, help="ID sesji rady")
+        grupa.add_argument("--komisja-sesja", type=int, help="ID posiedzenia komisji")
+        parser.add_argument("--godziny", type=int, default=None, help="Ważność tokenu (domyślnie EKRAN_TOKEN_GODZINY)")
+        parser.add_argument("--host", default="", help="Adres serwisu, np. https://sesja.example.pl")
+
+    def handle(self, *args, **options):
+        if options["sesja"]:
+            model, sesja_id = Sesja, options["sesja"]
+        else:
+            model, sesja_id = KomisjaSesja, options["komisja_sesja"]
+        try:
+            sesja = model.objects.get(id=sesja_id)
+        except model.DoesNotExist:
+            raise CommandError(f"Nie znaleziono: {model._meta.verbose_name} #{sesja_id}")
+
+        token = tokeny_ekranu.wystaw(sesja, godziny=options["godziny"])
+        self.stdout.write(options["host"].rstrip("/") + reverse("sesja_ekran_token", args=[token]))
@@ -0,0 +1,36 @@
+# core/management/commands/zamroz_zamkniete_sesje.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import migawki
+from core.models import Sesja
+
+
+class Command(BaseCommand):
+    help = (
+        "Tworzy migawki zamkniętych sesji, które jeszcze ich nie mają (np. zamkniętych przed wprowadzeniem "
+        "migawek); z --przytnij usuwa też dane zamrożonych sesji z tabel bieżących"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--przytnij",
+            action="store_true",
+            help="Usuń punkty, głosowania, głosy i obecności zamrożonych sesji (wnioski zostają)",
+        )
+
+    def handle(self, *args, **options):
+        zamrozone = 0
+        for sesja in Sesja.objects.filter(jest_zamknieta=True, migawka__isnull=True).order_by("data", "id"):
+            migawki.zamroz(sesja)
+            zamrozone += 1
+        self.stdout.write(f"Utworzono migawek: {zamrozone}")
+
+        if options["przytnij"]:
+            usuniete = 0
+            for sesja in Sesja.objects.filter(jest_zamknieta=True, migawka__przycieto=False).order_by("data", "id"):
+                with transaction.atomic():
+                    usuniete += migawki.przytnij(sesja)
+            self.stdout.write(f"Usunięto obiektów z tabel bieżących: {usuniete}")
+        self.stdout.write(self.style.SUCCESS("Gotowe"))
@@ -0,0 +1,217 @@
+# core/management/commands/zmierz_wydajnosc.py
+
+import json
+import platform
+import re
+import statistics
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Uzytkownik
+from core.models import Glos, Glosowanie, KomisjaGlosowanie, KomisjaSesja, PunktObrad, Sesja
+
+
+def widoki(sesja, komisja_sesja=None):
+    """Lista (nazwa, url, rola) mierzonych widoków; rola None = żądanie anonimowe."""
+    glosowania = Glosowanie.objects.filter(punkt_obrad__sesja=sesja, podpunkt_obrad__isnull=True)
+    zwykle = glosowania.filter(typ="zwykle").first()
+    kandydaci = glosowania.filter(typ="kandydaci").first()
+
+    lista = [
+        ("radny", reverse("radny"), "radny"),
+        ("sesja_edytuj", reverse("sesja_edytuj", args=[sesja.id]), "prezydium"),
+        ("prezydium_agenda", reverse("prezydium_agenda"), "prezydium"),
+        ("obecnosci_prezidium", reverse("obecnosci_prezidium"), "prezydium"),
+        ("api_aktywny_punkt", reverse("api_aktywny_punkt", args=[sesja.id]), None),
+        ("wyniki", reverse("wyniki"), None),
+    ]
+    if zwykle:
+        lista += [
+            ("api_wyniki", reverse("api_wyniki", args=[zwykle.id]), None),
+            ("api_lista_glosow_jawne", reverse("api_lista_glosow_jawne", args=[zwykle.id]), None),
+        ]
+    if kandydaci:
+        lista.append(("api_wyniki_kandydaci", reverse("api_wyniki", args=[kandydaci.id]), None))
+    if komisja_sesja:
+        k, ks = komisja_sesja.komisja_id, komisja_sesja.id
+        lista += [
+            ("komisja_szczegoly", reverse("komisja_szczegoly", args=[k]), "przewodniczacy"),
+            ("komisja_sesja_edytuj", reverse("komisja_sesja_edytuj", args=[k, ks]), "przewodniczacy"),
+            ("api_komisja_aktywny_punkt", reverse("api_komisja_aktywny_punkt", args=[ks]), None),
+        ]
+        glosowanie = KomisjaGlosowanie.objects.filter(punkt_obrad__sesja=komisja_sesja).first()
+        if glosowanie:
+            lista.append(("api_komisja_wyniki", reverse("api_komisja_wyniki", args=[glosowanie.id]), None))
+    return lista
+
+
+def _kwantyl(wartosci, q):
+    uporzadkowane = sorted(wartosci)
+    return uporzadkowane[min(len(uporzadkowane) - 1, int(q * len(uporzadkowane)))]
+
+
+def _zapisuj_zapytania(lista):
+    def wrapper(execute, sql, params, many, context):
+        lista.append(sql)
+        return execute(sql, params, many, context)
+    return wrapper
+
+
+def zmierz(lista, uzytkownicy, powtorzenia=20, rozgrzewka=2):
+    """{nazwa: statystyki} – czasy z klienta testowego i liczba zapytań SQL.
+
+    Zapytania liczone są w osobnym przebiegu, żeby licznik nie wchodził do
+    mierzonego czasu.
+    """
+    klienci = {None: Client()}
+    for rola, user in uzytkownicy.items():
+        klienci[rola] = Client()
+        klienci[rola].force_login(user)
+
+    wyniki = {}
+    for nazwa, url, rola in lista:
+        klient = klienci[rola]
+        for _ in range(rozgrzewka):
+            klient.get(url)
+        zapytania = []
+        with connection.execute_wrapper(_zapisuj_zapytania(zapytania)):
+            status = klient.get(url).status_code
+        czasy = _czasy(lambda: klient.get(url), powtorzenia)
+        wyniki[nazwa] = {"url": url, "status": status, "zapytania": len(zapytania), **_statystyki(czasy)}
+    return wyniki
+
+
+def _czasy(fn, powtorzenia):
+    czasy = []
+    for _ in range(powtorzenia):
+        start = time.perf_counter()
+        fn()
+        czasy.append((time.perf_counter() - start) * 1000)
+    return czasy
+
+
+def _statystyki(czasy):
+    return {
+        "min_ms": round(min(czasy), 2),
+        "mediana_ms": round(statistics.median(czasy), 2),
+        "p95_ms": round(_kwantyl(czasy, 0.95), 2),
+        "srednia_ms": round(statistics.fmean(czasy), 2),
+    }
+
+
+def zmierz_protokol(sesja, powtorzenia=3):
+    """Statystyki renderowania protokołu PDF sesji (bez cache), z liczbą stron i zapytań."""
+    from core.pdf_dokumenty import protokol_pdf_bytes
+
+    zapytania = []
+    with connection.execute_wrapper(_zapisuj_zapytania(zapytania)):
+        pdf = protokol_pdf_bytes(sesja)
+    return {
+        "strony": len(re.findall(rb"/Type /Page[^s]", pdf)),
+        "zapytania": len(zapytania),
+        **_statystyki(_czasy(lambda: protokol_pdf_bytes(sesja), powtorzenia)),
+    }
+
+
+def porownaj(poprzednie, obecne, prog=0.2):
+    """Lista opisów regresji: mediana wolniejsza o więcej niż ``prog`` albo więcej zapytań."""
+    regresje = []
+    for nazwa, teraz in obecne.items():
+        przed = poprzednie.get(nazwa)
+        if not przed:
+            continue
+        if teraz["mediana_ms"] > przed["mediana_ms"] * (1 + prog):
+            regresje.append(f"{nazwa}: mediana {przed['mediana_ms']} → {teraz['mediana_ms']} ms")
+        if teraz["zapytania"] > przed["zapytania"]:
+            regresje.append(f"{nazwa}: zapytania {przed['zapytania']} → {teraz['zapytania']}")
+    return regresje
+
+
+class Command(BaseCommand):
+    help = (
+        "Mierzy czasy i liczbę zapytań kluczowych widoków i API (klient testowy Django) "
+        "na bieżącej bazie – np. po generuj_dane_syntetyczne – i zapisuje wynik jako JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sesja", type=int, help="ID sesji rady (domyślnie aktywna)")
+        parser.add_argument("--powtorzenia", type=int, default=20, help="Liczba mierzonych żądań na widok")
+        parser.add_argument("--rozgrzewka", type=int, default=2, help="Liczba żądań przed pomiarem")
+        parser.add_argument("--powtorzenia-pdf", type=int, default=3, help="Liczba renderowań protokołu PDF (0 = pomiń)")
+        parser.add_argument("--wyjscie", help="Plik JSON na wyniki (domyślnie standardowe wyjście)")
+        parser.add_argument("--porownaj", help="Plik JSON z poprzedniego pomiaru – zgłoś regresje")
+        parser.add_argument("--prog", type=float, default=0.2, help="Dopuszczalny wzrost mediany (ułamek, domyślnie 0.2)")
+
+    def handle(self, *args, **options):
+        if options["sesja"]:
+            sesja = Sesja.objects.filter(id=options["sesja"]).first()
+        else:
+            sesja = Sesja.objects.filter(aktywna=True).first()
+        if sesja is None:
+            raise CommandError("Brak sesji do pomiaru – podaj --sesja albo ustaw aktywną sesję")
+        komisja_sesja = KomisjaSesja.objects.select_related("komisja").order_by("-data").first()
+
+        uzytkownicy = {
+            "radny": Uzytkownik.objects.filter(rola="radny").order_by("id").first(),
+            "prezydium": Uzytkownik.objects.filter(rola="prezydium").order_by("id").first(),
+        }
+        if komisja_sesja:
+            uzytkownicy["przewodniczacy"] = komisja_sesja.komisja.przewodniczacy
+        brakujace = [rola for rola, user in uzytkownicy.items() if user is None]
+        if brakujace:
+            raise CommandError(f"Brak kont o rolach: {', '.join(brakujace)}")
+
+        # klient testowy wysyła Host: testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            wyniki = zmierz(
+                widoki(sesja, komisja_sesja),
+                uzytkownicy,
+                powtorzenia=max(options["powtorzenia"], 1),
+                rozgrzewka=options["rozgrzewka"],
+            )
+        if options["powtorzenia_pdf"] > 0:
+            # render protokołu poza cache – tu, a nie w testach jednostkowych, mierzymy jego czas
+            wyniki["protokol_pdf"] = {
+                "url": None,
+                "status": None,
+                **zmierz_protokol(sesja, powtorzenia=options["powtorzenia_pdf"]),
+            }
+
+        raport = {
+            "czas": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "baza": connection.vendor,
+            "powtorzenia": options["powtorzenia"],
+            "dane": {
+                "sesja_id": sesja.id,
+                "punkty": PunktObrad.objects.filter(sesja=sesja).count(),
+                "radni": Uzytkownik.objects.filter(rola="radny").count(),
+                "glosy": Glos.objects.count(),
+            },
+            "widoki": wyniki,
+        }
+        tekst = json.dumps(raport, ensure_ascii=False, indent=2)
+        if options["wyjscie"]:
+            with open(options["wyjscie"], "w", encoding="utf-8") as f:
+                f.write(tekst + "\n")
+            for nazwa, w in wyniki.items():
+                self.stdout.write(f"  {nazwa:<28} {w['mediana_ms']:>8.2f} ms  p95 {w['p95_ms']:>8.2f} ms  SQL {w['zapytania']}")
+        else:
+            self.stdout.write(tekst)
+
+        if options["porownaj"]:
+            with open(options["porownaj"], encoding="utf-8") as f:
+                poprzednie = json.load(f).get("widoki", {})
+            regresje = porownaj(poprzednie, wyniki, prog=options["prog"])
+            if regresje:
+                raise CommandError("Regresje wydajności:\n" + "\n".join(f"  {r}" for r in regresje))
+            self.stdout.write(self.style.SUCCESS("Brak regresji względem poprzedniego pomiaru"))
@@ -0,0 +1,287 @@
+"""Rejestr metryk żądań w pamięci procesu.
+
+Dla każdej nazwy URL (``api_wyniki``, ``api_aktywny_punkt``, ``oddaj_glos``…)
+zbieramy histogram czasu odpowiedzi oraz liczbę i łączny czas zapytań SQL.
+Dane trzymane są dwojako:
+
+- liczniki narastające od startu procesu (format Prometheus – serwer
+  metryk sam liczy przyrosty i sumuje procesy),
+- okno kroczące (domyślnie 15 minut w szczelinach minutowych) – dla
+  podglądu JSON i panelu operatora.
+
+Osobny rejestr ``zdarzenia`` zbiera pomiary spoza cyklu żądania: czas zapisu
+głosu (per głosowanie) i oczekiwanie na blokadę bazy, a ``ekrany`` – ostatnie
+odpytania stanu przez ekrany (rzutniki). Z tych trzech źródeł korzysta panel
+wydajności prezydium (``panel()``).
+
+Każdy proces workera ma własny rejestr; przy kilku workerach Prometheus
+zbiera je osobno (lub należy odpytać każdy proces).
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# górne granice kubełków histogramu czasu odpowiedzi [ms]
+KUBELKI_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Statystyka:
+    __slots__ = ("liczba", "czas_ms", "kubelki", "zapytania", "zapytania_max", "czas_sql_ms")
+
+    def __init__(self):
+        self.liczba = 0
+        self.czas_ms = 0.0
+        self.kubelki = [0] * (len(KUBELKI_MS) + 1)
+        self.zapytania = 0
+        self.zapytania_max = 0
+        self.czas_sql_ms = 0.0
+
+    def dodaj(self, czas_ms, zapytania=0, czas_sql_ms=0.0):
+        self.liczba += 1
+        self.czas_ms += czas_ms
+        self.kubelki[_indeks_kubelka(czas_ms)] += 1
+        self.zapytania += zapytania
+        self.zapytania_max = max(self.zapytania_max, zapytania)
+        self.czas_sql_ms += czas_sql_ms
+
+    def scal(self, inna):
+        self.liczba += inna.liczba
+        self.czas_ms += inna.czas_ms
+        self.kubelki = [a + b for a, b in zip(self.kubelki, inna.kubelki)]
+        self.zapytania += inna.zapytania
+        self.zapytania_max = max(self.zapytania_max, inna.zapytania_max)
+        self.czas_sql_ms += inna.czas_sql_ms
+
+    def kwantyl(self, q):
+        """Górna granica kubełka, w którym leży kwantyl q (None bez danych; inf powyżej skali)."""
+        if not self.liczba:
+            return None
+        prog = q * self.liczba
+        narastajaco = 0
+        for granica, ile in zip(KUBELKI_MS + (float("inf"),), self.kubelki):
+            narastajaco += ile
+            if narastajaco >= prog:
+                return granica
+        return float("inf")
+
+    def jako_slownik(self):
+        n = self.liczba or 1
+        # powyżej ostatniego kubełka nie znamy granicy – JSON nie ma „nieskończoności”
+        kwantyle = {q: self.kwantyl(q) for q in (0.5, 0.95, 0.99)}
+        kwantyle = {q: None if v == float("inf") else v for q, v in kwantyle.items()}
+        return {
+            "liczba": self.liczba,
+            "czas_sredni_ms": round(self.czas_ms / n, 2),
+            "p50_ms": kwantyle[0.5],
+            "p95_ms": kwantyle[0.95],
+            "p99_ms": kwantyle[0.99],
+            "zapytania_srednio": round(self.zapytania / n, 2),
+            "zapytania_max": self.zapytania_max,
+            "czas_sql_sredni_ms": round(self.czas_sql_ms / n, 2),
+        }
+
+
+def _indeks_kubelka(czas_ms):
+    for i, granica in enumerate(KUBELKI_MS):
+        if czas_ms <= granica:
+            return i
+    return len(KUBELKI_MS)
+
+
+class Rejestr:
+    def __init__(self, okno_s=900, szczelina_s=60):
+        self.okno_s = okno_s
+        self.szczelina_s = szczelina_s
+        self._lock = threading.Lock()
+        self._calkowite = {}
+        self._szczeliny = deque()
+
+    def zapisz(self, nazwa, czas_ms, zapytania=0, czas_sql_ms=0.0, teraz=None):
+        teraz = time.time() if teraz is None else teraz
+        start = int(teraz // self.szczelina_s) * self.szczelina_s
+        with self._lock:
+            self._calkowite.setdefault(nazwa, Statystyka()).dodaj(czas_ms, zapytania, czas_sql_ms)
+            if not self._szczeliny or self._szczeliny[-1][0] != start:
+                self._szczeliny.append((start, {}))
+                self._przytnij(teraz)
+            self._szczeliny[-1][1].setdefault(nazwa, Statystyka()).dodaj(czas_ms, zapytania, czas_sql_ms)
+
+    def _przytnij(self, teraz):
+        while self._szczeliny and self._szczeliny[0][0] <= teraz - self.okno_s - self.szczelina_s:
+            self._szczeliny.popleft()
+
+    def okno(self, sekundy=None, teraz=None):
+        """Statystyki z ostatnich ``sekundy`` (domyślnie całe okno): {nazwa: Statystyka}."""
+        teraz = time.time() if teraz is None else teraz
+        granica = teraz - (self.okno_s if sekundy is None else sekundy)
+        wynik = {}
+        with self._lock:
+            for start, dane in self._szczeliny:
+                if start + self.szczelina_s <= granica:
+                    continue
+                for nazwa, stat in dane.items():
+                    wynik.setdefault(nazwa, Statystyka()).scal(stat)
+        return wynik
+
+    def calkowite(self):
+        with self._lock:
+            kopia = {}
+            for nazwa, stat in self._calkowite.items():
+                kopia[nazwa] = Statystyka()
+                kopia[nazwa].scal(stat)
+            return kopia
+
+    def wyczysc(self):
+        with self._lock:
+            self._calkowite.clear()
+            self._szczeliny.clear()
+
+
+class Ekrany:
+    """Klienci odpytujący stan ekranu: {klucz: czas ostatniego odpytania}."""
+
+    def __init__(self, limit=5000):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._ostatnio = {}
+
+    def odnotuj(self, klucz, teraz=None):
+        teraz = time.time() if teraz is None else teraz
+        with self._lock:
+            # ponowne wstawienie przenosi klucz na koniec – słownik jest uporządkowany od najstarszego
+            self._ostatnio.pop(klucz, None)
+            self._ostatnio[klucz] = teraz
+            if len(self._ostatnio) > self.limit:
+                del self._ostatnio[next(iter(self._ostatnio))]
+
+    def aktywne(self, sekundy=30, teraz=None):
+        teraz = time.time() if teraz is None else teraz
+        with self._lock:
+            while self._ostatnio:
+                klucz = next(iter(self._ostatnio))
+                if self._ostatnio[klucz] >= teraz - sekundy:
+                    break
+                del self._ostatnio[klucz]
+            return len(self._ostatnio)
+
+    def wyczysc(self):
+        with self._lock:
+            self._ostatnio.clear()
+
+
+rejestr = Rejestr()
+zdarzenia = Rejestr()
+ekrany = Ekrany()
+
+# widoki, których odpytywanie oznacza podłączony ekran
+WIDOKI_EKRANOW = ("api_aktywny_punkt", "api_komisja_aktywny_punkt")
+WIDOKI_GLOSOWANIA = ("oddaj_glos", "komisja_oddaj_glos")
+WIDOKI_ODPYTYWANIA = WIDOKI_EKRANOW + (
+    "api_wyniki",
+    "api_komisja_wyniki",
+    "api_lista_glosow_jawne",
+    "api_komisja_lista_glosow_jawne",
+    "api_ekran_komunikat",
+)
+
+BLOKADA_BAZY = "blokada_bazy"
+
+
+def zapis_glosu(glosowanie_id):
+    return f"zapis_glosu:{glosowanie_id}"
+
+
+def probkowanie():
+    """Ułamek żądań objętych pomiarem (METRYKI_PROBKOWANIE, 0 wyłącza)."""
+    return float(getattr(settings, "METRYKI_PROBKOWANIE", 1.0))
+
+
+def prog_blokady_ms():
+    """Zapis wolniejszy niż ten próg liczymy jako oczekiwanie na blokadę (METRYKI_PROG_BLOKADY_MS)."""
+    return float(getattr(settings, "METRYKI_PROG_BLOKADY_MS", 50))
+
+
+@contextmanager
+def czas_zdarzenia(nazwa):
+    """Mierzy blok kodu i zapisuje czas w rejestrze ``zdarzenia``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        zdarzenia.zapisz(nazwa, (time.perf_counter() - start) * 1000)
+
+
+# --------------------------------------------------
+# Eksport
+# --------------------------------------------------
+
+def jako_json(teraz=None):
+    okno = rejestr.okno(teraz=teraz)
+    return {
+        "probkowanie": probkowanie(),
+        "okno_s": rejestr.okno_s,
+        "widoki": {nazwa: stat.jako_slownik() for nazwa, stat in sorted(okno.items())},
+    }
+
+
+def _scalone(okno, nazwy):
+    wynik = Statystyka()
+    for nazwa in nazwy:
+        if nazwa in okno:
+            wynik.scal(okno[nazwa])
+    return wynik
+
+
+def panel(glosowanie_id=None, sekundy=300, teraz=None):
+    """Dane panelu wydajności: ruch, p95 głosowania i odpytywania, ekrany, blokady, zapis głosu."""
+    teraz = time.time() if teraz is None else teraz
+    ostatnia_minuta = rejestr.okno(60, teraz=teraz)
+    okno = rejestr.okno(sekundy, teraz=teraz)
+    okno_zdarzen = zdarzenia.okno(sekundy, teraz=teraz)
+    blokady = okno_zdarzen.get(BLOKADA_BAZY, Statystyka())
+    glos = okno_zdarzen.get(zapis_glosu(glosowanie_id), Statystyka()) if glosowanie_id else None
+    return {
+        "okno_s": sekundy,
+        "zadania_na_s": round(sum(s.liczba for s in ostatnia_minuta.values()) / 60, 2),
+        "glosowanie": _scalone(okno, WIDOKI_GLOSOWANIA).jako_slownik(),
+        "odpytywanie": _scalone(okno, WIDOKI_ODPYTYWANIA).jako_slownik(),
+        "ekrany": ekrany.aktywne(teraz=teraz),
+        "blokady": {"liczba": blokady.liczba, "czas_ms": round(blokady.czas_ms, 1)},
+        "zapis_glosu": glos.jako_slownik() if glos is not None else None,
+    }
+
+
+def _etykieta(nazwa):
+    return nazwa.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def jako_prometheus():
+    linie = [
+        "# HELP esir_request_duration_seconds Czas obsługi żądania wg nazwy URL.",
+        "# TYPE esir_request_duration_seconds histogram",
+    ]
+    calkowite = sorted(rejestr.calkowite().items())
+    for nazwa, stat in calkowite:
+        widok = _etykieta(nazwa)
+        narastajaco = 0
+        for granica, ile in zip(KUBELKI_MS, stat.kubelki):
+            narastajaco += ile
+            linie.append(f'esir_request_duration_seconds_bucket{{view="{widok}",le="{granica / 1000:g}"}} {narastajaco}')
+        linie.append(f'esir_request_duration_seconds_bucket{{view="{widok}",le="+Inf"}} {stat.liczba}')
+        linie.append(f'esir_request_duration_seconds_sum{{view="{widok}"}} {stat.czas_ms / 1000:.6f}')
+        linie.append(f'esir_request_duration_seconds_count{{view="{widok}"}} {stat.liczba}')
+    linie += [
+        "# HELP esir_sql_queries_total Liczba zapytań SQL wg nazwy URL.",
+        "# TYPE esir_sql_queries_total counter",
+    ]
+    linie += [f'esir_sql_queries_total{{view="{_etykieta(n)}"}} {s.zapytania}' for n, s in calkowite]
+    linie += [
+        "# HELP esir_sql_duration_seconds_total Łączny czas zapytań SQL wg nazwy URL.",
+        "# TYPE esir_sql_duration_seconds_total counter",
+    ]
+    linie += [f'esir_sql_duration_seconds_total{{view="{_etykieta(n)}"}} {s.czas_sql_ms / 1000:.6f}' for n, s in calkowite]
+    return "\n".join(linie) + "\n"
@@ -0,0 +1,107 @@
+import hashlib
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection
+
+from . import metryki, profiler
+
+_ZAPISY = ("INSERT", "UPDATE", "DELETE")
+
+
+class _LicznikSql:
+    """execute_wrapper: liczy zapytania i ich łączny czas w obrębie żądania.
+
+    Zapis dłuższy niż METRYKI_PROG_BLOKADY_MS albo błąd „database is locked”
+    trafia do metryki.zdarzenia jako oczekiwanie na blokadę bazy.
+    """
+
+    __slots__ = ("zapytania", "czas_ms", "prog_blokady_ms")
+
+    def __init__(self):
+        self.zapytania = 0
+        self.czas_ms = 0.0
+        self.prog_blokady_ms = metryki.prog_blokady_ms()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        zablokowane = False
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as exc:
+            zablokowane = "locked" in str(exc)
+            raise
+        finally:
+            czas_ms = (time.perf_counter() - start) * 1000
+            self.zapytania += 1
+            self.czas_ms += czas_ms
+            if zablokowane or (czas_ms > self.prog_blokady_ms and sql.lstrip()[:6].upper() in _ZAPISY):
+                metryki.zdarzenia.zapisz(metryki.BLOKADA_BAZY, czas_ms)
+
+
+def _klucz_ekranu(request):
+    """Identyfikator klienta ekranu: token, sesja albo adres z przeglądarką (skrót)."""
+    zrodlo = (
+        request.GET.get("token")
+        or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        or f"{request.META.get('REMOTE_ADDR', '')}|{request.META.get('HTTP_USER_AGENT', '')}"
+    )
+    return hashlib.blake2b(zrodlo.encode(), digest_size=8).hexdigest()
+
+
+class MetrykiMiddleware:
+    """Mierzy czas żądania i zapytania SQL per nazwa URL (core.metryki).
+
+    Mierzony jest tylko ułamek żądań (METRYKI_PROBKOWANIE); pozostałe
+    przechodzą bez opakowywania połączenia, więc koszt przy niskim
+    próbkowaniu to jedno losowanie. Odpytania ekranów odnotowywane są
+    zawsze – liczba podłączonych ekranów nie zależy od próbkowania.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        ulamek = metryki.probkowanie()
+        if ulamek <= 0 or (ulamek < 1 and random.random() >= ulamek):
+            response = self.get_response(request)
+            self._odnotuj_ekran(request, self._nazwa(request))
+            return response
+
+        licznik = _LicznikSql()
+        start = time.perf_counter()
+        with connection.execute_wrapper(licznik):
+            response = self.get_response(request)
+        czas_ms = (time.perf_counter() - start) * 1000
+
+        nazwa = self._nazwa(request)
+        metryki.rejestr.zapisz(nazwa, czas_ms, licznik.zapytania, licznik.czas_ms)
+        self._odnotuj_ekran(request, nazwa)
+        return response
+
+    @staticmethod
+    def _nazwa(request):
+        match = getattr(request, "resolver_match", None)
+        return (match.url_name or match.view_name) if match else "<nieznany>"
+
+    @staticmethod
+    def _odnotuj_ekran(request, nazwa):
+        if nazwa in metryki.WIDOKI_EKRANOW:
+            metryki.ekrany.odnotuj(_klucz_ekranu(request))
+
+
+class ProfilerMiddleware:
+    """Profiluje żądanie pod cProfile, gdy prosi o to administrator (core.profiler).
+
+    Musi stać za AuthenticationMiddleware – wyzwalacz sprawdza rolę użytkownika.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiler.wyzwolony(request):
+            return self.get_response(request)
+        response, _ = profiler.profiluj(request, self.get_response)
+        return response
@@ -0,0 +1,296 @@
+"""Migawki zamkniętych sesji (MigawkaSesji).
+
+Sesja.zamknij() zamraża sesję w jednym dokumencie JSON: porządek obrad,
+wszystkie głosowania z policzonymi wynikami, listy imienne głosowań
+jawnych, skład uprawnionych i obecność. Protokół PDF, zbiorczy eksport
+i strona wyników sesji czytają migawkę (dane_sesji), więc historia nie
+wymaga złączeń po tabelach bieżących ani ich obecności – przytnij() może
+je usunąć. Dla sesji bez migawki dane_sesji buduje ten sam dokument
+z tabel bieżących.
+
+Układ dokumentu (WERSJA 1)::
+
+    {"wersja", "sesja": {id, nazwa, data, opis},
+     "radni": [{id, imie, nazwisko, rola}],   # uprawnieni w chwili zamknięcia
+     "obecnosc": {"<id radnego>": bool},
+     "punkty": [{id, numer, tytul, opis, wnioski: [sygnatura], glosowania: [...],
+                 podpunkty: [{id, numer, tytul, opis, glosowania: [...]}]}]}
+
+Głosowania punktu są w kolejności protokołu (otwarte, potem najnowsze),
+każde z licznikami za/przeciw/wstrzymuje, progiem i wynikiem, wynikami
+kandydatów oraz – tylko dla jawnych – ``glosy_imienne`` {id radnego: głos}.
+"""
+
+import hashlib
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import Uzytkownik
+
+from .models import Glos, Glosowanie, MigawkaSesji, Obecnosc, PodpunktObrad, PunktObrad, Sesja, Wniosek
+from .statystyki import POLE_GLOSU, odnotuj_do_przeliczenia
+
+WERSJA = 1
+ROLE_UPRAWNIONYCH = ("radny", "administrator", "prezydium")
+
+
+def przycinac():
+    return bool(getattr(settings, "MIGAWKI_PRZYCINAJ", False))
+
+
+def _glosowanie_z_licznikami(g, liczniki, kandydaci, glosy_kandydatow, imienne):
+    c = liczniki[g.id]
+    dane = {
+        "id": g.id,
+        "nazwa": g.nazwa,
+        "typ": g.typ,
+        "jawnosc": g.jawnosc,
+        "wiekszosc": g.wiekszosc,
+        "otwarte": g.otwarte,
+        "utworzone": g.utworzone.isoformat(),
+        "liczba_uprawnionych": g.liczba_uprawnionych,
+        "za": c["za"],
+        "przeciw": c["przeciw"],
+        "wstrzymuje": c["wstrzymuje"],
+        "prog": None,
+        "przeszedl": None,
+        "kandydaci": kandydaci.get(g.id, []),
+        "glosy_kandydatow": glosy_kandydatow.get(g.id, []),
+        "glosy_imienne": imienne.get(g.id, {}) if g.jawnosc == "jawne" else {},
+    }
+    if g.typ != "kandydaci":
+        wynik = g.wynik_z_licznikow(c["za"], c["przeciw"], c["wstrzymuje"])
+        dane["prog"] = wynik["prog"]
+        dane["przeszedl"] = wynik["przeszedl"]
+    return dane
+
+
+def zbuduj(sesja):
+    """Dokument sesji z tabel bieżących – stała liczba zapytań niezależnie od jej wielkości."""
+    glosowania = list(
+        Glosowanie.objects.filter(punkt_obrad__sesja=sesja).order_by("-otwarte", "-utworzone", "-id")
+    )
+    ids = [g.id for g in glosowania]
+
+    kandydaci = defaultdict(list)
+    przypisani = (
+        Glosowanie.kandydaci.through.objects.filter(glosowanie_id__in=ids)
+        .order_by("kandydat__nazwisko", "kandydat__imie")
+        .values_list("glosowanie_id", "kandydat_id", "kandydat__imie", "kandydat__nazwisko")
+    )
+    for glosowanie_id, kandydat_id, imie, nazwisko in przypisani:
+        kandydaci[glosowanie_id].append({"id": kandydat_id, "imie": imie, "nazwisko": nazwisko, "glosy": 0})
+
+    liczniki = defaultdict(lambda: {"za": 0, "przeciw": 0, "wstrzymuje": 0})
+    glosy_kandydatow = defaultdict(list)
+    wiersze = (
+        Glos.objects.filter(glosowanie_id__in=ids)
+        .values_list("glosowanie_id", "glos", "kandydat_id", "kandydat__imie", "kandydat__nazwisko")
+        .annotate(liczba=Count("id"))
+        .order_by("glosowanie_id", "-liczba", "kandydat__nazwisko", "kandydat__imie")
+    )
+    for glosowanie_id, glos, kandydat_id, imie, nazwisko, liczba in wiersze:
+        if kandydat_id is not None:
+            glosy_kandydatow[glosowanie_id].append({"id": kandydat_id, "imie": imie, "nazwisko": nazwisko, "glosy": liczba})
+        elif glos:
+            liczniki[glosowanie_id][glos] += liczba
+    for glosowanie_id, lista in kandydaci.items():
+        oddane = {k["id"]: k["glosy"] for k in glosy_kandydatow[glosowanie_id]}
+        for k in lista:
+            k["glosy"] = oddane.get(k["id"], 0)
+
+    imienne = defaultdict(dict)
+    jawne = [g.id for g in glosowania if g.jawnosc == "jawne"]
+    for glosowanie_id, uzytkownik_id, glos, kandydat_id in (
+        Glos.objects.filter(glosowanie_id__in=jawne).values_list("glosowanie_id", "uzytkownik_id", "glos", "kandydat_id")
+    ):
+        imienne[glosowanie_id][str(uzytkownik_id)] = glos if kandydat_id is None else kandydat_id
+
+    obecnosc = {str(radny_id): obecny for radny_id, obecny in Obecnosc.objects.filter(sesja=sesja).values_list("radny_id", "obecny")}
+    glosujacy = {int(uid) for wpisy in imienne.values() for uid in wpisy}
+    radni = list(
+        Uzytkownik.objects.filter(Q(rola__in=ROLE_UPRAWNIONYCH) | Q(id__in=glosujacy | {int(uid) for uid in obecnosc}))
+        .order_by("nazwisko", "imie", "id")
+        .values("id", "imie", "nazwisko", "rola")
+    )
+
+    wnioski = defaultdict(list)
+    for punkt_id, sygnatura in Wniosek.objects.filter(punkt_obrad__sesja=sesja).order_by("sygnatura").values_list("punkt_obrad_id", "sygnatura"):
+        wnioski[punkt_id].append(sygnatura)
+
+    glosowania_punktu = defaultdict(list)
+    glosowania_podpunktu = defaultdict(list)
+    for g in glosowania:
+        dane = _glosowanie_z_licznikami(g, liczniki, kandydaci, glosy_kandydatow, imienne)
+        if g.podpunkt_obrad_id:
+            glosowania_podpunktu[g.podpunkt_obrad_id].append(dane)
+        else:
+            glosowania_punktu[g.punkt_obrad_id].append(dane)
+
+    podpunkty = defaultdict(list)
+    for p in PodpunktObrad.objects.filter(punkt_nadrzedny__sesja=sesja).order_by("numer", "id").values("id", "punkt_nadrzedny_id", "numer", "tytul", "opis"):
+        podpunkty[p.pop("punkt_nadrzedny_id")].append({**p, "glosowania": glosowania_podpunktu[p["id"]]})
+
+    punkty = [
+        {
+            **p,
+            "wnioski": wnioski[p["id"]],
+            "glosowania": glosowania_punktu[p["id"]],
+            "podpunkty": podpunkty[p["id"]],
+        }
+        for p in PunktObrad.objects.filter(sesja=sesja).order_by("numer", "id").values("id", "numer", "tytul", "opis")
+    ]
+
+    return {
+        "wersja": WERSJA,
+        "sesja": {"id": sesja.id, "nazwa": sesja.nazwa, "data": sesja.data.isoformat(), "opis": sesja.opis},
+        "radni": radni,
+        "obecnosc": obecnosc,
+        "punkty": punkty,
+    }
+
+
+def _liczniki_radnych(sesja):
+    """{"<id>": {pole StatystykaRadnego: liczba}} – obecności i głosy sesji (bez wniosków, te zostają w tabeli)."""
+    liczniki = defaultdict(lambda: defaultdict(int))
+    for radny_id, obecny in Obecnosc.objects.filter(sesja=sesja).values_list("radny_id", "obecny"):
+        liczniki[str(radny_id)]["obecnosci" if obecny else "nieobecnosci"] += 1
+    for row in (
+        Glos.objects.filter(glosowanie__punkt_obrad__sesja=sesja)
+        .values("uzytkownik_id", "glos")
+        .annotate(n=Count("id"))
+        .order_by()
+    ):
+        liczniki[str(row["uzytkownik_id"])][POLE_GLOSU.get(row["glos"], "glosy_na_kandydatow")] += row["n"]
+    return {uid: dict(pola) for uid, pola in liczniki.items()}
+
+
+def odcisk(dane):
+    return hashlib.sha256(json.dumps(dane, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def zamroz(sesja):
+    """Tworzy migawkę sesji (raz – istniejąca nie jest nadpisywana) i ją zwraca."""
+    with transaction.atomic():
+        istniejaca = MigawkaSesji.objects.select_for_update().filter(sesja=sesja).first()
+        if istniejaca is not None:
+            return istniejaca
+        dane = zbuduj(sesja)
+        return MigawkaSesji.objects.create(
+            sesja=sesja,
+            dane=dane,
+            liczniki_radnych=_liczniki_radnych(sesja),
+            odcisk=odcisk(dane),
+            data_sesji=sesja.data,
+        )
+
+
+def przytnij(sesja):
+    """Usuwa z tabel bieżących punkty (z podpunktami, głosowaniami, głosami
+    i kandydatami) oraz obecności zamrożonej sesji; zwraca liczbę usuniętych
+    obiektów. Wnioski zostają – bez powiązania z punktem (sygnatury są w migawce).
+    """
+    with transaction.atomic():
+        # najpierw flaga: statystyki radnych przeliczane po usunięciu biorą liczniki z migawki
+        if not MigawkaSesji.objects.filter(sesja=sesja).update(przycieto=True):
+            raise ValueError("Sesja nie ma migawki – najpierw ją zamknij.")
+        Wniosek.objects.filter(punkt_obrad__sesja=sesja).update(punkt_obrad=None)
+        Sesja.objects.filter(id=sesja.id).update(aktywny_podpunkt=None)
+        usuniete = PunktObrad.objects.filter(sesja=sesja).delete()[0]
+        obecnosci = Obecnosc.objects.filter(sesja=sesja)
+        odnotuj_do_przeliczenia(obecnosci.values_list("radny_id", flat=True))
+        usuniete += obecnosci.delete()[0]
+    return usuniete
+
+
+def dane_sesji(sesja):
+    """Dokument sesji: z migawki, jeśli sesja jest zamrożona, w przeciwnym razie z tabel bieżących."""
+    dane = MigawkaSesji.objects.filter(sesja_id=sesja.id).values_list("dane", flat=True).first()
+    return dane if dane is not None else zbuduj(sesja)
+
+
+def biezace_glosowanie(glosowania):
+    """Głosowanie pokazywane dla punktu: otwarte, a w braku – najnowsze (lista jest już tak uporządkowana)."""
+    return glosowania[0] if glosowania else None
+
+
+def kontekst_wynikow(dane):
+    """Kontekst strony wyników z dokumentu sesji – listy imienne gotowe do wyświetlenia.
+
+    Używany przez widok wyników i przez publikację statycznych stron (core.publikacja).
+    """
+    radni = dane["radni"]
+
+    def z_listami(glosowania):
+        wynik = []
+        for g in glosowania:
+            g = dict(g)
+            if g["jawnosc"] == "jawne":
+                nazwy_kandydatow = {
+                    k["id"]: f"{k['nazwisko']} {k['imie']}" for k in g["kandydaci"] + g["glosy_kandydatow"]
+                }
+                g["lista"] = []
+                for r in radni:
+                    glos = g["glosy_imienne"].get(str(r["id"]))
+                    g["lista"].append({
+                        "nazwisko": r["nazwisko"],
+                        "imie": r["imie"],
+                        "glos": nazwy_kandydatow.get(glos, glos) if g["typ"] == "kandydaci" else glos,
+                    })
+            wynik.append(g)
+        return wynik
+
+    punkty = [
+        {
+            **p,
+            "glosowania": z_listami(p["glosowania"]),
+            "podpunkty": [{**pp, "glosowania": z_listami(pp["glosowania"])} for pp in p["podpunkty"]],
+        }
+        for p in dane["punkty"]
+    ]
+    obecnosc = dane["obecnosc"]
+    return {
+        "sesja_dane": {**dane["sesja"], "data": parse_datetime(dane["sesja"]["data"])},
+        "punkty": punkty,
+        "obecni": [r for r in radni if obecnosc.get(str(r["id"])) is True],
+        "nieobecni": [r for r in radni if obecnosc.get(str(r["id"])) is False],
+    }
+
+
+def rekordy_glosowan(dane):
+    """Rekordy eksportu (archiwum.CSV_COLUMNS) ze wszystkich głosowań dokumentu sesji."""
+    sesja = dane["sesja"]
+    data = timezone.localtime(parse_datetime(sesja["data"])).isoformat()
+    glosowania = []
+    for p in dane["punkty"]:
+        glosowania += [(p["numer"], -1, None, g) for g in p["glosowania"]]
+        for pp in p["podpunkty"]:
+            glosowania += [(p["numer"], pp["numer"], pp["numer"], g) for g in pp["glosowania"]]
+    glosowania.sort(key=lambda w: (w[0], w[1], w[3]["id"]))
+
+    for punkt, _, podpunkt, g in glosowania:
+        kandydat = g["typ"] == "kandydaci"
+        yield {
+            "sesja_id": sesja["id"],
+            "sesja": sesja["nazwa"],
+            "data": data,
+            "punkt": punkt,
+            "podpunkt": podpunkt,
+            "glosowanie_id": g["id"],
+            "glosowanie": g["nazwa"],
+            "typ": g["typ"],
+            "jawnosc": g["jawnosc"],
+            "wiekszosc": g["wiekszosc"],
+            "za": g["za"],
+            "przeciw": g["przeciw"],
+            "wstrzymuje": g["wstrzymuje"],
+            "prog": None if kandydat else g["prog"],
+            "wynik": None if kandydat else ("przeszło" if g["przeszedl"] else "nie przeszło"),
+            "kandydaci": [{"nazwisko": k["nazwisko"], "imie": k["imie"], "glosy": k["glosy"]} for k in g["glosy_kandydatow"]],
+        }
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_komisjapodpunktobrad_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZadanieEksportu',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('typ', models.CharField(choices=[('protokol', 'Protokół sesji (PDF)'), ('wnioski', 'Wnioski (PDF)')], max_length=30)),
+                ('parametry', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('oczekuje', 'Oczekuje'), ('w_toku', 'W toku'), ('gotowe', 'Gotowe'), ('blad', 'Błąd')], default='oczekuje', max_length=10)),
+                ('plik', models.FileField(blank=True, upload_to='zadania/')),
+                ('nazwa_pliku', models.CharField(blank=True, max_length=255)),
+                ('blad', models.TextField(blank=True)),
+                ('utworzone', models.DateTimeField(auto_now_add=True)),
+                ('rozpoczete', models.DateTimeField(blank=True, null=True)),
+                ('zakonczone', models.DateTimeField(blank=True, null=True)),
+                ('zlecil', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='zadania_eksportu', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Zadanie eksportu',
+                'verbose_name_plural': 'Zadania eksportu',
+                'ordering': ['-utworzone'],
+            },
+        ),
+    ]
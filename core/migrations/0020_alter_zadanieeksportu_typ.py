@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_zadanieeksportu'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='zadanieeksportu',
+            name='typ',
+            field=models.CharField(choices=[('protokol', 'Protokół sesji (PDF)'), ('wnioski', 'Wnioski (PDF)'), ('archiwum', 'Archiwum protokołów (ZIP)')], max_length=30),
+        ),
+    ]
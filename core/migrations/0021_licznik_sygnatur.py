@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:33
+
+from django.db import migrations, models
+
+
+def zasiej_liczniki(apps, schema_editor):
+    """Ustawia liczniki na najwyższe numery z istniejących sygnatur W/<rok>/NNNN."""
+    Wniosek = apps.get_model("core", "Wniosek")
+    LicznikSygnatur = apps.get_model("core", "LicznikSygnatur")
+    ostatnie = {}
+    for sygnatura in Wniosek.objects.exclude(sygnatura="").values_list("sygnatura", flat=True).iterator():
+        rodzaj, _, reszta = sygnatura.partition("/")
+        rok, _, numer = reszta.partition("/")
+        if not (rok.isdigit() and numer.isdigit()):
+            continue
+        klucz = (rodzaj, int(rok))
+        ostatnie[klucz] = max(ostatnie.get(klucz, 0), int(numer))
+    LicznikSygnatur.objects.bulk_create(
+        LicznikSygnatur(rodzaj=rodzaj, rok=rok, ostatni=ostatni) for (rodzaj, rok), ostatni in ostatnie.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_alter_zadanieeksportu_typ'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LicznikSygnatur',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rodzaj', models.CharField(max_length=10)),
+                ('rok', models.PositiveIntegerField()),
+                ('ostatni', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Licznik sygnatur',
+                'verbose_name_plural': 'Liczniki sygnatur',
+                'constraints': [models.UniqueConstraint(fields=('rodzaj', 'rok'), name='uniq_licznik_sygnatur_rodzaj_rok')],
+            },
+        ),
+        migrations.RunPython(zasiej_liczniki, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:34
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+FTS_TABLE = "core_indekswyszukiwania_fts"
+
+SQLITE_SQL = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    "tekst, content='core_indekswyszukiwania', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER core_indekswyszukiwania_ai AFTER INSERT ON core_indekswyszukiwania BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, tekst) VALUES (new.id, new.tekst); END",
+    f"CREATE TRIGGER core_indekswyszukiwania_ad AFTER DELETE ON core_indekswyszukiwania BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, tekst) VALUES ('delete', old.id, old.tekst); END",
+    f"CREATE TRIGGER core_indekswyszukiwania_au AFTER UPDATE ON core_indekswyszukiwania BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, tekst) VALUES ('delete', old.id, old.tekst); "
+    f"INSERT INTO {FTS_TABLE}(rowid, tekst) VALUES (new.id, new.tekst); END",
+]
+SQLITE_REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS core_indekswyszukiwania_au",
+    "DROP TRIGGER IF EXISTS core_indekswyszukiwania_ad",
+    "DROP TRIGGER IF EXISTS core_indekswyszukiwania_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+POSTGRESQL_SQL = [
+    "CREATE INDEX core_indekswyszukiwania_tsv ON core_indekswyszukiwania USING GIN (to_tsvector('simple', tekst))",
+]
+POSTGRESQL_REVERSE_SQL = ["DROP INDEX IF EXISTS core_indekswyszukiwania_tsv"]
+
+
+# Kopia core.wyszukiwanie.normalizuj z chwili powstania migracji – migracje
+# nie mogą zależeć od kodu aplikacji, który może się później zmienić.
+_POLSKIE = str.maketrans("ąćęłńóśźż", "acelnoszz")
+
+
+def normalizuj(text):
+    text = (text or "").lower().translate(_POLSKIE)
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def _run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def utworz_indeks(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _run(schema_editor, SQLITE_SQL)
+    elif vendor == "postgresql":
+        _run(schema_editor, POSTGRESQL_SQL)
+
+
+def usun_indeks(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _run(schema_editor, SQLITE_REVERSE_SQL)
+    elif vendor == "postgresql":
+        _run(schema_editor, POSTGRESQL_REVERSE_SQL)
+
+
+def wypelnij_indeks(apps, schema_editor):
+    IndeksWyszukiwania = apps.get_model("core", "IndeksWyszukiwania")
+    zrodla = [
+        ("Wniosek", "wniosek", ("sygnatura", "tresc")),
+        ("KomisjaWniosek", "komisja_wniosek", ("tresc",)),
+        ("PunktObrad", "punkt", ("tytul", "opis")),
+        ("PodpunktObrad", "podpunkt", ("tytul", "opis")),
+    ]
+    for model_name, rodzaj, pola in zrodla:
+        model = apps.get_model("core", model_name)
+        IndeksWyszukiwania.objects.bulk_create(
+            (
+                IndeksWyszukiwania(rodzaj=rodzaj, obiekt_id=row[0], tekst=normalizuj("\n".join(v or "" for v in row[1:])))
+                for row in model.objects.values_list("pk", *pola).iterator()
+            ),
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_licznik_sygnatur'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndeksWyszukiwania',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rodzaj', models.CharField(choices=[('wniosek', 'Wniosek'), ('komisja_wniosek', 'Wniosek komisji'), ('punkt', 'Punkt obrad'), ('podpunkt', 'Podpunkt obrad')], max_length=20)),
+                ('obiekt_id', models.PositiveIntegerField()),
+                ('tekst', models.TextField()),
+            ],
+            options={
+                'verbose_name': 'Indeks wyszukiwania',
+                'verbose_name_plural': 'Indeks wyszukiwania',
+                'constraints': [models.UniqueConstraint(fields=('rodzaj', 'obiekt_id'), name='uniq_indeks_wyszukiwania_obiekt')],
+            },
+        ),
+        migrations.RunPython(utworz_indeks, usun_indeks),
+        migrations.RunPython(wypelnij_indeks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_indekswyszukiwania'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='glos',
+            index=models.Index(fields=['glosowanie', 'glos'], name='glos_glosowanie_glos_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='glos',
+            index=models.Index(fields=['glosowanie', 'kandydat'], name='glos_glosowanie_kandydat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='glosowanie',
+            index=models.Index(fields=['punkt_obrad', 'podpunkt_obrad', 'otwarte', 'utworzone'], name='glosowanie_punkt_stan_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='obecnosc',
+            index=models.Index(fields=['sesja', 'obecny'], name='obecnosc_sesja_obecny_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='punktobrad',
+            index=models.Index(condition=models.Q(('aktywny', True)), fields=['sesja', 'numer'], name='punkt_sesja_aktywny_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sesja',
+            index=models.Index(condition=models.Q(('aktywna', True)), fields=['data'], name='sesja_aktywna_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wniosek',
+            index=models.Index(fields=['radny', '-data'], name='wniosek_radny_data_idx'),
+        ),
+    ]
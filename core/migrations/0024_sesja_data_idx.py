@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_indeksy_goracych_zapytan'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sesja',
+            index=models.Index(fields=['data'], name='sesja_data_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_sesja_data_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatystykaRadnego',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kadencja', models.CharField(blank=True, max_length=20)),
+                ('obecnosci', models.IntegerField(default=0)),
+                ('nieobecnosci', models.IntegerField(default=0)),
+                ('glosy_za', models.IntegerField(default=0)),
+                ('glosy_przeciw', models.IntegerField(default=0)),
+                ('glosy_wstrzymuje', models.IntegerField(default=0)),
+                ('glosy_na_kandydatow', models.IntegerField(default=0)),
+                ('wnioski', models.IntegerField(default=0)),
+                ('zaktualizowano', models.DateTimeField(default=django.utils.timezone.now)),
+                ('uzytkownik', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statystyki', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Statystyka radnego',
+                'verbose_name_plural': 'Statystyki radnych',
+                'ordering': ['uzytkownik', 'kadencja'],
+                'constraints': [models.UniqueConstraint(fields=('uzytkownik', 'kadencja'), name='uniq_statystyka_radnego_kadencja')],
+            },
+        ),
+    ]
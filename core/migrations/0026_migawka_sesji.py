@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:16
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_statystyka_radnego'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MigawkaSesji',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dane', models.JSONField()),
+                ('liczniki_radnych', models.JSONField(default=dict)),
+                ('odcisk', models.CharField(max_length=64)),
+                ('data_sesji', models.DateTimeField()),
+                ('utworzono', models.DateTimeField(default=django.utils.timezone.now)),
+                ('przycieto', models.BooleanField(default=False)),
+                ('sesja', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='migawka', to='core.sesja')),
+            ],
+            options={
+                'verbose_name': 'Migawka sesji',
+                'verbose_name_plural': 'Migawki sesji',
+            },
+        ),
+    ]
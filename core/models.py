@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.signals import post_save
 from accounts.models import Uzytkownik
 from django.utils import timezone
 
@@ -36,6 +38,12 @@ class Sesja(models.Model):
 
     class Meta:
         ordering = ["data"]
+        indexes = [
+            # Sesja.objects.filter(aktywna=True) przy każdym żądaniu panelu i ekranu
+            models.Index(fields=["data"], condition=models.Q(aktywna=True), name="sesja_aktywna_idx"),
+            # najbliższa sesja (data >= teraz) i listy sesji w kolejności dat
+            models.Index(fields=["data"], name="sesja_data_idx"),
+        ]
         verbose_name = "Sesja"
         verbose_name_plural = "Sesje"
 
@@ -43,14 +51,55 @@ class Sesja(models.Model):
         return self.nazwa
 
     def ustaw_aktywna(self):
+        if self.jest_zamknieta:
+            raise ValueError("Zamkniętej sesji nie można ponownie aktywować.")
         # dezaktywuj wszystkie inne sesje
         Sesja.objects.exclude(id=self.id).update(aktywna=False)
         self.aktywna = True
         self.save()
 
-    def zamknij(self):
-        self.jest_zamknieta = True
-        self.save()
+    def zamknij(self, przytnij=None):
+        """Zamyka (i dezaktywuje) sesję oraz zamraża jej stan w MigawkaSesji (zob. core.migawki).
+
+        Zamkniętej sesji nie można już aktywować ani edytować – widoki
+        odmawiają zmian, bo protokół i wyniki czytane są z migawki.
+        ``przytnij`` – czy usunąć potem punkty, głosowania i obecności sesji
+        z tabel bieżących; domyślnie według ustawienia MIGAWKI_PRZYCINAJ.
+        """
+        from . import migawki
+
+        with transaction.atomic():
+            self.jest_zamknieta = True
+            self.aktywna = False
+            self.save()
+            migawki.zamroz(self)
+            if migawki.przycinac() if przytnij is None else przytnij:
+                migawki.przytnij(self)
+
+    def stan_przerwy(self, teraz=None):
+        """Zwraca (czy_trwa, pozostało_sekund) wyliczone z przerwa_start + przerwa_czas.
+
+        Czysta funkcja – wygasła przerwa nie jest tu czyszczona w bazie
+        (robią to ścieżki zapisu i komenda uzgodnij_stan_sesji).
+        """
+        if not (self.przerwa_start and self.przerwa_czas):
+            return False, 0
+        elapsed = ((teraz or timezone.now()) - self.przerwa_start).total_seconds()
+        if elapsed < self.przerwa_czas:
+            return True, int(self.przerwa_czas - elapsed)
+        return False, 0
+
+    def wyczysc_wygasla_przerwe(self, teraz=None):
+        """Czyści pola wygasłej przerwy (warunkowy UPDATE); zwraca True, jeśli coś zmieniono."""
+        if not self.przerwa_start or self.stan_przerwy(teraz)[0]:
+            return False
+        zmieniono = Sesja.objects.filter(
+            id=self.id,
+            przerwa_start=self.przerwa_start,
+        ).update(przerwa_start=None, przerwa_czas=None)
+        self.przerwa_start = None
+        self.przerwa_czas = None
+        return bool(zmieniono)
 
     def usun(self):
         self.jest_usunieta = True
@@ -66,6 +115,9 @@ class PunktObrad(models.Model):
 
     class Meta:
         ordering = ['numer']
+        indexes = [
+            models.Index(fields=["sesja", "numer"], condition=models.Q(aktywny=True), name="punkt_sesja_aktywny_idx"),
+        ]
         verbose_name = "Punkt obrad"
         verbose_name_plural = "Punkty obrad"
 
@@ -134,6 +186,13 @@ class Glosowanie(models.Model):
     kandydaci = models.ManyToManyField(Kandydat, blank=True, related_name='glosowania')
 
     class Meta:
+        indexes = [
+            # bieżące głosowanie punktu: otwarte najpierw, potem najnowsze
+            models.Index(
+                fields=["punkt_obrad", "podpunkt_obrad", "otwarte", "utworzone"],
+                name="glosowanie_punkt_stan_idx",
+            ),
+        ]
         verbose_name = "Głosowanie"
         verbose_name_plural = "Głosowania"
 
@@ -144,7 +203,10 @@ class Glosowanie(models.Model):
         za = Glos.objects.filter(glosowanie=self, glos="za").count()
         przeciw = Glos.objects.filter(glosowanie=self, glos="przeciw").count()
         wstrzymuje = Glos.objects.filter(glosowanie=self, glos="wstrzymuje").count()
+        return self.wynik_z_licznikow(za, przeciw, wstrzymuje)
 
+    def wynik_z_licznikow(self, za, przeciw, wstrzymuje):
+        """Podsumowanie wyniku dla już policzonych głosów (bez zapytań do bazy)."""
         if self.wiekszosc == "zwykla":
             przeszedl = za > przeciw
             prog = None
@@ -165,10 +227,56 @@ class Glos(models.Model):
     class Meta:
         unique_together = ['glosowanie', 'uzytkownik']
         ordering = ['uzytkownik']
+        indexes = [
+            # zliczanie wyników (GROUP BY glos / kandydat) bez sięgania do tabeli
+            models.Index(fields=["glosowanie", "glos"], name="glos_glosowanie_glos_idx"),
+            models.Index(fields=["glosowanie", "kandydat"], name="glos_glosowanie_kandydat_idx"),
+        ]
         verbose_name = "Głos"
         verbose_name_plural = "Głosy"
 
 
+class LicznikSygnatur(models.Model):
+    """Licznik kolejnych numerów sygnatur w danym roku (np. W/2025/0001)."""
+
+    rodzaj = models.CharField(max_length=10)
+    rok = models.PositiveIntegerField()
+    ostatni = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["rodzaj", "rok"], name="uniq_licznik_sygnatur_rodzaj_rok")]
+        verbose_name = "Licznik sygnatur"
+        verbose_name_plural = "Liczniki sygnatur"
+
+    def __str__(self):
+        return f"{self.rodzaj}/{self.rok}: {self.ostatni}"
+
+    @classmethod
+    def przydziel(cls, rodzaj, rok=None):
+        """Zwraca kolejny numer w roku; wywoływać wewnątrz transaction.atomic().
+
+        Pierwszą instrukcją jest UPDATE, więc blokada zapisu (wiersza w PostgreSQL,
+        bazy w SQLite) trzymana jest do końca transakcji i dwa równoległe
+        zgłoszenia nigdy nie dostaną tego samego numeru.
+        """
+        rok = rok or timezone.localdate().year
+        licznik = cls.objects.filter(rodzaj=rodzaj, rok=rok)
+        if not licznik.update(ostatni=F("ostatni") + 1):
+            try:
+                with transaction.atomic():
+                    cls.objects.create(rodzaj=rodzaj, rok=rok, ostatni=1)
+                return 1
+            except IntegrityError:
+                # ktoś równolegle utworzył licznik na ten rok
+                licznik.update(ostatni=F("ostatni") + 1)
+        return licznik.values_list("ostatni", flat=True).get()
+
+    @classmethod
+    def sygnatura(cls, rodzaj, rok=None):
+        rok = rok or timezone.localdate().year
+        return f"{rodzaj}/{rok}/{cls.przydziel(rodzaj, rok):04d}"
+
+
 class Wniosek(models.Model):
     TYP_CHOICES = [("wniosek", "Wniosek"), ("zwo_sesji", "Zwołanie sesji"), ("proj_uchwaly", "Projekt uchwały"), ("zapytanie", "Zapytanie")]
     punkt_obrad = models.ForeignKey(PunktObrad, on_delete=models.CASCADE, related_name='wnioski', null=True, blank=True)
@@ -181,6 +289,7 @@ class Wniosek(models.Model):
 
     class Meta:
         ordering = ["-data"]
+        indexes = [models.Index(fields=["radny", "-data"], name="wniosek_radny_data_idx")]
         verbose_name = "Wniosek"
         verbose_name_plural = "Wnioski"
 
@@ -189,13 +298,16 @@ class Wniosek(models.Model):
         return f"{sig} - {self.radny} - {self.tresc[:50]}"
 
     def save(self, *args, **kwargs):
-        if not self.sygnatura:
-            year = timezone.localdate().year
-            prefix = f"W/{year}/"
-            last = Wniosek.objects.filter(sygnatura__startswith=prefix).order_by("-sygnatura").values_list("sygnatura", flat=True).first()
-            n = (int(last.split("/")[-1]) + 1) if last else 1
-            self.sygnatura = f"{prefix}{n:04d}"
-        super().save(*args, **kwargs)
+        if self.sygnatura:
+            return super().save(*args, **kwargs)
+        # numer i wiersz wniosku w jednej transakcji: nieudany zapis nie zostawia dziury
+        with transaction.atomic():
+            self.sygnatura = LicznikSygnatur.sygnatura("W")
+            try:
+                super().save(*args, **kwargs)
+            except BaseException:
+                self.sygnatura = ""
+                raise
 
 
 class Obecnosc(models.Model):
@@ -207,12 +319,32 @@ class Obecnosc(models.Model):
     class Meta:
         unique_together = ["sesja", "radny"]
         ordering = ["radny__nazwisko", "radny__imie"]
+        indexes = [models.Index(fields=["sesja", "obecny"], name="obecnosc_sesja_obecny_idx")]
         verbose_name = "Obecność"
         verbose_name_plural = "Obecności"
 
     def __str__(self):
         return f"{self.radny} @ {self.sesja} = {'obecny' if self.obecny else 'nieobecny'}"
 
+    def ustaw(self, obecny):
+        """Zmienia obecność warunkowym UPDATE; zwraca True, jeśli wiersz faktycznie się zmienił.
+
+        Zmianę potwierdza baza (liczba zmienionych wierszy), a nie wartość
+        wczytana wcześniej do pamięci, więc dwa równoległe przełączenia nie
+        przesuną liczników dwa razy. Przy zmianie wysyłany jest post_save
+        z ``poprzednio`` – wartością, którą UPDATE faktycznie zastąpił.
+        """
+        teraz = timezone.now()
+        zmieniono = Obecnosc.objects.filter(pk=self.pk, obecny=not obecny).update(obecny=obecny, timestamp=teraz)
+        self.obecny = obecny
+        if zmieniono:
+            self.timestamp = teraz
+            post_save.send(
+                sender=Obecnosc, instance=self, created=False, update_fields=frozenset({"obecny", "timestamp"}),
+                raw=False, using=self._state.db, poprzednio=not obecny,
+            )
+        return bool(zmieniono)
+
 
 class Komisja(models.Model):
     nazwa = models.CharField(max_length=200)
@@ -375,3 +507,130 @@ class KomisjaWniosek(models.Model):
 
     def __str__(self):
         return f"{self.get_typ_display()} ({self.komisja})"
+
+
+class IndeksWyszukiwania(models.Model):
+    """Znormalizowany tekst (małe litery, bez polskich znaków) dokumentów do wyszukiwania.
+
+    Właściwy indeks pełnotekstowy (FTS5 w SQLite, GIN/tsvector w PostgreSQL)
+    zakładany jest w migracji nad tą tabelą; patrz core.wyszukiwanie.
+    """
+
+    RODZAJ_CHOICES = [
+        ("wniosek", "Wniosek"),
+        ("komisja_wniosek", "Wniosek komisji"),
+        ("punkt", "Punkt obrad"),
+        ("podpunkt", "Podpunkt obrad"),
+    ]
+
+    rodzaj = models.CharField(max_length=20, choices=RODZAJ_CHOICES)
+    obiekt_id = models.PositiveIntegerField()
+    tekst = models.TextField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["rodzaj", "obiekt_id"], name="uniq_indeks_wyszukiwania_obiekt")]
+        verbose_name = "Indeks wyszukiwania"
+        verbose_name_plural = "Indeks wyszukiwania"
+
+    def __str__(self):
+        return f"{self.rodzaj}#{self.obiekt_id}"
+
+
+class ZadanieEksportu(models.Model):
+    """Zlecenie wygenerowania pliku (PDF/eksport) poza wątkiem żądania."""
+
+    STATUS_CHOICES = [("oczekuje", "Oczekuje"), ("w_toku", "W toku"), ("gotowe", "Gotowe"), ("blad", "Błąd")]
+    TYP_CHOICES = [
+        ("protokol", "Protokół sesji (PDF)"),
+        ("wnioski", "Wnioski (PDF)"),
+        ("archiwum", "Archiwum protokołów (ZIP)"),
+    ]
+
+    typ = models.CharField(max_length=30, choices=TYP_CHOICES)
+    parametry = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="oczekuje")
+    zlecil = models.ForeignKey(Uzytkownik, on_delete=models.CASCADE, related_name="zadania_eksportu")
+    plik = models.FileField(upload_to="zadania/", blank=True)
+    nazwa_pliku = models.CharField(max_length=255, blank=True)
+    blad = models.TextField(blank=True)
+    utworzone = models.DateTimeField(auto_now_add=True)
+    rozpoczete = models.DateTimeField(null=True, blank=True)
+    zakonczone = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-utworzone"]
+        verbose_name = "Zadanie eksportu"
+        verbose_name_plural = "Zadania eksportu"
+
+    def __str__(self):
+        return f"{self.get_typ_display()} #{self.id} ({self.get_status_display()})"
+
+
+class StatystykaRadnego(models.Model):
+    """Zmaterializowane liczniki radnego w kadencji (obecności, głosy, wnioski).
+
+    Aktualizowane przyrostowo przez core.statystyki; komenda
+    przebuduj_statystyki_radnych liczy je od zera.
+    """
+
+    uzytkownik = models.ForeignKey(Uzytkownik, on_delete=models.CASCADE, related_name="statystyki")
+    kadencja = models.CharField(max_length=20, blank=True)
+    obecnosci = models.IntegerField(default=0)
+    nieobecnosci = models.IntegerField(default=0)
+    glosy_za = models.IntegerField(default=0)
+    glosy_przeciw = models.IntegerField(default=0)
+    glosy_wstrzymuje = models.IntegerField(default=0)
+    glosy_na_kandydatow = models.IntegerField(default=0)
+    wnioski = models.IntegerField(default=0)
+    zaktualizowano = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["uzytkownik", "kadencja"]
+        constraints = [
+            models.UniqueConstraint(fields=["uzytkownik", "kadencja"], name="uniq_statystyka_radnego_kadencja")
+        ]
+        verbose_name = "Statystyka radnego"
+        verbose_name_plural = "Statystyki radnych"
+
+    def __str__(self):
+        return f"{self.uzytkownik} – {self.kadencja or 'poza kadencjami'}"
+
+    @property
+    def glosy(self):
+        return self.glosy_za + self.glosy_przeciw + self.glosy_wstrzymuje + self.glosy_na_kandydatow
+
+    @property
+    def frekwencja(self):
+        """Odsetek sesji z odnotowaną obecnością (None bez listy obecności)."""
+        razem = self.obecnosci + self.nieobecnosci
+        return round(100 * self.obecnosci / razem, 1) if razem else None
+
+
+class MigawkaSesji(models.Model):
+    """Niezmienny zapis zamkniętej sesji: porządek obrad, głosowania z wynikami,
+    listy imienne głosowań jawnych i obecność (JSON budowany przez core.migawki).
+
+    Protokoły, eksporty i strona wyników czytają migawkę zamiast tabel
+    bieżących, które po zamknięciu mogą zostać przycięte.
+    """
+
+    sesja = models.OneToOneField(Sesja, on_delete=models.CASCADE, related_name="migawka")
+    dane = models.JSONField()
+    # liczniki do StatystykaRadnego – potrzebne po przycięciu tabel bieżących
+    liczniki_radnych = models.JSONField(default=dict)
+    odcisk = models.CharField(max_length=64)
+    data_sesji = models.DateTimeField()
+    utworzono = models.DateTimeField(default=timezone.now)
+    przycieto = models.BooleanField(default=False)
+
+    class Meta:
+        verbose_name = "Migawka sesji"
+        verbose_name_plural = "Migawki sesji"
+
+    def __str__(self):
+        return f"Migawka: {self.sesja}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Migawka sesji jest niezmienna – nie można jej zapisać ponownie.")
+        super().save(*args, **kwargs)
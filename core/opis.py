@@ -0,0 +1,81 @@
+"""Renderowanie opisów punktów obrad (mini-markdown) do HTML.
+
+Obsługiwane: akapity (pusta linia), łamanie linii, listy (``-``, ``*``, ``•``),
+``**pogrubienie**``, ``*kursywa*`` i ``__podkreślenie__``; reszta jest escapowana.
+
+Jeden renderer dla widoków (JSON ekranów) i filtra ``format_opis``. Wynik
+zależy wyłącznie od treści, więc jest zapamiętywany w LRU kluczowanym samym
+tekstem – ekrany odpytujące co 2 s i kolejne renderowania agendy dostają
+gotowy HTML zamiast ponownie przepuszczać każdą linię przez wyrażenia.
+"""
+
+import re
+from functools import lru_cache
+
+from django.utils.html import escape
+
+ROZMIAR_CACHE = 1024
+
+_INLINE = (
+    (re.compile(r"\*\*(.+?)\*\*"), r"<strong>\1</strong>"),
+    (re.compile(r"\*(.+?)\*"), r"<em>\1</em>"),
+    (re.compile(r"__(.+?)__"), r"<u>\1</u>"),
+)
+_LISTA_RE = re.compile(r"^[-*•]\s+(.+)$")
+
+
+def formatuj_inline(text):
+    rendered = escape(text)
+    for wzorzec, zamiana in _INLINE:
+        rendered = wzorzec.sub(zamiana, rendered)
+    return rendered
+
+
+@lru_cache(maxsize=ROZMIAR_CACHE)
+def _opis_html(opis):
+    lines = opis.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    html = []
+    in_list = False
+    paragraph_buffer = []
+
+    def flush_paragraph():
+        nonlocal paragraph_buffer
+        if paragraph_buffer:
+            html.append(f"<p>{'<br>'.join(paragraph_buffer)}</p>")
+            paragraph_buffer = []
+
+    for raw_line in lines:
+        line = raw_line.strip()
+        if not line:
+            flush_paragraph()
+            if in_list:
+                html.append("</ul>")
+                in_list = False
+            continue
+
+        list_match = _LISTA_RE.match(line)
+        if list_match:
+            flush_paragraph()
+            if not in_list:
+                html.append("<ul>")
+                in_list = True
+            html.append(f"<li>{formatuj_inline(list_match.group(1))}</li>")
+            continue
+
+        if in_list:
+            html.append("</ul>")
+            in_list = False
+        paragraph_buffer.append(formatuj_inline(line))
+
+    flush_paragraph()
+    if in_list:
+        html.append("</ul>")
+
+    return "".join(html)
+
+
+def opis_html(opis):
+    """HTML opisu (str, już escapowany); pusty opis daje pusty napis."""
+    if not opis:
+        return ""
+    return _opis_html(str(opis))
@@ -0,0 +1,134 @@
+"""Cache wygenerowanych protokołów PDF adresowany treścią sesji.
+
+Odcisk (fingerprint) sesji liczony jest z danych, które trafiają do
+protokołu: punktów, podpunktów, głosowań, kandydatów, głosujących oraz liczników głosów
+(dla zamkniętej sesji – z odcisku jej migawki, core.migawki).
+Pliki trzymane są w MEDIA_ROOT/<PROTOKOL_PDF_CACHE_DIR>/<sesja_id>/<odcisk>.pdf,
+a po zapisaniu nowej wersji starsze odciski tej sesji są usuwane.
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import Glos, Glosowanie, Kandydat, MigawkaSesji, PodpunktObrad, PunktObrad
+
+
+def _cache_root():
+    subdir = getattr(settings, "PROTOKOL_PDF_CACHE_DIR", "protokoly")
+    return Path(settings.MEDIA_ROOT) / subdir
+
+
+def protokol_fingerprint(sesja):
+    """Zwraca odcisk treści protokołu sesji (hex SHA-256)."""
+    h = hashlib.sha256()
+
+    def feed(label, rows):
+        h.update(label.encode())
+        for row in rows:
+            h.update(repr(tuple(row)).encode())
+
+    feed("sesja", [(sesja.id, sesja.nazwa, sesja.data.isoformat())])
+    # zamrożona sesja: protokół powstaje z niezmiennej migawki – wystarczy jej odcisk
+    odcisk_migawki = MigawkaSesji.objects.filter(sesja_id=sesja.id).values_list("odcisk", flat=True).first()
+    if odcisk_migawki:
+        feed("migawka", [(odcisk_migawki,)])
+        return h.hexdigest()
+    feed(
+        "punkty",
+        PunktObrad.objects.filter(sesja=sesja).order_by("id").values_list("id", "numer", "tytul", "opis"),
+    )
+    feed(
+        "podpunkty",
+        PodpunktObrad.objects.filter(punkt_nadrzedny__sesja=sesja)
+        .order_by("id")
+        .values_list("id", "punkt_nadrzedny_id", "numer", "tytul", "opis"),
+    )
+    glosowania = Glosowanie.objects.filter(punkt_obrad__sesja=sesja)
+    feed(
+        "glosowania",
+        glosowania.order_by("id").values_list(
+            "id", "punkt_obrad_id", "podpunkt_obrad_id", "nazwa", "otwarte",
+            "typ", "jawnosc", "wiekszosc", "liczba_uprawnionych",
+        ),
+    )
+    feed(
+        "kandydaci",
+        Kandydat.objects.filter(punkt_obrad__sesja=sesja).order_by("id").values_list("id", "punkt_obrad_id", "imie", "nazwisko"),
+    )
+    feed(
+        "kandydaci_glosowan",
+        glosowania.filter(kandydaci__isnull=False).order_by("id", "kandydaci__id").values_list("id", "kandydaci__id"),
+    )
+    # imiona i nazwiska głosujących – zmiana danych radnego zmienia listy imienne
+    feed(
+        "glosujacy",
+        Glos.objects.filter(glosowanie__punkt_obrad__sesja=sesja)
+        .values_list("uzytkownik_id", "uzytkownik__imie", "uzytkownik__nazwisko")
+        .distinct()
+        .order_by("uzytkownik_id"),
+    )
+    # wersja liczników głosów: liczba i najwyższe id w każdej kategorii głosu
+    feed(
+        "glosy",
+        Glos.objects.filter(glosowanie__punkt_obrad__sesja=sesja)
+        .values_list("glosowanie_id", "glos", "kandydat_id")
+        .annotate(liczba=Count("id"), ostatni=Max("id"))
+        .order_by("glosowanie_id", "glos", "kandydat_id"),
+    )
+    return h.hexdigest()
+
+
+def cached_pdf_path(sesja_id, fingerprint):
+    return _cache_root() / str(sesja_id) / f"{fingerprint}.pdf"
+
+
+def get_or_render(sesja_id, fingerprint, render):
+    """Zwraca otwarty (rb) PDF o danym odcisku, renderując go przez render() w razie braku.
+
+    Plik jest otwierany od razu, bo równoległy render nowszej wersji może go
+    w każdej chwili usunąć (evict_superseded); jeśli zniknie przed otwarciem,
+    zwracany jest świeżo wyrenderowany PDF z pamięci.
+    """
+    path = cached_pdf_path(sesja_id, fingerprint)
+    try:
+        return open(path, "rb")
+    except FileNotFoundError:
+        pass
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pdf = render()
+    # zapis atomowy: równoległe żądania nigdy nie zobaczą niepełnego pliku
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(pdf)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+    evict_superseded(sesja_id, keep=fingerprint)
+    try:
+        return open(path, "rb")
+    except FileNotFoundError:
+        return io.BytesIO(pdf)
+
+
+def evict_superseded(sesja_id, keep=None):
+    """Usuwa z cache wszystkie wersje protokołu sesji poza odciskiem keep."""
+    directory = _cache_root() / str(sesja_id)
+    if not directory.is_dir():
+        return
+    for entry in directory.glob("*.pdf"):
+        if entry.stem != keep:
+            try:
+                entry.unlink()
+            except FileNotFoundError:
+                pass
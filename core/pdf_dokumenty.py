@@ -0,0 +1,221 @@
+"""Dokumenty PDF: protokół z posiedzenia (z dokumentu sesji, core.migawki)
+i zestawienie wniosków.
+
+Moduł nie zależy od widoków: korzystają z niego widoki HTTP, zadania
+eksportu (core.zadania), archiwum ZIP (core.archiwum) i pomiary wydajności.
+"""
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import migawki
+from .models import Glosowanie, Wniosek
+
+
+def protokol_pdf_margins_mm():
+    left = float(getattr(settings, "PROTOKOL_PDF_MARGIN_LEFT_MM", 20))
+    right = float(getattr(settings, "PROTOKOL_PDF_MARGIN_RIGHT_MM", 20))
+    top = float(getattr(settings, "PROTOKOL_PDF_MARGIN_TOP_MM", 20))
+    bottom = float(getattr(settings, "PROTOKOL_PDF_MARGIN_BOTTOM_MM", 20))
+    return left, right, top, bottom
+
+
+def protokol_vote_lines(glosowanie):
+    """Linie protokołu dla głosowania z dokumentu sesji (core.migawki)."""
+    meta = (
+        f"Głosowanie: {glosowanie['nazwa']} | "
+        f"Typ: {dict(Glosowanie.TYP_CHOICES).get(glosowanie['typ'], glosowanie['typ'])} | "
+        f"Jawność: {dict(Glosowanie.JAWNOSC_CHOICES).get(glosowanie['jawnosc'], glosowanie['jawnosc'])} | "
+        f"Większość: {dict(Glosowanie.WIEKSZOSC_CHOICES).get(glosowanie['wiekszosc'], glosowanie['wiekszosc'])}"
+    )
+    lines = [meta]
+
+    if glosowanie["typ"] == "kandydaci":
+        oddane = sum(k["glosy"] for k in glosowanie["glosy_kandydatow"])
+        lines.append(f"Oddane głosy na kandydatów: {oddane}")
+
+        # kandydaci przypisani do głosowania, a w ich braku – ci, na których głosowano
+        kandydaci = glosowanie["kandydaci"] or (glosowanie["glosy_kandydatow"] if oddane > 0 else [])
+        if kandydaci:
+            lines.append("Wyniki kandydatów:")
+            for k in kandydaci:
+                lines.append(f"- {k['nazwisko']} {k['imie']}: {k['glosy']}")
+        else:
+            lines.append("Brak oddanych głosów.")
+
+        return lines
+
+    wynik = f"Za: {glosowanie['za']}  Przeciw: {glosowanie['przeciw']}  Wstrzymuje: {glosowanie['wstrzymuje']}"
+    if glosowanie.get("prog"):
+        wynik += f"  |  Próg: {glosowanie['prog']}"
+    wynik += f"  |  Wynik: {'PRZESZŁO' if glosowanie['przeszedl'] else 'NIE PRZESZŁO'}"
+    lines.append(wynik)
+    return lines
+
+
+def protokol_pdf_bytes(sesja):
+    # zamknięta sesja – z migawki, bez sięgania do tabel bieżących
+    punkty = migawki.dane_sesji(sesja)["punkty"]
+
+    from io import BytesIO
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.units import mm
+
+    from .pdf_fonts import pdf_fonts
+    from .pdf_layout import PdfTextLayout
+
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+
+    font_regular, font_bold = pdf_fonts()
+
+    margin_left_mm, margin_right_mm, margin_top_mm, margin_bottom_mm = protokol_pdf_margins_mm()
+    layout = PdfTextLayout(
+        c,
+        page_width=width,
+        page_height=height,
+        margin_left=margin_left_mm * mm,
+        margin_right=margin_right_mm * mm,
+        margin_top=margin_top_mm * mm,
+        margin_bottom=margin_bottom_mm * mm,
+    )
+
+    def draw_wrapped_text(text, *, indent_mm=0, font_name=font_regular, font_size=9, line_step_mm=4.5, paragraph_gap_mm=0):
+        layout.draw_wrapped(
+            text,
+            font_name=font_name,
+            font_size=font_size,
+            line_step=line_step_mm * mm,
+            indent=indent_mm * mm,
+            paragraph_gap=paragraph_gap_mm * mm,
+        )
+
+    def draw_vote(glosowanie, *, indent_mm):
+        if glosowanie is None:
+            draw_wrapped_text("Brak głosowania", indent_mm=indent_mm, font_name=font_regular, font_size=9, line_step_mm=6)
+            return
+
+        for idx, line in enumerate(protokol_vote_lines(glosowanie)):
+            draw_wrapped_text(
+                line,
+                indent_mm=indent_mm,
+                font_name=font_regular,
+                font_size=9,
+                line_step_mm=5 if glosowanie["typ"] == "kandydaci" and idx > 0 else 4.8,
+            )
+        layout.skip(3 * mm)
+
+    layout.draw_line("Protokół z posiedzenia", font_name=font_bold, font_size=14, line_step=8 * mm)
+    draw_wrapped_text(sesja.nazwa, font_name=font_bold, font_size=12, line_step_mm=6)
+    # bez znacznika czasu wygenerowania – PDF trafia do cache adresowanego treścią (core.pdf_cache)
+    layout.draw_line(
+        f"Data: {timezone.localtime(sesja.data).strftime('%Y-%m-%d %H:%M')}",
+        font_name=font_regular,
+        font_size=10,
+        line_step=10 * mm,
+    )
+    layout.draw_line("Porządek obrad, podpunkty i wyniki głosowań", font_name=font_bold, font_size=11, line_step=8 * mm)
+
+    for p in punkty:
+        draw_wrapped_text(f"{p['numer']}. {p['tytul']}", font_name=font_bold, font_size=10, line_step_mm=5)
+
+        if p["opis"]:
+            draw_wrapped_text(p["opis"], indent_mm=2, font_name=font_regular, font_size=9, line_step_mm=4.5, paragraph_gap_mm=2)
+
+        draw_vote(migawki.biezace_glosowanie(p["glosowania"]), indent_mm=2)
+
+        for podpunkt in p["podpunkty"]:
+            draw_wrapped_text(
+                f"{p['numer']}.{podpunkt['numer']}. {podpunkt['tytul']}",
+                indent_mm=2,
+                font_name=font_bold,
+                font_size=9,
+                line_step_mm=4.5,
+            )
+
+            if podpunkt["opis"]:
+                draw_wrapped_text(podpunkt["opis"], indent_mm=4, font_name=font_regular, font_size=9, line_step_mm=4.2, paragraph_gap_mm=1)
+
+            draw_vote(migawki.biezace_glosowanie(podpunkt["glosowania"]), indent_mm=4)
+
+        layout.skip(2 * mm)
+
+    layout.finish()
+
+    pdf = buffer.getvalue()
+    buffer.close()
+    return pdf
+
+
+def protokol_pdf_filename(sesja):
+    safe_name = (sesja.nazwa or "sesja").replace("/", "-")
+    return f"protokol_{safe_name}_{timezone.localtime(sesja.data).strftime('%Y-%m-%d')}.pdf"
+
+
+def wnioski_pdf_bytes(*, title: str, wnioski: list[Wniosek]) -> bytes:
+    """Generuje PDF dla listy wniosków. Wykorzystuje ReportLab."""
+    from io import BytesIO
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.units import mm
+
+    from .pdf_fonts import pdf_fonts
+    from .pdf_layout import PdfTextLayout
+
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+
+    # fonty z obsługą polskich znaków (TTF), rejestrowane raz na proces
+    font_regular, font_bold = pdf_fonts()
+
+    layout = PdfTextLayout(
+        c,
+        page_width=width,
+        page_height=height,
+        margin_left=20 * mm,
+        margin_right=20 * mm,
+        margin_top=20 * mm,
+        margin_bottom=25 * mm,
+    )
+    layout.draw_wrapped(title, font_name=font_bold, font_size=14, line_step=10 * mm)
+    layout.draw_line(
+        f"Wygenerowano: {timezone.now().strftime('%Y-%m-%d %H:%M')}",
+        font_name=font_regular,
+        font_size=9,
+        line_step=12 * mm,
+    )
+
+    for w in wnioski:
+        layout.draw_wrapped(
+            f"Sygnatura: {w.sygnatura}   |   Typ: {w.get_typ_display()}   |   Data: {w.data.strftime('%Y-%m-%d %H:%M')}",
+            font_name=font_bold,
+            font_size=11,
+            line_step=6 * mm,
+        )
+        layout.draw_line(f"Autor: {w.radny.imie} {w.radny.nazwisko}", font_name=font_regular, font_size=10, line_step=6 * mm)
+
+        if w.punkt_obrad_id:
+            sesja_nazwa = getattr(getattr(w.punkt_obrad, "sesja", None), "nazwa", "")
+            miejsce = f"Sesja: {sesja_nazwa} | Punkt: {w.punkt_obrad.numer}. {w.punkt_obrad.tytul}"
+        else:
+            miejsce = "Poza sesją"
+        layout.draw_wrapped(miejsce, font_name=font_regular, font_size=9, line_step=6 * mm)
+
+        # treść łamana na granicach słów
+        layout.draw_wrapped(
+            w.tresc or "",
+            font_name=font_regular,
+            font_size=10,
+            line_step=5 * mm,
+            blank_line_step=4 * mm,
+            paragraph_gap=6 * mm,
+        )
+
+    layout.finish()
+
+    pdf = buffer.getvalue()
+    buffer.close()
+    return pdf
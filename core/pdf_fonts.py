@@ -0,0 +1,57 @@
+"""Rejestr fontów PDF współdzielony przez cały proces.
+
+Pliki TTF (DejaVuSans z polskimi znakami) są parsowane i rejestrowane
+w ReportLab tylko raz; kolejne żądania dostają gotowe nazwy fontów.
+"""
+
+import os
+import threading
+
+from django.conf import settings
+
+FONT_DIR = os.path.join("core", "static", "core", "fonts")
+
+_lock = threading.Lock()
+_fonts = None
+
+
+def _register_fonts():
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    font_regular = "Helvetica"
+    font_bold = "Helvetica-Bold"
+    try:
+        font_path = os.path.join(settings.BASE_DIR, FONT_DIR, "DejaVuSans.ttf")
+        font_bold_path = os.path.join(settings.BASE_DIR, FONT_DIR, "DejaVuSans-Bold.ttf")
+        if os.path.exists(font_path):
+            pdfmetrics.registerFont(TTFont("DejaVuSans", font_path))
+            font_regular = "DejaVuSans"
+        if os.path.exists(font_bold_path):
+            pdfmetrics.registerFont(TTFont("DejaVuSans-Bold", font_bold_path))
+            font_bold = "DejaVuSans-Bold"
+    except Exception:
+        # fallback do Helvetica (bez PL znaków) jeśli coś pójdzie nie tak
+        pass
+    return font_regular, font_bold
+
+
+def pdf_fonts():
+    """Zwraca (font_regular, font_bold); rejestruje fonty przy pierwszym użyciu."""
+    global _fonts
+    fonts = _fonts
+    if fonts is None:
+        with _lock:
+            if _fonts is None:
+                _fonts = _register_fonts()
+            fonts = _fonts
+    return fonts
+
+
+def warm_pdf_fonts():
+    """Rozgrzewa rejestr przy starcie aplikacji (pomija, gdy brak ReportLab)."""
+    try:
+        import reportlab  # noqa: F401
+    except ImportError:
+        return
+    pdf_fonts()
@@ -0,0 +1,169 @@
+"""Wspólny silnik układu tekstu dla generatorów PDF (protokoły, wnioski).
+
+Łamanie wierszy odbywa się na granicach słów, a szerokości liczone są
+z tabeli szerokości pojedynczych glifów (zapamiętywanej per font i rozmiar),
+więc koszt jest liniowy względem długości tekstu.
+"""
+
+from reportlab.pdfbase import pdfmetrics
+
+
+class GlyphWidths:
+    """Tabela szerokości glifów dla jednej pary (font, rozmiar)."""
+
+    def __init__(self, font_name, font_size):
+        self.font_name = font_name
+        self.font_size = font_size
+        self._widths = {}
+
+    def char(self, ch):
+        w = self._widths.get(ch)
+        if w is None:
+            w = pdfmetrics.stringWidth(ch, self.font_name, self.font_size)
+            self._widths[ch] = w
+        return w
+
+    def width(self, text):
+        widths = self._widths
+        total = 0.0
+        for ch in text:
+            w = widths.get(ch)
+            if w is None:
+                w = self.char(ch)
+            total += w
+        return total
+
+
+_GLYPH_WIDTHS = {}
+
+
+def glyph_widths(font_name, font_size):
+    key = (font_name, float(font_size))
+    table = _GLYPH_WIDTHS.get(key)
+    if table is None:
+        table = _GLYPH_WIDTHS.setdefault(key, GlyphWidths(font_name, font_size))
+    return table
+
+
+def _split_long_word(word, widths, max_width):
+    """Dzieli słowo dłuższe niż wiersz; zwraca (pełne wiersze, reszta, szerokość reszty)."""
+    chunks = []
+    start = 0
+    current_width = 0.0
+    for i, ch in enumerate(word):
+        w = widths.char(ch)
+        if current_width + w > max_width and i > start:
+            chunks.append(word[start:i])
+            start = i
+            current_width = 0.0
+        current_width += w
+    return chunks, word[start:], current_width
+
+
+def wrap_paragraph(para, widths, max_width):
+    """Łamie jeden akapit (bez znaków nowej linii) na wiersze mieszczące się w max_width."""
+    lines = []
+    current = []
+    current_width = 0.0
+    space = widths.char(" ")
+
+    for word in para.split():
+        word_width = widths.width(word)
+        if current:
+            if current_width + space + word_width <= max_width:
+                current.append(word)
+                current_width += space + word_width
+                continue
+            lines.append(" ".join(current))
+            current = []
+            current_width = 0.0
+
+        if word_width <= max_width:
+            current = [word]
+            current_width = word_width
+            continue
+
+        chunks, rest, rest_width = _split_long_word(word, widths, max_width)
+        lines.extend(chunks)
+        current = [rest] if rest else []
+        current_width = rest_width
+
+    if current:
+        lines.append(" ".join(current))
+    return lines
+
+
+def wrap_text(text, font_name, font_size, max_width):
+    """Łamie tekst wieloakapitowy; puste akapity zwracane są jako pusty string."""
+    if text is None:
+        return []
+    widths = glyph_widths(font_name, font_size)
+    normalized = str(text).replace("\r\n", "\n").replace("\r", "\n")
+    lines = []
+    for para in normalized.split("\n"):
+        para = para.strip()
+        if not para:
+            lines.append("")
+            continue
+        lines.extend(wrap_paragraph(para, widths, max_width))
+    return lines
+
+
+class PdfTextLayout:
+    """Kursor pionowy na płótnie ReportLab z automatyczną paginacją.
+
+    Wszystkie wymiary podawane są w punktach (jak w ReportLab).
+    """
+
+    def __init__(self, canvas, *, page_width, page_height, margin_left, margin_right, margin_top, margin_bottom):
+        self.canvas = canvas
+        self.page_height = page_height
+        self.margin_left = margin_left
+        self.margin_top = margin_top
+        self.margin_bottom = margin_bottom
+        self.usable_width = page_width - margin_left - margin_right
+        self.y = page_height - margin_top
+        self.pages = 1
+        self._font = None
+
+    def set_font(self, font_name, font_size):
+        if self._font != (font_name, font_size):
+            self.canvas.setFont(font_name, font_size)
+            self._font = (font_name, font_size)
+
+    def new_page(self):
+        self.canvas.showPage()
+        self.pages += 1
+        self.y = self.page_height - self.margin_top
+        # showPage() resetuje stan graficzny, więc font trzeba ustawić ponownie
+        self._font = None
+
+    def ensure_space(self):
+        if self.y < self.margin_bottom:
+            self.new_page()
+
+    def skip(self, dy):
+        self.y -= dy
+
+    def draw_line(self, text, *, font_name, font_size, line_step, indent=0):
+        self.ensure_space()
+        self.set_font(font_name, font_size)
+        self.canvas.drawString(self.margin_left + indent, self.y, text)
+        self.y -= line_step
+
+    def draw_wrapped(self, text, *, font_name, font_size, line_step, indent=0, paragraph_gap=0, blank_line_step=None):
+        if text is None:
+            return
+        max_width = self.usable_width - indent
+        blank_step = line_step if blank_line_step is None else blank_line_step
+        for line in wrap_text(text, font_name, font_size, max_width):
+            if not line:
+                self.y -= blank_step
+                continue
+            self.draw_line(line, font_name=font_name, font_size=font_size, line_step=line_step, indent=indent)
+        if paragraph_gap:
+            self.y -= paragraph_gap
+
+    def finish(self):
+        self.canvas.showPage()
+        self.canvas.save()
@@ -0,0 +1,61 @@
+"""Liczniki dashboardu prezydium trzymane w cache.
+
+Dashboard jest pierwszą stroną po zalogowaniu prezydium, a liczniki
+(sesje, punkty obrad, otwarte głosowania) to pełne COUNT(*) po tabelach.
+Wynik trzymamy w cache pod kluczem z numerem wersji; zapis lub usunięcie
+sesji, punktu albo głosowania podbija wersję we wspólnym magazynie stanu
+(core.stan_wspolny), a PODSUMOWANIE_CACHE_TTL ogranicza dodatkowo wiek
+liczników – np. po zmianach przez QuerySet.update(), które nie wysyłają
+sygnałów.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from . import stan_wspolny
+from .models import Glosowanie, PunktObrad, Sesja
+
+WERSJA_KEY = "prezydium:podsumowanie:wersja"
+
+
+def _ttl():
+    return int(getattr(settings, "PODSUMOWANIE_CACHE_TTL", 60))
+
+
+def _klucz():
+    return f"prezydium:podsumowanie:{stan_wspolny.wersja(WERSJA_KEY)}"
+
+
+def liczniki():
+    """{"liczba_sesji", "liczba_punktow", "liczba_glosowan_otwartych"} – z cache albo z bazy."""
+    key = _klucz()
+    wynik = cache.get(key)
+    if wynik is None:
+        wynik = {
+            "liczba_sesji": Sesja.objects.count(),
+            "liczba_punktow": PunktObrad.objects.count(),
+            "liczba_glosowan_otwartych": Glosowanie.objects.filter(otwarte=True).count(),
+        }
+        cache.set(key, wynik, timeout=_ttl())
+    return wynik
+
+
+def uniewaznij():
+    stan_wspolny.podbij(WERSJA_KEY)
+
+
+def _po_zmianie(**kwargs):
+    if kwargs.get("raw"):
+        return
+    uniewaznij()
+    # ponownie po zatwierdzeniu: równoległe żądanie mogło zapamiętać stan sprzed commitu
+    transaction.on_commit(uniewaznij)
+
+
+def podlacz_sygnaly():
+    for model in (Sesja, PunktObrad, Glosowanie):
+        nazwa = model._meta.model_name
+        post_save.connect(_po_zmianie, sender=model, dispatch_uid=f"podsumowanie_{nazwa}_save")
+        post_delete.connect(_po_zmianie, sender=model, dispatch_uid=f"podsumowanie_{nazwa}_delete")
@@ -0,0 +1,155 @@
+"""Profilowanie pojedynczych żądań na życzenie administratora.
+
+Żądanie z parametrem ``?_profil=1`` albo nagłówkiem ``X-Profil: 1`` od
+zalogowanego użytkownika z rolą „administrator” jest wykonywane pod cProfile,
+a wszystkie jego zapytania SQL są zapisywane wraz z czasem. Wynik trafia do
+MEDIA_ROOT/<PROFILER_KATALOG>/ jako JSON; katalog działa jak bufor
+cykliczny – po zapisie zostaje PROFILER_LIMIT najnowszych profili.
+
+Bez wyzwalacza nic nie jest mierzone ani zapisywane.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+PARAMETR = "_profil"
+NAGLOWEK = "HTTP_X_PROFIL"
+LINII_STATYSTYK = 60
+
+
+def _katalog():
+    return Path(settings.MEDIA_ROOT) / getattr(settings, "PROFILER_KATALOG", "profile")
+
+
+def limit():
+    return int(getattr(settings, "PROFILER_LIMIT", 50))
+
+
+def wyzwolony(request):
+    """Czy żądanie prosi o profilowanie i wolno je spełnić (tylko administrator)."""
+    if request.GET.get(PARAMETR) != "1" and request.META.get(NAGLOWEK) != "1":
+        return False
+    user = getattr(request, "user", None)
+    return bool(user and user.is_authenticated and getattr(user, "rola", None) == "administrator")
+
+
+class _ZapisSql:
+    """execute_wrapper: zapamiętuje treść, parametry i czas każdego zapytania."""
+
+    def __init__(self):
+        self.zapytania = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.zapytania.append({
+                "sql": sql,
+                "params": repr(params)[:500],
+                "czas_ms": round((time.perf_counter() - start) * 1000, 3),
+            })
+
+
+def profiluj(request, get_response):
+    """Wykonuje żądanie pod profilerem, zapisuje profil i zwraca (odpowiedź, nazwa)."""
+    profiler = cProfile.Profile()
+    sql = _ZapisSql()
+    start = time.perf_counter()
+    with connection.execute_wrapper(sql):
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    czas_ms = (time.perf_counter() - start) * 1000
+
+    bufor = io.StringIO()
+    pstats.Stats(profiler, stream=bufor).sort_stats("cumulative").print_stats(LINII_STATYSTYK)
+    match = getattr(request, "resolver_match", None)
+    profil = {
+        "utworzony": timezone.now().isoformat(),
+        "metoda": request.method,
+        "sciezka": request.get_full_path(),
+        "widok": (match.url_name or match.view_name) if match else "",
+        "status": response.status_code,
+        "uzytkownik": request.user.get_username(),
+        "czas_ms": round(czas_ms, 2),
+        "czas_sql_ms": round(sum(q["czas_ms"] for q in sql.zapytania), 2),
+        "zapytania": sql.zapytania,
+        "statystyki": bufor.getvalue(),
+    }
+    nazwa = zapisz(profil)
+    response["X-Profil"] = nazwa
+    return response, nazwa
+
+
+def zapisz(profil):
+    """Zapisuje profil atomowo i przycina bufor; zwraca nazwę profilu."""
+    katalog = _katalog()
+    katalog.mkdir(parents=True, exist_ok=True)
+    nazwa = f"{timezone.now():%Y%m%d-%H%M%S-%f}-{uuid.uuid4().hex[:6]}"
+    fd, tmp_name = tempfile.mkstemp(dir=katalog, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(profil, fh, ensure_ascii=False)
+        os.replace(tmp_name, katalog / f"{nazwa}.json")
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+    przytnij(limit())
+    return nazwa
+
+
+def _pliki():
+    katalog = _katalog()
+    if not katalog.is_dir():
+        return []
+    # nazwa zaczyna się od znacznika czasu – sortowanie po nazwie to sortowanie po czasie
+    return sorted(katalog.glob("*.json"), reverse=True)
+
+
+def przytnij(ile):
+    """Usuwa profile starsze niż ``ile`` najnowszych."""
+    for plik in _pliki()[ile:]:
+        try:
+            plik.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def lista():
+    """Najnowsze profile (bez statystyk i treści SQL) – do strony przeglądu."""
+    wynik = []
+    for plik in _pliki():
+        profil = wczytaj(plik.stem)
+        if profil is None:
+            continue
+        profil.pop("statystyki", None)
+        profil["liczba_zapytan"] = len(profil.pop("zapytania", []))
+        profil["nazwa"] = plik.stem
+        wynik.append(profil)
+    return wynik
+
+
+def wczytaj(nazwa):
+    """Profil o danej nazwie albo None (także dla nazw spoza katalogu)."""
+    if not nazwa or "/" in nazwa or "\\" in nazwa or nazwa.startswith("."):
+        return None
+    try:
+        with open(_katalog() / f"{nazwa}.json", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
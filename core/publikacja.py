@@ -0,0 +1,182 @@
+"""Statyczne wydanie wyników opublikowanych sesji.
+
+Sesja z ``opublikowana=True`` jest renderowana do plików w
+MEDIA_ROOT/<PUBLIKACJA_KATALOG>/::
+
+    index.html, sesje.json               – lista opublikowanych sesji
+    sesja-<id>/index.html, wyniki.json   – porządek obrad, wyniki, listy imienne
+
+Pliki serwuje bezpośrednio serwer WWW (MEDIA_URL), więc ruch publiczny
+nie dociera do Django ani do bazy. Treść pochodzi z dokumentu sesji
+(core.migawki) – dla zamkniętej sesji z niezmiennej migawki, więc jej
+pliki nie zmieniają się i mogą być długo trzymane w cache.
+
+Wydanie odświeżane jest po zatwierdzeniu transakcji, w której zapisano
+lub usunięto sesję, jej punkt, podpunkt albo głosowanie (a także
+zapisano obecność) – raz na
+transakcję, nawet gdy zmian było wiele (np. przycięcie sesji); wycofanie
+publikacji, usunięcie lub oznaczenie sesji jako usuniętej kasuje jej
+katalog.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from . import migawki
+from .models import Glosowanie, Obecnosc, PodpunktObrad, PunktObrad, Sesja
+from .transakcje import raz_po_commicie
+
+
+def _nazwa_katalogu():
+    return getattr(settings, "PUBLIKACJA_KATALOG", "wyniki")
+
+
+def _katalog():
+    return Path(settings.MEDIA_ROOT) / _nazwa_katalogu()
+
+
+def katalog_sesji(sesja_id):
+    return _katalog() / f"sesja-{sesja_id}"
+
+
+def url_sesji(sesja_id):
+    return f"{settings.MEDIA_URL}{_nazwa_katalogu()}/sesja-{sesja_id}/"
+
+
+def _zapisz(sciezka, tresc):
+    """Zapis atomowy – serwer WWW nigdy nie odda pliku w połowie zapisu."""
+    sciezka.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=sciezka.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(tresc)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, sciezka)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def opublikuj(sesja, odswiez=True):
+    """Renderuje stronę i JSON wyników sesji oraz (domyślnie) odświeża listę; zwraca katalog sesji."""
+    dane = migawki.dane_sesji(sesja)
+    teraz = timezone.now()
+    katalog = katalog_sesji(sesja.id)
+    _zapisz(katalog / "wyniki.json", json.dumps(
+        {**dane, "zamknieta": sesja.jest_zamknieta, "opublikowano": teraz.isoformat()},
+        ensure_ascii=False,
+    ))
+    _zapisz(katalog / "index.html", render_to_string("core/publikacja_sesja.html", {
+        **migawki.kontekst_wynikow(dane),
+        "zamknieta": sesja.jest_zamknieta,
+        "opublikowano": teraz,
+    }))
+    if odswiez:
+        odswiez_liste()
+    return katalog
+
+
+def wycofaj(sesja_id):
+    """Usuwa statyczne wydanie sesji (jeśli istnieje) i odświeża listę."""
+    katalog = katalog_sesji(sesja_id)
+    if not katalog.exists():
+        return False
+    shutil.rmtree(katalog, ignore_errors=True)
+    odswiez_liste()
+    return True
+
+
+def odswiez_liste():
+    sesje = [
+        {
+            "id": s.id,
+            "nazwa": s.nazwa,
+            "data": timezone.localtime(s.data).isoformat(),
+            "zamknieta": s.jest_zamknieta,
+            "url": f"sesja-{s.id}/",
+        }
+        for s in Sesja.objects.filter(opublikowana=True, jest_usunieta=False).order_by("-data", "-id")
+    ]
+    _zapisz(_katalog() / "sesje.json", json.dumps({"sesje": sesje}, ensure_ascii=False))
+    _zapisz(_katalog() / "index.html", render_to_string("core/publikacja_indeks.html", {"sesje": sesje}))
+
+
+def uzgodnij(sesja_id):
+    """Doprowadza pliki sesji do stanu z bazy: publikuje albo wycofuje."""
+    sesja = Sesja.objects.filter(id=sesja_id).first()
+    if sesja is not None and sesja.opublikowana and not sesja.jest_usunieta:
+        opublikuj(sesja)
+    else:
+        wycofaj(sesja_id)
+
+
+# --------------------------------------------------
+# Odświeżanie po zmianach (raz na transakcję)
+# --------------------------------------------------
+
+def _zaplanuj(sesja_id):
+    raz_po_commicie("publikacja", _uzgodnij_wszystkie, sesja_id)
+
+
+def _uzgodnij_wszystkie(sesja_ids):
+    for sesja_id in sorted(sesja_ids):
+        uzgodnij(sesja_id)
+
+
+# --------------------------------------------------
+# Sygnały
+# --------------------------------------------------
+
+# model porządku obrad (i obecności) -> warunek na sesję, do której należy obiekt
+_SESJA_OBIEKTU = {
+    PunktObrad: lambda obj: Q(id=obj.sesja_id),
+    PodpunktObrad: lambda obj: Q(punkty__id=obj.punkt_nadrzedny_id),
+    Glosowanie: lambda obj: Q(punkty__id=obj.punkt_obrad_id),
+    Obecnosc: lambda obj: Q(id=obj.sesja_id),
+}
+
+
+def _po_zmianie_sesji(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if not instance.opublikowana and not katalog_sesji(instance.id).exists():
+        return
+    _zaplanuj(instance.id)
+
+
+def _po_zmianie_porzadku(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    # przełączenie aktywnego punktu (save(update_fields=["aktywny"])) nie zmienia wydania
+    if update_fields is not None and set(update_fields) <= {"aktywny"}:
+        return
+    # przy usuwaniu kaskadowym sesja może już nie istnieć – wtedy wydanie wycofuje sygnał sesji
+    sesja_id = (
+        Sesja.objects.filter(_SESJA_OBIEKTU[sender](instance), opublikowana=True)
+        .values_list("id", flat=True)
+        .first()
+    )
+    if sesja_id is not None:
+        _zaplanuj(sesja_id)
+
+
+def podlacz_sygnaly():
+    post_save.connect(_po_zmianie_sesji, sender=Sesja, dispatch_uid="publikacja_sesja_save")
+    post_delete.connect(_po_zmianie_sesji, sender=Sesja, dispatch_uid="publikacja_sesja_delete")
+    for model in _SESJA_OBIEKTU:
+        nazwa = model._meta.model_name
+        post_save.connect(_po_zmianie_porzadku, sender=model, dispatch_uid=f"publikacja_{nazwa}_save")
+        # obecności bez sygnału usunięcia (fast-delete): kasowane są z sesją albo
+        # przy przycinaniu zamykanej sesji, a oba przypadki odświeża sygnał sesji
+        if model is not Obecnosc:
+            post_delete.connect(_po_zmianie_porzadku, sender=model, dispatch_uid=f"publikacja_{nazwa}_delete")
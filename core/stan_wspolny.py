@@ -0,0 +1,245 @@
+"""Wspólny dla wszystkich procesów aplikacji stan „na żywo”.
+
+Domyślny cache Django (LocMem) jest osobny w każdym procesie workera, więc
+komunikat ustawiony w jednym procesie nie był widoczny na ekranach
+obsługiwanych przez inne, a podbite wersje unieważnień (np. składu komisji)
+nie docierały do pozostałych procesów. Ten moduł trzyma takie drobne
+wartości (JSON) w magazynie współdzielonym:
+
+- ``sqlite`` – osobny plik SQLite w trybie WAL (bez dodatkowych zależności;
+  osobny plik, żeby zapisy stanu nie czekały na blokadę głównej bazy),
+- ``redis`` – serwer Redis (lub dowolny klient z metodami get/set/delete/incr/eval),
+- ``pamiec`` – słownik w procesie; tylko dla jednego procesu (np. testy).
+
+Ustawienia: STAN_WSPOLNY_BACKEND, STAN_WSPOLNY_SCIEZKA, STAN_WSPOLNY_REDIS_URL.
+Bez nich używany jest plik SQLite obok głównej bazy, a przy bazie
+w pamięci (testy) – backend ``pamiec``.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+
+
+class PamiecBackend:
+    def __init__(self):
+        self._dane = {}
+        self._lock = threading.Lock()
+
+    def get(self, klucz, domyslnie=None):
+        with self._lock:
+            return self._dane.get(klucz, domyslnie)
+
+    def set(self, klucz, wartosc):
+        with self._lock:
+            self._dane[klucz] = wartosc
+
+    def delete(self, klucz):
+        with self._lock:
+            self._dane.pop(klucz, None)
+
+    def incr(self, klucz):
+        with self._lock:
+            self._dane[klucz] = int(self._dane.get(klucz, 0)) + 1
+            return self._dane[klucz]
+
+    def ustaw_wersjonowane(self, klucz, dane):
+        with self._lock:
+            wersja = int((self._dane.get(klucz) or {}).get("wersja", 0)) + 1
+            self._dane[klucz] = {**dane, "wersja": wersja}
+            return wersja
+
+
+class SqliteBackend:
+    """Klucz–wartość w osobnym pliku SQLite; jedno połączenie na wątek (i proces)."""
+
+    def __init__(self, sciezka, timeout=5.0):
+        self.sciezka = str(sciezka)
+        self.timeout = timeout
+        self._lokalne = threading.local()
+
+    def _polaczenie(self):
+        conn = getattr(self._lokalne, "conn", None)
+        # po fork() połączenie rodzica nie nadaje się do użycia
+        if conn is not None and self._lokalne.pid == os.getpid():
+            return conn
+        Path(self.sciezka).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.sciezka, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS stan (klucz TEXT PRIMARY KEY, wartosc TEXT NOT NULL) WITHOUT ROWID")
+        self._lokalne.conn = conn
+        self._lokalne.pid = os.getpid()
+        return conn
+
+    def get(self, klucz, domyslnie=None):
+        row = self._polaczenie().execute("SELECT wartosc FROM stan WHERE klucz = ?", (klucz,)).fetchone()
+        return domyslnie if row is None else json.loads(row[0])
+
+    def set(self, klucz, wartosc):
+        self._polaczenie().execute(
+            "INSERT INTO stan (klucz, wartosc) VALUES (?, ?) "
+            "ON CONFLICT (klucz) DO UPDATE SET wartosc = excluded.wartosc",
+            (klucz, json.dumps(wartosc)),
+        )
+
+    def delete(self, klucz):
+        self._polaczenie().execute("DELETE FROM stan WHERE klucz = ?", (klucz,))
+
+    def incr(self, klucz):
+        conn = self._polaczenie()
+        # IMMEDIATE: blokada zapisu od początku, więc odczyt po upsercie widzi własny wynik
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO stan (klucz, wartosc) VALUES (?, '1') "
+                "ON CONFLICT (klucz) DO UPDATE SET wartosc = CAST(wartosc AS INTEGER) + 1",
+                (klucz,),
+            )
+            wartosc = conn.execute("SELECT wartosc FROM stan WHERE klucz = ?", (klucz,)).fetchone()[0]
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return int(wartosc)
+
+    def ustaw_wersjonowane(self, klucz, dane):
+        conn = self._polaczenie()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # wersja liczona z poprzedniej wartości w tym samym UPSERT-cie
+            conn.execute(
+                "INSERT INTO stan (klucz, wartosc) VALUES (?, json_set(?, '$.wersja', 1)) "
+                "ON CONFLICT (klucz) DO UPDATE SET wartosc = json_set("
+                "excluded.wartosc, '$.wersja', COALESCE(json_extract(stan.wartosc, '$.wersja'), 0) + 1)",
+                (klucz, json.dumps(dane)),
+            )
+            wersja = conn.execute(
+                "SELECT json_extract(wartosc, '$.wersja') FROM stan WHERE klucz = ?", (klucz,)
+            ).fetchone()[0]
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return int(wersja)
+
+
+class RedisBackend:
+    """Redis lub zgodny klient (get/set/delete/incr/eval), np. zastępnik w testach."""
+
+    def __init__(self, klient=None, url=None, prefiks="esir:"):
+        if klient is None:
+            try:
+                import redis
+            except ImportError as exc:
+                raise ImproperlyConfigured("STAN_WSPOLNY_BACKEND='redis' wymaga pakietu redis.") from exc
+            klient = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self.klient = klient
+        self.prefiks = prefiks
+
+    def get(self, klucz, domyslnie=None):
+        raw = self.klient.get(self.prefiks + klucz)
+        return domyslnie if raw is None else json.loads(raw)
+
+    def set(self, klucz, wartosc):
+        self.klient.set(self.prefiks + klucz, json.dumps(wartosc))
+
+    def delete(self, klucz):
+        self.klient.delete(self.prefiks + klucz)
+
+    def incr(self, klucz):
+        return int(self.klient.incr(self.prefiks + klucz))
+
+    # odczyt poprzedniej wersji i zapis nowej wartości jako jedna operacja serwera
+    _USTAW_WERSJONOWANE = """
+local poprzednia = redis.call('GET', KEYS[1])
+local wersja = 1
+if poprzednia then
+    wersja = (tonumber(cjson.decode(poprzednia)['wersja']) or 0) + 1
+end
+local dane = cjson.decode(ARGV[1])
+dane['wersja'] = wersja
+redis.call('SET', KEYS[1], cjson.encode(dane))
+return wersja
+"""
+
+    def ustaw_wersjonowane(self, klucz, dane):
+        return int(self.klient.eval(self._USTAW_WERSJONOWANE, 1, self.prefiks + klucz, json.dumps(dane)))
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _domyslna_sciezka():
+    from django.db import connection
+
+    if connection.vendor == "sqlite":
+        if connection.is_in_memory_db():
+            return None
+        baza = Path(connection.settings_dict["NAME"])
+        return baza.with_name(f"{baza.stem}-stan.sqlite3")
+    return Path(settings.BASE_DIR) / "stan_wspolny.sqlite3"
+
+
+def _utworz_backend():
+    rodzaj = getattr(settings, "STAN_WSPOLNY_BACKEND", None)
+    if rodzaj == "redis":
+        return RedisBackend(url=getattr(settings, "STAN_WSPOLNY_REDIS_URL", None))
+    if rodzaj == "pamiec":
+        return PamiecBackend()
+    if rodzaj not in (None, "sqlite"):
+        raise ImproperlyConfigured(f"Nieznany STAN_WSPOLNY_BACKEND: {rodzaj!r}")
+    sciezka = getattr(settings, "STAN_WSPOLNY_SCIEZKA", None) or _domyslna_sciezka()
+    if sciezka is None:
+        return PamiecBackend()
+    return SqliteBackend(sciezka)
+
+
+def stan():
+    """Skonfigurowany backend (jeden na proces)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _utworz_backend()
+    return _backend
+
+
+def _po_zmianie_ustawien(setting, **kwargs):
+    global _backend
+    if setting.startswith("STAN_WSPOLNY_"):
+        _backend = None
+
+
+setting_changed.connect(_po_zmianie_ustawien, dispatch_uid="stan_wspolny_ustawienia")
+
+
+def wersja(klucz):
+    """Aktualny numer wersji (0, dopóki nikt jej nie podbił)."""
+    return int(stan().get(klucz, 0))
+
+
+def podbij(klucz):
+    return stan().incr(klucz)
+
+
+def kanal_komunikatu(sesja):
+    """Kanał komunikatu ekranu: osobny dla każdej Sesja/KomisjaSesja."""
+    return f"komunikat:{sesja._meta.model_name}:{sesja.pk}"
+
+
+def komunikat(kanal):
+    """{"tekst", "wersja"} – wersja rośnie przy każdej zmianie (także usunięciu)."""
+    return stan().get(kanal) or {"tekst": "", "wersja": 0}
+
+
+def ustaw_komunikat(kanal, tekst):
+    """Zapisuje tekst i kolejną wersję jedną atomową operacją; zwraca wersję."""
+    return stan().ustaw_wersjonowane(kanal, {"tekst": tekst or ""})
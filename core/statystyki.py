@@ -0,0 +1,202 @@
+"""Przyrostowe statystyki radnych (StatystykaRadnego) per kadencja.
+
+Kadencję wyznacza data sesji (dla wniosku – data złożenia) na podstawie
+ustawienia KADENCJE: par (etykieta, data początku) w kolejności
+chronologicznej. Daty sprzed pierwszej kadencji trafiają do etykiety "".
+
+Oddanie głosu, zapis obecności i złożenie wniosku zmieniają liczniki
+pojedynczym UPDATE ... SET pole = pole + 1 (F-wyrażenie). Zmiana obecności
+przesuwa liczniki tylko wtedy, gdy warunkowy UPDATE w Obecnosc.ustaw()
+faktycznie zmienił wiersz. Usunięcia –
+zwykle kaskadowe, przy kasowaniu sesji, punktu czy głosowania – tylko
+odnotowują radnych (pre_delete obiektu nadrzędnego), a ich wiersze liczone
+są od nowa raz, po zatwierdzeniu transakcji. Zmiana daty sesji nie przenosi liczników między kadencjami:
+w takim przypadku należy uruchomić przebuduj_statystyki_radnych.
+Sesje przycięte po zamknięciu liczone są z liczników zapisanych w migawce.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.signals import post_save, pre_delete
+from django.utils import timezone
+
+from accounts.models import Uzytkownik
+
+from .models import Glos, Glosowanie, MigawkaSesji, Obecnosc, PunktObrad, Sesja, StatystykaRadnego, Wniosek
+from .transakcje import raz_po_commicie
+
+DOMYSLNE_KADENCJE = (
+    ("2018-2024", "2018-11-01"),
+    ("2024-2029", "2024-05-01"),
+)
+
+POLE_GLOSU = {"za": "glosy_za", "przeciw": "glosy_przeciw", "wstrzymuje": "glosy_wstrzymuje"}
+LICZNIKI = (
+    "obecnosci", "nieobecnosci", "glosy_za", "glosy_przeciw",
+    "glosy_wstrzymuje", "glosy_na_kandydatow", "wnioski",
+)
+
+
+def kadencje():
+    return [(etykieta, date.fromisoformat(str(start))) for etykieta, start in getattr(settings, "KADENCJE", DOMYSLNE_KADENCJE)]
+
+
+def kadencja_dla(chwila):
+    """Etykieta kadencji obejmującej datę/chwilę (pusta przed pierwszą kadencją)."""
+    if chwila is None:
+        return ""
+    dzien = chwila
+    if isinstance(chwila, datetime):
+        dzien = timezone.localdate(chwila) if timezone.is_aware(chwila) else chwila.date()
+    wynik = ""
+    for etykieta, start in kadencje():
+        if start <= dzien:
+            wynik = etykieta
+    return wynik
+
+
+def biezaca_kadencja():
+    return kadencja_dla(timezone.now())
+
+
+def dodaj(uzytkownik_id, kadencja, **przyrosty):
+    """Dodaje przyrosty do liczników radnego w kadencji (wiersz zakładany w razie braku)."""
+    przyrosty = {pole: ile for pole, ile in przyrosty.items() if ile}
+    if not przyrosty:
+        return
+    wiersz = StatystykaRadnego.objects.filter(uzytkownik_id=uzytkownik_id, kadencja=kadencja)
+    zmiany = {pole: F(pole) + ile for pole, ile in przyrosty.items()}
+    if wiersz.update(zaktualizowano=timezone.now(), **zmiany):
+        return
+    try:
+        with transaction.atomic():
+            StatystykaRadnego.objects.create(uzytkownik_id=uzytkownik_id, kadencja=kadencja, **przyrosty)
+    except IntegrityError:
+        # równoległe żądanie założyło wiersz w międzyczasie
+        wiersz.update(zaktualizowano=timezone.now(), **zmiany)
+
+
+def przebuduj(uzytkownicy=None):
+    """Liczy statystyki od zera (wszystkich albo podanych radnych); zwraca liczbę wierszy."""
+    liczniki = defaultdict(lambda: dict.fromkeys(LICZNIKI, 0))
+
+    obecnosci = Obecnosc.objects.all()
+    glosy = Glos.objects.all()
+    wnioski = Wniosek.objects.all()
+    if uzytkownicy is not None:
+        uzytkownicy = set(uzytkownicy)
+        obecnosci = obecnosci.filter(radny_id__in=uzytkownicy)
+        glosy = glosy.filter(uzytkownik_id__in=uzytkownicy)
+        wnioski = wnioski.filter(radny_id__in=uzytkownicy)
+
+    # grupowanie po dacie sesji, a nie po kadencji – kadencję wyliczamy w Pythonie
+    for row in obecnosci.values("radny_id", "sesja__data", "obecny").annotate(n=Count("id")).order_by():
+        pole = "obecnosci" if row["obecny"] else "nieobecnosci"
+        liczniki[(row["radny_id"], kadencja_dla(row["sesja__data"]))][pole] += row["n"]
+    for row in (
+        glosy.values("uzytkownik_id", "glosowanie__punkt_obrad__sesja__data", "glos")
+        .annotate(n=Count("id"))
+        .order_by()
+    ):
+        pole = POLE_GLOSU.get(row["glos"], "glosy_na_kandydatow")
+        liczniki[(row["uzytkownik_id"], kadencja_dla(row["glosowanie__punkt_obrad__sesja__data"]))][pole] += row["n"]
+    for radny_id, data in wnioski.values_list("radny_id", "data").order_by():
+        liczniki[(radny_id, kadencja_dla(data))]["wnioski"] += 1
+
+    # sesje przycięte po zamknięciu (core.migawki) – obecności i głosy już tylko w migawce
+    z_migawek = defaultdict(list)
+    for data, liczniki_sesji in MigawkaSesji.objects.filter(przycieto=True).values_list("data_sesji", "liczniki_radnych"):
+        for uid, pola in liczniki_sesji.items():
+            if uzytkownicy is None or int(uid) in uzytkownicy:
+                z_migawek[int(uid)].append((kadencja_dla(data), pola))
+    for uid in Uzytkownik.objects.filter(id__in=list(z_migawek)).values_list("id", flat=True):
+        for kadencja, pola in z_migawek[uid]:
+            for pole, ile in pola.items():
+                liczniki[(uid, kadencja)][pole] += ile
+
+    teraz = timezone.now()
+    with transaction.atomic():
+        stare = StatystykaRadnego.objects.all()
+        if uzytkownicy is not None:
+            stare = stare.filter(uzytkownik_id__in=uzytkownicy)
+        stare.delete()
+        StatystykaRadnego.objects.bulk_create([
+            StatystykaRadnego(uzytkownik_id=uid, kadencja=kadencja, zaktualizowano=teraz, **pola)
+            for (uid, kadencja), pola in liczniki.items()
+        ])
+    return len(liczniki)
+
+
+# --------------------------------------------------
+# Przeliczenie po usunięciach (raz na transakcję)
+# --------------------------------------------------
+
+def odnotuj_do_przeliczenia(uzytkownicy):
+    """Przelicza podanych radnych po zatwierdzeniu transakcji (raz, nawet przy wielu wywołaniach)."""
+    raz_po_commicie("statystyki", przebuduj, *uzytkownicy)
+
+
+# --------------------------------------------------
+# Sygnały
+# --------------------------------------------------
+
+def _glos_zapisany(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    data = (
+        Sesja.objects.filter(punkty__glosowania__id=instance.glosowanie_id)
+        .values_list("data", flat=True)
+        .first()
+    )
+    dodaj(instance.uzytkownik_id, kadencja_dla(data), **{POLE_GLOSU.get(instance.glos, "glosy_na_kandydatow"): 1})
+
+
+def _obecnosc_zapisana(sender, instance, created, raw=False, poprzednio=None, **kwargs):
+    if raw:
+        return
+    if not created and poprzednio is None:
+        # zwykły save() istniejącego wiersza (np. w adminie) – poprzednia wartość
+        # nie jest znana, więc radnego liczymy od nowa; zmiany z widoków idą przez Obecnosc.ustaw()
+        odnotuj_do_przeliczenia([instance.radny_id])
+        return
+    przyrosty = {"obecnosci" if instance.obecny else "nieobecnosci": 1}
+    if poprzednio is not None:
+        przyrosty["nieobecnosci" if instance.obecny else "obecnosci"] = -1
+    dodaj(instance.radny_id, kadencja_dla(instance.sesja.data), **przyrosty)
+
+
+def _wniosek_zapisany(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    dodaj(instance.radny_id, kadencja_dla(instance.data), wnioski=1)
+
+
+# Głosy, obecności i wnioski nie mają własnych sygnałów usunięcia, żeby Django
+# mogło kasować je jednym DELETE (fast-delete) zamiast wiersz po wierszu.
+# Radnych do przeliczenia zbiera pre_delete obiektów nadrzędnych; kod usuwający
+# te wiersze bezpośrednio (migawki.przytnij, reset danych) wywołuje
+# odnotuj_do_przeliczenia sam.
+
+def _usuwana_sesja(sender, instance, **kwargs):
+    odnotuj_do_przeliczenia(Obecnosc.objects.filter(sesja_id=instance.pk).values_list("radny_id", flat=True))
+
+
+def _usuwany_punkt(sender, instance, **kwargs):
+    odnotuj_do_przeliczenia(Wniosek.objects.filter(punkt_obrad_id=instance.pk).values_list("radny_id", flat=True))
+
+
+def _usuwane_glosowanie(sender, instance, **kwargs):
+    odnotuj_do_przeliczenia(Glos.objects.filter(glosowanie_id=instance.pk).values_list("uzytkownik_id", flat=True))
+
+
+def podlacz_sygnaly():
+    post_save.connect(_glos_zapisany, sender=Glos, dispatch_uid="statystyki_glos_save")
+    post_save.connect(_obecnosc_zapisana, sender=Obecnosc, dispatch_uid="statystyki_obecnosc_save")
+    post_save.connect(_wniosek_zapisany, sender=Wniosek, dispatch_uid="statystyki_wniosek_save")
+    pre_delete.connect(_usuwana_sesja, sender=Sesja, dispatch_uid="statystyki_sesja_delete")
+    pre_delete.connect(_usuwany_punkt, sender=PunktObrad, dispatch_uid="statystyki_punkt_delete")
+    pre_delete.connect(_usuwane_glosowanie, sender=Glosowanie, dispatch_uid="statystyki_glosowanie_delete")
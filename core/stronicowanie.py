@@ -0,0 +1,152 @@
+"""Stronicowanie kluczowe (keyset / seek) list uporządkowanych po (data, id).
+
+Zamiast OFFSET kolejną stronę wyznacza kursor – (data, id) ostatniego
+wiersza poprzedniej strony – więc koszt strony nie rośnie wraz z historią:
+zapytanie to zawsze ``WHERE (data, id) < kursor ORDER BY data DESC, id DESC LIMIT n+1``.
+
+Parametry GET: ``po=<kursor>`` (strona następna), ``przed=<kursor>``
+(strona poprzednia), ``na_stronie`` (ograniczone do MAX_NA_STRONIE).
+"""
+
+import base64
+import binascii
+from dataclasses import dataclass, field
+
+from django.db.models import Q
+from django.http import JsonResponse, QueryDict
+from django.utils.dateparse import parse_datetime
+
+DOMYSLNIE_NA_STRONIE = 25
+MAX_NA_STRONIE = 100
+
+
+def koduj_kursor(obj, pole="data"):
+    raw = f"{getattr(obj, pole).isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def dekoduj_kursor(kursor):
+    """Zwraca (data, id) albo None dla pustego/uszkodzonego kursora."""
+    if not kursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(kursor + "=" * (-len(kursor) % 4)).decode()
+        data_raw, _, pk = raw.rpartition("|")
+        data = parse_datetime(data_raw)
+        if data is None:
+            return None
+        return data, int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+@dataclass
+class StronaKluczowa:
+    obiekty: list
+    nastepna: str | None = None
+    poprzednia: str | None = None
+    parametry: QueryDict = field(default_factory=QueryDict)
+    sciezka: str = ""
+
+    def __iter__(self):
+        return iter(self.obiekty)
+
+    def __len__(self):
+        return len(self.obiekty)
+
+    def __bool__(self):
+        return bool(self.obiekty)
+
+    @property
+    def ma_nastepna(self):
+        return self.nastepna is not None
+
+    @property
+    def ma_poprzednia(self):
+        return self.poprzednia is not None
+
+    def _url(self, klucz, kursor):
+        params = self.parametry.copy()
+        params.pop("po", None)
+        params.pop("przed", None)
+        params[klucz] = kursor
+        return f"{self.sciezka}?{params.urlencode()}"
+
+    @property
+    def url_nastepnej(self):
+        return self._url("po", self.nastepna) if self.nastepna else None
+
+    @property
+    def url_poprzedniej(self):
+        return self._url("przed", self.poprzednia) if self.poprzednia else None
+
+
+def _warunek(pole, data, pk, wieksze):
+    op = "gt" if wieksze else "lt"
+    return Q(**{f"{pole}__{op}": data}) | Q(**{pole: data, f"pk__{op}": pk})
+
+
+def strona(queryset, *, po=None, przed=None, na_stronie=DOMYSLNIE_NA_STRONIE, malejaco=True, pole="data"):
+    """Zwraca StronaKluczowa dla querysetu uporządkowanego po (pole, id)."""
+    kursor_po = dekoduj_kursor(po)
+    kursor_przed = None if kursor_po else dekoduj_kursor(przed)
+    wstecz = kursor_przed is not None
+
+    # kierunek skanu: „wstecz” czyta w odwrotnej kolejności i odwraca wynik
+    rosnaco = malejaco == wstecz
+    kolejnosc = (pole, "pk") if rosnaco else (f"-{pole}", "-pk")
+    qs = queryset.order_by(*kolejnosc)
+    kursor = kursor_przed or kursor_po
+    if kursor:
+        qs = qs.filter(_warunek(pole, *kursor, wieksze=rosnaco))
+
+    wiersze = list(qs[: na_stronie + 1])
+    wiecej = len(wiersze) > na_stronie
+    wiersze = wiersze[:na_stronie]
+    if wstecz:
+        wiersze.reverse()
+
+    nastepna = poprzednia = None
+    if wiersze:
+        if wstecz:
+            poprzednia = koduj_kursor(wiersze[0], pole) if wiecej else None
+            nastepna = koduj_kursor(wiersze[-1], pole)
+        else:
+            nastepna = koduj_kursor(wiersze[-1], pole) if wiecej else None
+            poprzednia = koduj_kursor(wiersze[0], pole) if kursor_po else None
+    return StronaKluczowa(obiekty=wiersze, nastepna=nastepna, poprzednia=poprzednia)
+
+
+def strona_z_zadania(request, queryset, *, malejaco=True, pole="data", na_stronie=DOMYSLNIE_NA_STRONIE):
+    """Jak strona(), ale kursory i rozmiar strony czyta z parametrów GET."""
+    try:
+        na_stronie = int(request.GET.get("na_stronie") or na_stronie)
+    except ValueError:
+        pass
+    na_stronie = max(1, min(na_stronie, MAX_NA_STRONIE))
+    wynik = strona(
+        queryset,
+        po=request.GET.get("po"),
+        przed=request.GET.get("przed"),
+        na_stronie=na_stronie,
+        malejaco=malejaco,
+        pole=pole,
+    )
+    wynik.parametry = request.GET.copy()
+    wynik.sciezka = request.path
+    return wynik
+
+
+def chce_json(request):
+    return request.GET.get("format") == "json"
+
+
+def json_strony(strona_kluczowa, serializuj):
+    """Odpowiedź JSON dla „nieskończonego przewijania”."""
+    return JsonResponse(
+        {
+            "wyniki": [serializuj(obj) for obj in strona_kluczowa],
+            "nastepna": strona_kluczowa.url_nastepnej,
+            "poprzednia": strona_kluczowa.url_poprzedniej,
+        }
+    )
@@ -1,9 +1,50 @@
-from django.test import TestCase, override_settings
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import zipfile
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.db.models import Count
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
 from accounts.models import Uzytkownik
-from core.models import Sesja, PunktObrad, PodpunktObrad, Glosowanie, Obecnosc, Glos, Komisja, KomisjaSesja, KomisjaWniosek, KomisjaPunktObrad, KomisjaPodpunktObrad, KomisjaGlosowanie, KomisjaGlos
+from core import czlonkostwo, metryki, migawki, profiler, stan_wspolny, statystyki, zadania
+from core.archiwum import _iter_glosowania
+from core.czlonkostwo import komisje_uzytkownika
+from core.management.commands.zmierz_wydajnosc import zmierz_protokol
+from core.metryki import Ekrany, Rejestr, rejestr
+from core.middleware import _LicznikSql
+from core.models import Sesja, PunktObrad, PodpunktObrad, Glosowanie, Obecnosc, Glos, Komisja, KomisjaSesja, KomisjaWniosek, KomisjaPunktObrad, KomisjaPodpunktObrad, KomisjaGlosowanie, KomisjaGlos, Kandydat, ZadanieEksportu, Wniosek, LicznikSygnatur, IndeksWyszukiwania, StatystykaRadnego, MigawkaSesji
+from core.opis import _opis_html, opis_html
+from core.pdf_cache import protokol_fingerprint
+from core.pdf_dokumenty import protokol_pdf_bytes
+from core.pdf_fonts import pdf_fonts
+from core.pdf_layout import glyph_widths, wrap_text
+from core.stan_wspolny import PamiecBackend, RedisBackend, SqliteBackend, kanal_komunikatu
+from core.statystyki import LICZNIKI
+from core.stronicowanie import strona
+from core.templatetags.core_extras import format_opis
+from core.tokeny_ekranu import odczytaj, wystaw
+from core.transakcje import raz_po_commicie
+from core.views import _protokol_pdf_response_for_session
+from core.wyszukiwanie import szukaj
 
 
 class AuthorizationMatrixTests(TestCase):
@@ -988,3 +1029,2110 @@ class KomisjaVotingPermissionsTests(TestCase):
 		self.assertEqual(response.status_code, 302)
 		self.glosowanie.refresh_from_db()
 		self.assertFalse(self.glosowanie.otwarte)
+
+
+class PdfLayoutTests(TestCase):
+	OPIS = (
+		"Projekt uchwały w sprawie zmian w budżecie gminy na bieżący rok budżetowy, "
+		"obejmujący przesunięcia środków pomiędzy działami klasyfikacji oraz zwiększenie "
+		"wydatków majątkowych na przebudowę dróg gminnych i modernizację oświetlenia ulicznego. "
+	) * 6
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.prezydium = Uzytkownik.objects.create_user(
+			username="prezydium_pdf",
+			password="test12345",
+			rola="prezydium",
+			imie="Paweł",
+			nazwisko="Protokolant",
+		)
+		cls.sesja = Sesja.objects.create(nazwa="Sesja budżetowa", data=timezone.now(), aktywna=True)
+		for numer in range(1, 61):
+			punkt = PunktObrad.objects.create(sesja=cls.sesja, numer=numer, tytul=f"Punkt {numer}", opis=cls.OPIS)
+			Glosowanie.objects.create(punkt_obrad=punkt, nazwa=f"Głosowanie {numer}")
+			for pnumer in range(1, 3):
+				PodpunktObrad.objects.create(punkt_nadrzedny=punkt, numer=pnumer, tytul=f"Podpunkt {pnumer}", opis=cls.OPIS)
+
+	def test_wrap_text_breaks_on_word_boundaries_within_width(self):
+		max_width = 200
+		lines = wrap_text(self.OPIS, "Helvetica", 9, max_width)
+		widths = glyph_widths("Helvetica", 9)
+
+		self.assertGreater(len(lines), 1)
+		self.assertEqual(" ".join(lines).split(), self.OPIS.split())
+		for line in lines:
+			self.assertLessEqual(widths.width(line), max_width)
+
+	def test_wrap_text_splits_words_longer_than_line(self):
+		lines = wrap_text("x" * 300 + "\n\nkoniec", "Helvetica", 9, 100)
+
+		self.assertEqual("".join(lines[:-2]), "x" * 300)
+		self.assertEqual(lines[-2:], ["", "koniec"])
+
+	def test_protokol_50_stron(self):
+		# czas renderowania mierzy zmierz_wydajnosc (wpis protokol_pdf), nie testy jednostkowe
+		wynik = zmierz_protokol(self.sesja, powtorzenia=1)
+		self.assertGreaterEqual(wynik["strony"], 50)
+		self.assertGreater(wynik["zapytania"], 0)
+
+	def test_fonts_are_registered_once_per_process(self):
+		media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+		media_override = override_settings(MEDIA_ROOT=media_root)
+		media_override.enable()
+		self.addCleanup(media_override.disable)
+
+		self.assertEqual(pdf_fonts(), ("DejaVuSans", "DejaVuSans-Bold"))
+		with mock.patch("core.pdf_fonts._register_fonts") as register:
+			_protokol_pdf_response_for_session(self.sesja)
+			self.client.force_login(self.prezydium)
+			self.client.get(reverse("protokol_sesji_pdf"))
+		register.assert_not_called()
+
+
+class ProtokolPdfCacheTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.prezydium = Uzytkownik.objects.create_user(
+			username="prezydium_cache",
+			password="test12345",
+			rola="prezydium",
+			imie="Celina",
+			nazwisko="Cache",
+		)
+		cls.radny = Uzytkownik.objects.create_user(
+			username="radny_cache",
+			password="test12345",
+			rola="radny",
+			imie="Robert",
+			nazwisko="Radny",
+		)
+		cls.sesja = Sesja.objects.create(nazwa="Sesja zamknięta", data=timezone.now(), aktywna=False, jest_zamknieta=True)
+		punkt = PunktObrad.objects.create(sesja=cls.sesja, numer=1, tytul="Absolutorium")
+		cls.glosowanie = Glosowanie.objects.create(punkt_obrad=punkt, nazwa="Absolutorium", otwarte=True)
+
+	def setUp(self):
+		self.media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+		media_override = override_settings(MEDIA_ROOT=self.media_root)
+		media_override.enable()
+		self.addCleanup(media_override.disable)
+		self.client.force_login(self.prezydium)
+		self.url = reverse("protokol_sesji_pdf_wybor") + f"?sesja_id={self.sesja.id}"
+
+	def _cached_files(self):
+		return sorted(p.name for p in Path(self.media_root).rglob("*.pdf"))
+
+	def test_second_download_is_served_from_cache(self):
+		first = self.client.get(self.url)
+		self.assertEqual(first.status_code, 200)
+		self.assertTrue(first["ETag"])
+		body = b"".join(first.streaming_content)
+		self.assertTrue(body.startswith(b"%PDF"))
+
+		with mock.patch("core.views.protokol_pdf_bytes") as render:
+			second = self.client.get(self.url)
+			self.assertEqual(b"".join(second.streaming_content), body)
+		render.assert_not_called()
+		self.assertEqual(second["ETag"], first["ETag"])
+		self.assertEqual(len(self._cached_files()), 1)
+
+	def test_matching_etag_returns_not_modified(self):
+		first = self.client.get(self.url)
+		b"".join(first.streaming_content)
+
+		response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+		self.assertEqual(response.status_code, 304)
+
+	def test_new_ballot_changes_fingerprint_and_evicts_old_entry(self):
+		first = self.client.get(self.url)
+		b"".join(first.streaming_content)
+		old_files = self._cached_files()
+
+		Glos.objects.create(glosowanie=self.glosowanie, uzytkownik=self.radny, glos="za")
+		second = self.client.get(self.url)
+		b"".join(second.streaming_content)
+
+		self.assertNotEqual(second["ETag"], first["ETag"])
+		new_files = self._cached_files()
+		self.assertEqual(len(new_files), 1)
+		self.assertNotEqual(new_files, old_files)
+
+	def test_renaming_voter_or_candidate_changes_fingerprint(self):
+		Glos.objects.create(glosowanie=self.glosowanie, uzytkownik=self.radny, glos="za")
+		kandydat = Kandydat.objects.create(punkt_obrad=self.glosowanie.punkt_obrad, imie="Jan", nazwisko="Kowalski")
+		przed = protokol_fingerprint(self.sesja)
+
+		Uzytkownik.objects.filter(id=self.radny.id).update(nazwisko="Nowak")
+		po_zmianie_radnego = protokol_fingerprint(self.sesja)
+		self.assertNotEqual(po_zmianie_radnego, przed)
+
+		Kandydat.objects.filter(id=kandydat.id).update(nazwisko="Wiśniewski")
+		self.assertNotEqual(protokol_fingerprint(self.sesja), po_zmianie_radnego)
+
+	def test_cached_pdf_does_not_depend_on_render_time(self):
+		# treść cache'owanego PDF może zależeć tylko od danych objętych odciskiem
+		with mock.patch("django.utils.timezone.now", side_effect=AssertionError("timezone.now() w protokole")):
+			self.assertTrue(protokol_pdf_bytes(self.sesja).startswith(b"%PDF"))
+
+	def test_entry_evicted_by_concurrent_render_is_still_served(self):
+		def concurrent_eviction(sesja_id, keep=None):
+			# równoległy render nowszej wersji usuwa cały katalog sesji
+			shutil.rmtree(Path(self.media_root), ignore_errors=True)
+
+		with mock.patch("core.pdf_cache.evict_superseded", side_effect=concurrent_eviction):
+			response = self.client.get(self.url)
+			body = b"".join(response.streaming_content)
+
+		self.assertEqual(response.status_code, 200)
+		self.assertTrue(body.startswith(b"%PDF"))
+
+
+class ZadaniaEksportuTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.prezydium = Uzytkownik.objects.create_user(
+			username="prezydium_zadania",
+			password="test12345",
+			rola="prezydium",
+			imie="Zofia",
+			nazwisko="Zadaniowa",
+		)
+		cls.radny = Uzytkownik.objects.create_user(
+			username="radny_zadania",
+			password="test12345",
+			rola="radny",
+			imie="Roman",
+			nazwisko="Wnioskujący",
+		)
+		cls.sesja = Sesja.objects.create(nazwa="Sesja w tle", data=timezone.now(), aktywna=False)
+		PunktObrad.objects.create(sesja=cls.sesja, numer=1, tytul="Sprawy bieżące")
+
+	def setUp(self):
+		media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+		media_override = override_settings(MEDIA_ROOT=media_root)
+		media_override.enable()
+		self.addCleanup(media_override.disable)
+
+	def test_protocol_job_can_be_polled_and_downloaded(self):
+		self.client.force_login(self.prezydium)
+		response = self.client.post(
+			reverse("zadanie_protokol_zlec"),
+			{"sesja_id": self.sesja.id},
+			HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+		)
+		self.assertEqual(response.status_code, 202)
+		zadanie_id = response.json()["id"]
+		status_url = response.json()["status_url"]
+		self.assertEqual(self.client.get(status_url).json()["status"], "oczekuje")
+
+		self.assertEqual(zadania.wykonaj_oczekujace(), 1)
+
+		status = self.client.get(status_url).json()
+		self.assertEqual(status["status"], "gotowe")
+		download = self.client.get(status["download_url"])
+		self.assertEqual(download.status_code, 200)
+		self.assertTrue(b"".join(download.streaming_content).startswith(b"%PDF"))
+		self.assertFalse(zadania.wykonaj(zadanie_id))
+		self.assertEqual(ZadanieEksportu.objects.get(id=zadanie_id).status, "gotowe")
+
+	def test_motions_job_is_private_to_its_owner(self):
+		Wniosek.objects.create(radny=self.radny, tresc="Wniosek o remont drogi")
+		self.client.force_login(self.radny)
+		response = self.client.post(reverse("zadanie_wnioski_zlec"))
+		self.assertEqual(response.status_code, 302)
+		zadanie_id = int(response["Location"].rstrip("/").split("/")[-1])
+		zadania.wykonaj_oczekujace()
+
+		self.assertEqual(self.client.get(reverse("zadanie_pobierz", args=[zadanie_id])).status_code, 200)
+		self.client.force_login(self.prezydium)
+		self.assertEqual(self.client.get(reverse("api_zadanie_status", args=[zadanie_id])).status_code, 403)
+
+	def test_failed_job_is_marked_with_error(self):
+		zadanie = zadania.zlec("protokol", self.prezydium, sesja_id=0)
+		zadania.wykonaj(zadanie.id)
+
+		zadanie.refresh_from_db()
+		self.assertEqual(zadanie.status, "blad")
+		self.assertTrue(zadanie.blad)
+
+	@override_settings(ZADANIA_PRZECHOWUJ_DNI=3)
+	def test_old_finished_jobs_are_removed_with_their_files(self):
+		stare = zadania.zlec("protokol", self.prezydium, sesja_id=self.sesja.id)
+		nowe = zadania.zlec("protokol", self.prezydium, sesja_id=self.sesja.id)
+		oczekujace = zadania.zlec("protokol", self.prezydium, sesja_id=self.sesja.id)
+		zadania.wykonaj(stare.id)
+		zadania.wykonaj(nowe.id)
+		ZadanieEksportu.objects.filter(id=stare.id).update(zakonczone=timezone.now() - timedelta(days=4))
+		sciezka = ZadanieEksportu.objects.get(id=stare.id).plik.path
+		self.assertTrue(os.path.exists(sciezka))
+
+		call_command("przetwarzaj_zadania", "--raz", stdout=io.StringIO())
+
+		self.assertFalse(ZadanieEksportu.objects.filter(id=stare.id).exists())
+		self.assertFalse(os.path.exists(os.path.dirname(sciezka)))
+		nowe.refresh_from_db()
+		self.assertTrue(nowe.plik.storage.exists(nowe.plik.name))
+		self.assertEqual(ZadanieEksportu.objects.get(id=oczekujace.id).status, "gotowe")
+
+
+@override_settings(ARCHIWUM_PROCESY=1)
+class ArchiwumProtokolowTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.prezydium = Uzytkownik.objects.create_user(
+			username="prezydium_archiwum",
+			password="test12345",
+			rola="prezydium",
+			imie="Aleksandra",
+			nazwisko="Archiwalna",
+		)
+		cls.radny = Uzytkownik.objects.create_user(
+			username="radny_archiwum",
+			password="test12345",
+			rola="radny",
+			imie="Artur",
+			nazwisko="Głosujący",
+		)
+		tz = timezone.get_current_timezone()
+		cls.sesja = Sesja.objects.create(nazwa="Sesja budżetowa", data=timezone.make_aware(datetime(2024, 3, 14, 10), tz))
+		Sesja.objects.create(nazwa="Sesja z innego roku", data=timezone.make_aware(datetime(2023, 12, 31, 10), tz))
+		punkt = PunktObrad.objects.create(sesja=cls.sesja, numer=1, tytul="Budżet")
+		glosowanie = Glosowanie.objects.create(punkt_obrad=punkt, nazwa="Przyjęcie budżetu", otwarte=False)
+		Glos.objects.create(glosowanie=glosowanie, uzytkownik=cls.radny, glos="za")
+
+	def setUp(self):
+		media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+		media_override = override_settings(MEDIA_ROOT=media_root)
+		media_override.enable()
+		self.addCleanup(media_override.disable)
+		self.client.force_login(self.prezydium)
+
+	def _open_zip(self, content):
+		return zipfile.ZipFile(io.BytesIO(content))
+
+	def test_yearly_archive_streams_protocols_and_vote_dump(self):
+		response = self.client.get(reverse("protokoly_archiwum_zip"), {"rok": "2024"})
+		self.assertEqual(response.status_code, 200)
+		self.assertTrue(response.streaming)
+		self.assertIn("protokoly_2024-01-01_2024-12-31.zip", response["Content-Disposition"])
+
+		archive = self._open_zip(b"".join(response.streaming_content))
+		self.assertIsNone(archive.testzip())
+		pdfs = [n for n in archive.namelist() if n.startswith("protokoly/")]
+		self.assertEqual(len(pdfs), 1)
+		self.assertTrue(archive.read(pdfs[0]).startswith(b"%PDF"))
+
+		csv_text = archive.read("glosowania.csv").decode("utf-8")
+		self.assertIn("Przyjęcie budżetu", csv_text)
+		self.assertNotIn("innego roku", csv_text)
+		rekordy = json.loads(archive.read("glosowania.json"))
+		self.assertEqual(len(rekordy), 1)
+		self.assertEqual(rekordy[0]["za"], 1)
+		self.assertEqual(rekordy[0]["sesja_id"], self.sesja.id)
+
+	def test_invalid_range_returns_bad_request(self):
+		url = reverse("protokoly_archiwum_zip")
+		self.assertEqual(self.client.get(url).status_code, 400)
+		self.assertEqual(self.client.get(url, {"od": "2024-05-01", "do": "2024-01-01"}).status_code, 400)
+
+	def test_date_range_overrides_form_default_year(self):
+		# formularz zawsze wysyła rok (domyślnie bieżący) razem z od/do
+		dane = {"rok": str(timezone.localdate().year), "od": "2023-12-01", "do": "2024-12-31"}
+		response = self.client.get(reverse("protokoly_archiwum_zip"), dane)
+		self.assertEqual(response.status_code, 200)
+		self.assertIn("protokoly_2023-12-01_2024-12-31.zip", response["Content-Disposition"])
+		archive = self._open_zip(b"".join(response.streaming_content))
+		self.assertEqual(len([n for n in archive.namelist() if n.startswith("protokoly/")]), 2)
+
+		self.client.post(reverse("zadanie_archiwum_zlec"), dane)
+		zadanie = ZadanieEksportu.objects.get(typ="archiwum")
+		self.assertEqual((zadanie.parametry["od"], zadanie.parametry["do"]), ("2023-12-01", "2024-12-31"))
+		self.assertEqual(self.client.get(reverse("protokoly_archiwum_zip"), {**dane, "do": ""}).status_code, 400)
+
+	@override_settings(ARCHIWUM_PROCESY=4)
+	def test_streaming_view_does_not_start_process_pool(self):
+		with mock.patch("core.archiwum.ProcessPoolExecutor") as pool:
+			response = self.client.get(reverse("protokoly_archiwum_zip"), {"rok": "2024"})
+			b"".join(response.streaming_content)
+		pool.assert_not_called()
+
+	def test_archive_requires_session_management_role(self):
+		self.client.force_login(self.radny)
+		self.assertEqual(self.client.get(reverse("protokoly_archiwum_zip"), {"rok": "2024"}).status_code, 403)
+
+	def test_archive_can_be_prepared_as_background_job(self):
+		response = self.client.post(
+			reverse("zadanie_archiwum_zlec"),
+			{"od": "2023-12-01", "do": "2024-12-31"},
+			HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+		)
+		self.assertEqual(response.status_code, 202)
+		zadania.wykonaj_oczekujace()
+
+		status = self.client.get(response.json()["status_url"]).json()
+		self.assertEqual(status["status"], "gotowe")
+		download = self.client.get(status["download_url"])
+		archive = self._open_zip(b"".join(download.streaming_content))
+		self.assertEqual(len([n for n in archive.namelist() if n.startswith("protokoly/")]), 2)
+
+
+class SygnaturyWnioskowTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.radny = Uzytkownik.objects.create_user(
+			username="radny_sygnatury",
+			password="test12345",
+			rola="radny",
+			imie="Sylwia",
+			nazwisko="Sygnatariusz",
+		)
+
+	def test_signatures_are_sequential_per_year(self):
+		rok = timezone.localdate().year
+		pierwszy = Wniosek.objects.create(radny=self.radny, tresc="Pierwszy")
+		drugi = Wniosek.objects.create(radny=self.radny, tresc="Drugi")
+
+		self.assertEqual(pierwszy.sygnatura, f"W/{rok}/0001")
+		self.assertEqual(drugi.sygnatura, f"W/{rok}/0002")
+		self.assertEqual(LicznikSygnatur.objects.get(rodzaj="W", rok=rok).ostatni, 2)
+		self.assertEqual(LicznikSygnatur.sygnatura("W", rok - 1), f"W/{rok - 1}/0001")
+
+	def test_explicit_signature_is_kept(self):
+		wniosek = Wniosek.objects.create(radny=self.radny, tresc="Import", sygnatura="W/2019/0042")
+		self.assertEqual(wniosek.sygnatura, "W/2019/0042")
+		self.assertFalse(LicznikSygnatur.objects.exists())
+
+
+class SygnaturyWnioskowWspolbieznieTests(TransactionTestCase):
+	def test_parallel_submissions_get_unique_signatures(self):
+		radny = Uzytkownik.objects.create_user(
+			username="radny_wspolbieznie",
+			password="test12345",
+			rola="radny",
+			imie="Wiktor",
+			nazwisko="Równoległy",
+		)
+		liczba = 8
+		start = threading.Barrier(liczba)
+		bledy = []
+
+		def zloz(i):
+			try:
+				start.wait()
+				# bez ponawiania: blokady rozstrzyga busy timeout bazy, a licznik nie może dać duplikatu
+				Wniosek.objects.create(radny=radny, tresc=f"Wniosek {i}")
+			except Exception as exc:
+				bledy.append(f"wątek {i}: {exc!r}")
+			finally:
+				close_old_connections()
+
+		watki = [threading.Thread(target=zloz, args=(i,)) for i in range(liczba)]
+		for w in watki:
+			w.start()
+		for w in watki:
+			w.join()
+
+		self.assertEqual(bledy, [])
+		sygnatury = list(Wniosek.objects.values_list("sygnatura", flat=True))
+		self.assertEqual(len(sygnatury), liczba)
+		self.assertEqual(len(set(sygnatury)), liczba)
+		rok = timezone.localdate().year
+		self.assertEqual(sorted(sygnatury), [f"W/{rok}/{n:04d}" for n in range(1, liczba + 1)])
+
+
+class WyszukiwanieTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.radny = Uzytkownik.objects.create_user(
+			username="radny_szukaj",
+			password="test12345",
+			rola="radny",
+			imie="Stefan",
+			nazwisko="Szukający",
+		)
+		cls.inny_radny = Uzytkownik.objects.create_user(
+			username="radny_szukaj_inny",
+			password="test12345",
+			rola="radny",
+			imie="Irena",
+			nazwisko="Inna",
+		)
+		cls.prezydium = Uzytkownik.objects.create_user(
+			username="prezydium_szukaj",
+			password="test12345",
+			rola="prezydium",
+			imie="Paweł",
+			nazwisko="Przewodniczący",
+		)
+		cls.sesja = Sesja.objects.create(nazwa="Sesja wyszukiwania", data=timezone.now())
+		cls.punkt = PunktObrad.objects.create(sesja=cls.sesja, numer=1, tytul="Remont mostu w Łodzi", opis="Zażółć gęślą jaźń")
+		cls.podpunkt = PodpunktObrad.objects.create(punkt_nadrzedny=cls.punkt, numer=1, tytul="Kosztorys przęseł")
+		cls.wniosek = Wniosek.objects.create(radny=cls.radny, tresc="Wniosek o oświetlenie ulicy Źródlanej")
+		cls.wniosek_innego = Wniosek.objects.create(radny=cls.inny_radny, tresc="Oświetlenie parku miejskiego")
+		cls.komisja = Komisja.objects.create(nazwa="Komisja Budżetowa", przewodniczacy=cls.inny_radny)
+		cls.komisja_wniosek = KomisjaWniosek.objects.create(komisja=cls.komisja, autor=cls.inny_radny, tresc="Oświetlenie boiska szkolnego")
+
+	def _szukaj(self, user, q, **params):
+		self.client.force_login(user)
+		response = self.client.get(reverse("szukaj"), {"q": q, "format": "json", **params})
+		self.assertEqual(response.status_code, 200)
+		return {(w["rodzaj"], w["id"]) for w in response.json()["wyniki"]}
+
+	def test_diacritics_are_folded_in_text_and_query(self):
+		self.assertIn(("punkt", self.punkt.id), self._szukaj(self.prezydium, "zazolc gesla"))
+		self.assertIn(("punkt", self.punkt.id), self._szukaj(self.prezydium, "ŁÓDZI"))
+		self.assertIn(("podpunkt", self.podpunkt.id), self._szukaj(self.prezydium, "przesel"))
+		self.assertIn(("wniosek", self.wniosek.id), self._szukaj(self.prezydium, "zrodlan"))
+
+	def test_results_respect_visibility(self):
+		wyniki = self._szukaj(self.radny, "oswietlenie")
+		self.assertEqual(wyniki, {("wniosek", self.wniosek.id)})
+
+		wyniki = self._szukaj(self.inny_radny, "oswietlenie")
+		self.assertEqual(wyniki, {("wniosek", self.wniosek_innego.id), ("komisja_wniosek", self.komisja_wniosek.id)})
+
+		wyniki = self._szukaj(self.prezydium, "oswietlenie", rodzaj="wniosek")
+		self.assertEqual(wyniki, {("wniosek", self.wniosek.id), ("wniosek", self.wniosek_innego.id)})
+
+	def test_hidden_hits_do_not_crowd_out_visible_ones(self):
+		# cudze wnioski trafniejsze (wielokrotne wystąpienie słowa) niż własny
+		for i in range(10):
+			Wniosek.objects.create(radny=self.inny_radny, tresc=f"Latarnie, latarnie i jeszcze raz latarnie {i}")
+		wlasny = Wniosek.objects.create(radny=self.radny, tresc="Nowe latarnie przy szkole")
+
+		wyniki = szukaj("latarnie", {"wniosek": Wniosek.objects.filter(radny=self.radny)}, limit=2)
+		self.assertEqual([(r, o.id) for r, o in wyniki], [("wniosek", wlasny.id)])
+		self.assertEqual(self._szukaj(self.radny, "latarnie"), {("wniosek", wlasny.id)})
+
+	def test_index_follows_edits_and_deletes(self):
+		self.punkt.tytul = "Budowa kładki"
+		self.punkt.opis = ""
+		self.punkt.save()
+		self.assertNotIn(("punkt", self.punkt.id), self._szukaj(self.prezydium, "mostu"))
+		self.assertIn(("punkt", self.punkt.id), self._szukaj(self.prezydium, "kladki"))
+
+		self.punkt.delete()
+		self.assertEqual(self._szukaj(self.prezydium, "kladki"), set())
+		self.assertEqual(self._szukaj(self.prezydium, "kosztorys"), set())
+
+	def test_saving_non_text_fields_skips_reindexing(self):
+		self.punkt.aktywny = True
+		with self.assertNumQueries(1):
+			self.punkt.save(update_fields=["aktywny"])
+		self.assertTrue(IndeksWyszukiwania.objects.filter(rodzaj="punkt", obiekt_id=self.punkt.id).exists())
+
+	def test_rebuild_command_restores_index(self):
+		IndeksWyszukiwania.objects.all().delete()
+		self.assertEqual(self._szukaj(self.prezydium, "mostu"), set())
+		call_command("przebuduj_indeks_wyszukiwania", stdout=io.StringIO())
+		self.assertIn(("punkt", self.punkt.id), self._szukaj(self.prezydium, "mostu"))
+
+	def test_html_page_renders_results(self):
+		self.client.force_login(self.prezydium)
+		response = self.client.get(reverse("szukaj"), {"q": "most"})
+		self.assertContains(response, "Remont mostu w Łodzi")
+
+
+class StronicowanieKluczoweTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.prezydium = Uzytkownik.objects.create_user(
+			username="prezydium_strony",
+			password="test12345",
+			rola="prezydium",
+			imie="Stanisław",
+			nazwisko="Stronicowy",
+		)
+		start = timezone.now()
+		# po dwie sesje na ten sam termin – kolejność rozstrzyga id
+		cls.sesje = [
+			Sesja.objects.create(nazwa=f"Sesja {i}", data=start + timedelta(days=i // 2), aktywna=False)
+			for i in range(7)
+		]
+
+	def _oczekiwane_malejaco(self):
+		return [s.id for s in sorted(self.sesje, key=lambda s: (s.data, s.id), reverse=True)]
+
+	def test_walks_forward_and_back_without_gaps(self):
+		qs = Sesja.objects.all()
+		widziane = []
+		strony = []
+		kursor = None
+		while True:
+			s = strona(qs, po=kursor, na_stronie=3)
+			strony.append([o.id for o in s])
+			widziane.extend(o.id for o in s)
+			if not s.ma_nastepna:
+				break
+			kursor = s.nastepna
+		self.assertEqual(widziane, self._oczekiwane_malejaco())
+		self.assertEqual([len(x) for x in strony], [3, 3, 1])
+
+		wstecz = strona(qs, przed=s.poprzednia, na_stronie=3)
+		self.assertEqual([o.id for o in wstecz], strony[1])
+		self.assertTrue(wstecz.ma_poprzednia)
+		self.assertEqual([o.id for o in strona(qs, przed=wstecz.poprzednia, na_stronie=3)], strony[0])
+
+	def test_ascending_order_and_invalid_cursor(self):
+		rosnaco = strona(Sesja.objects.all(), na_stronie=10, malejaco=False)
+		self.assertEqual([o.id for o in rosnaco], list(reversed(self._oczekiwane_malejaco())))
+		self.assertFalse(rosnaco.ma_nastepna)
+
+		zly = strona(Sesja.objects.all(), po="nie-kursor", na_stronie=2)
+		self.assertEqual([o.id for o in zly], self._oczekiwane_malejaco()[:2])
+
+	def test_json_variant_supports_infinite_scroll_with_constant_queries(self):
+		self.client.force_login(self.prezydium)
+		url = reverse("prezydium_sesje") + "?format=json&na_stronie=2"
+		widziane = []
+		liczby_zapytan = []
+		while url:
+			with CaptureQueriesContext(connection) as ctx:
+				dane = self.client.get(url).json()
+			liczby_zapytan.append(len(ctx))
+			widziane.extend(w["id"] for w in dane["wyniki"])
+			url = dane["nastepna"]
+
+		self.assertEqual(widziane, self._oczekiwane_malejaco())
+		self.assertEqual(len(set(liczby_zapytan)), 1)
+
+	def test_html_lists_render_navigation(self):
+		self.client.force_login(self.prezydium)
+		for name in ("prezydium_sesje", "prezydium", "nadchodzace_sesje_prezidium"):
+			response = self.client.get(reverse(name), {"na_stronie": 2})
+			self.assertEqual(response.status_code, 200)
+			self.assertEqual(len(response.context["strona"]), 2)
+			self.assertContains(response, "po=")
+
+	def test_upcoming_list_starts_at_next_session(self):
+		for i in range(5):
+			Sesja.objects.create(nazwa=f"Sesja archiwalna {i}", data=timezone.now() - timedelta(days=30 + i), aktywna=False)
+		najblizsza = min((s for s in self.sesje if s.data >= timezone.now()), key=lambda s: (s.data, s.id))
+
+		self.client.force_login(self.prezydium)
+		dane = self.client.get(reverse("nadchodzace_sesje_prezidium"), {"format": "json", "na_stronie": 2}).json()
+		self.assertEqual(dane["wyniki"][0]["id"], najblizsza.id)
+		self.assertNotIn("archiwalna", " ".join(w["nazwa"] for w in dane["wyniki"]))
+
+	def test_motion_lists_are_paginated(self):
+		komisja = Komisja.objects.create(nazwa="Komisja Rewizyjna", przewodniczacy=self.prezydium)
+		for i in range(3):
+			Wniosek.objects.create(radny=self.prezydium, tresc=f"Wniosek {i}")
+			KomisjaWniosek.objects.create(komisja=komisja, autor=self.prezydium, tresc=f"Postulat {i}")
+
+		self.client.force_login(self.prezydium)
+		for url in (
+			reverse("wnioski_radny"),
+			reverse("komisja_wnioski", args=[komisja.id]),
+			reverse("komisja_skrzynka_rady"),
+		):
+			dane = self.client.get(url, {"format": "json", "na_stronie": 2}).json()
+			self.assertEqual(len(dane["wyniki"]), 2)
+			self.assertIsNotNone(dane["nastepna"])
+			reszta = self.client.get(dane["nastepna"]).json()
+			self.assertEqual(len(reszta["wyniki"]), 1)
+			self.assertIsNone(reszta["nastepna"])
+
+
+class ZbiorczeWnioskiTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.prezydium = Uzytkownik.objects.create_user(
+			username="prezydium_zbiorczo",
+			password="test12345",
+			rola="prezydium",
+			imie="Zbigniew",
+			nazwisko="Zbiorczy",
+		)
+		cls.radny = Uzytkownik.objects.create_user(
+			username="radny_zbiorczo",
+			password="test12345",
+			rola="radny",
+			imie="Renata",
+			nazwisko="Wnioskodawczyni",
+		)
+		cls.wnioski = [Wniosek.objects.create(radny=cls.radny, tresc=f"Wniosek {i}") for i in range(5)]
+		cls.wnioski[0].zatwierdzony = True
+		cls.wnioski[0].save(update_fields=["zatwierdzony"])
+		komisja = Komisja.objects.create(nazwa="Komisja Oświaty", przewodniczacy=cls.radny)
+		cls.komisja_wnioski = [
+			KomisjaWniosek.objects.create(komisja=komisja, autor=cls.radny, tresc=f"Postulat {i}") for i in range(3)
+		]
+
+	def setUp(self):
+		self.client.force_login(self.prezydium)
+
+	def _post(self, url_name, akcja, ids):
+		return self.client.post(
+			reverse(url_name),
+			{"akcja": akcja, "ids": [str(i) for i in ids]},
+			HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+		)
+
+	def test_bulk_approve_uses_single_update(self):
+		ids = [w.id for w in self.wnioski] + [999999]
+		with CaptureQueriesContext(connection) as ctx:
+			response = self._post("wnioski_zbiorczo", "zatwierdz", ids)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(
+			response.json(),
+			{"akcja": "zatwierdz", "wybrano": 6, "zmieniono": 4, "bez_zmian": 1, "nie_znaleziono": 1},
+		)
+		self.assertEqual([q["sql"].startswith("UPDATE") for q in ctx.captured_queries].count(True), 1)
+		self.assertEqual(Wniosek.objects.filter(zatwierdzony=True).count(), 5)
+
+		response = self._post("wnioski_zbiorczo", "odrzuc", ids[:2])
+		self.assertEqual(response.json()["zmieniono"], 2)
+		self.assertEqual(Wniosek.objects.filter(zatwierdzony=True).count(), 3)
+
+	def test_bulk_send_committee_motions_and_skip_sent_on_reject(self):
+		ids = [w.id for w in self.komisja_wnioski]
+		response = self._post("komisja_wnioski_zbiorczo", "wyslij", ids[:2])
+		self.assertEqual(response.json()["zmieniono"], 2)
+
+		for w in self.komisja_wnioski:
+			w.refresh_from_db()
+		self.assertTrue(all(w.wyslany_do_rady and w.data_wyslania for w in self.komisja_wnioski[:2]))
+		self.assertFalse(self.komisja_wnioski[2].wyslany_do_rady)
+
+		self._post("komisja_wnioski_zbiorczo", "zatwierdz", ids)
+		response = self._post("komisja_wnioski_zbiorczo", "odrzuc", ids)
+		self.assertEqual(response.json()["zmieniono"], 1)
+		self.assertEqual(response.json()["bez_zmian"], 2)
+
+	def test_bulk_send_keeps_earlier_approval_date(self):
+		wczesniej = timezone.now() - timedelta(days=3)
+		zatwierdzony = self.komisja_wnioski[0]
+		zatwierdzony.zatwierdzony_przez_prezydium = True
+		zatwierdzony.data_zatwierdzenia = wczesniej
+		zatwierdzony.save(update_fields=["zatwierdzony_przez_prezydium", "data_zatwierdzenia"])
+
+		response = self._post("komisja_wnioski_zbiorczo", "wyslij", [w.id for w in self.komisja_wnioski[:2]])
+		self.assertEqual(response.json()["zmieniono"], 2)
+		zatwierdzony.refresh_from_db()
+		nowy = KomisjaWniosek.objects.get(id=self.komisja_wnioski[1].id)
+		self.assertEqual(zatwierdzony.data_zatwierdzenia, wczesniej)
+		self.assertTrue(zatwierdzony.wyslany_do_rady)
+		self.assertGreater(nowy.data_zatwierdzenia, wczesniej)
+
+	def test_form_submission_redirects_with_message(self):
+		response = self.client.post(reverse("wnioski_zbiorczo"), {"akcja": "zatwierdz", "ids": f"{self.wnioski[1].id},{self.wnioski[2].id}"})
+		self.assertRedirects(response, reverse("wnioski_prezidium"))
+
+	def test_invalid_form_submission_redirects_with_error(self):
+		response = self.client.post(reverse("wnioski_zbiorczo"), {"akcja": "zatwierdz"})
+		self.assertRedirects(response, reverse("wnioski_prezidium"))
+		self.assertIn("Wybierz wnioski", " ".join(str(m) for m in get_messages(response.wsgi_request)))
+
+		response = self.client.post(reverse("komisja_wnioski_zbiorczo"), {"akcja": "usun", "ids": str(self.komisja_wnioski[0].id)})
+		self.assertRedirects(response, reverse("komisja_skrzynka_rady"))
+
+	def test_invalid_input_and_permissions(self):
+		self.assertEqual(self._post("wnioski_zbiorczo", "usun", [self.wnioski[0].id]).status_code, 400)
+		self.assertEqual(self._post("wnioski_zbiorczo", "zatwierdz", []).status_code, 400)
+		response = self.client.post(
+			reverse("wnioski_zbiorczo"), {"akcja": "zatwierdz", "ids": "1,x"}, HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+		)
+		self.assertEqual(response.status_code, 400)
+
+		self.client.force_login(self.radny)
+		self.assertEqual(self._post("komisja_wnioski_zbiorczo", "wyslij", [self.komisja_wnioski[0].id]).status_code, 403)
+
+
+class CzlonkostwoKomisjiCacheTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.admin = Uzytkownik.objects.create_user(
+			username="admin_czlonkostwo",
+			password="test12345",
+			rola="administrator",
+			imie="Adam",
+			nazwisko="Administrator",
+		)
+		cls.przewodniczacy = Uzytkownik.objects.create_user(
+			username="przew_czlonkostwo",
+			password="test12345",
+			rola="radny",
+			imie="Cezary",
+			nazwisko="Przewodniczący",
+		)
+		cls.radny = Uzytkownik.objects.create_user(
+			username="radny_czlonkostwo",
+			password="test12345",
+			rola="radny",
+			imie="Celina",
+			nazwisko="Członkini",
+		)
+		cls.komisja = Komisja.objects.create(nazwa="Komisja Rolnictwa", przewodniczacy=cls.przewodniczacy)
+
+	def setUp(self):
+		# cache przeżywa wycofanie transakcji testu – zaczynamy od czystego stanu
+		cache.clear()
+
+	def _nowy_obiekt(self, user):
+		# jak request.user w kolejnym żądaniu: nowy obiekt, bez zapamiętanego wyniku
+		return Uzytkownik(id=user.id, username=user.username, rola=user.rola)
+
+	def test_membership_set_is_cached_between_requests(self):
+		with self.assertNumQueries(1):
+			self.assertEqual(komisje_uzytkownika(self._nowy_obiekt(self.przewodniczacy)), {self.komisja.id})
+		with self.assertNumQueries(0):
+			self.assertEqual(komisje_uzytkownika(self._nowy_obiekt(self.przewodniczacy)), {self.komisja.id})
+
+	def test_adding_and_removing_member_invalidates_cache(self):
+		url = reverse("komisja_szczegoly", args=[self.komisja.id])
+		self.client.force_login(self.radny)
+		self.assertEqual(self.client.get(url).status_code, 403)
+
+		self.client.force_login(self.przewodniczacy)
+		self.client.post(reverse("komisja_dodaj_czlonka", args=[self.komisja.id]), {"radny_id": self.radny.id})
+		self.client.force_login(self.radny)
+		self.assertEqual(self.client.get(url).status_code, 200)
+
+		self.client.force_login(self.przewodniczacy)
+		self.client.post(reverse("komisja_usun_czlonka", args=[self.komisja.id, self.radny.id]))
+		self.client.force_login(self.radny)
+		self.assertEqual(self.client.get(url).status_code, 403)
+
+	def test_new_committee_is_listed_for_its_chair(self):
+		self.client.force_login(self.radny)
+		self.assertEqual(list(self.client.get(reverse("komisje_moje")).context["komisje"]), [])
+
+		self.client.force_login(self.admin)
+		self.client.post(reverse("komisja_utworz"), {"nazwa": "Komisja Sportu", "przewodniczacy": self.radny.id})
+
+		self.client.force_login(self.radny)
+		nazwy = [k.nazwa for k in self.client.get(reverse("komisje_moje")).context["komisje"]]
+		self.assertEqual(nazwy, ["Komisja Sportu"])
+
+
+class OdczytyBezZapisuTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.prezydium = Uzytkownik.objects.create_user(
+			username="prezydium_odczyty",
+			password="test12345",
+			rola="prezydium",
+			imie="Olgierd",
+			nazwisko="Odczytowy",
+		)
+		cls.sesja = Sesja.objects.create(
+			nazwa="Sesja z przerwą",
+			data=timezone.now(),
+			aktywna=True,
+			przerwa_start=timezone.now() - timedelta(minutes=30),
+			przerwa_czas=600,
+		)
+		punkt = PunktObrad.objects.create(sesja=cls.sesja, numer=1, tytul="Sprawozdanie", aktywny=True)
+		# aktywny podpunkt bez wskaźnika w sesji – dawniej GET uzupełniał go zapisem
+		cls.podpunkt = PodpunktObrad.objects.create(punkt_nadrzedny=punkt, numer=1, tytul="Część A", aktywny=True)
+
+		cls.komisja = Komisja.objects.create(nazwa="Komisja Ekranowa", przewodniczacy=cls.prezydium)
+		cls.komisja_sesja = KomisjaSesja.objects.create(komisja=cls.komisja, nazwa="Posiedzenie")
+		cls.komisja_punkt = KomisjaPunktObrad.objects.create(sesja=cls.komisja_sesja, numer=1, tytul="Opinia", aktywny=True)
+
+	def setUp(self):
+		self.client.force_login(self.prezydium)
+
+	def _zapisy(self, url):
+		with CaptureQueriesContext(connection) as ctx:
+			response = self.client.get(url)
+		self.assertEqual(response.status_code, 200)
+		return [
+			q["sql"] for q in ctx.captured_queries
+			if q["sql"].lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE", "REPLACE"))
+		], response
+
+	def test_polling_and_screen_views_do_not_write(self):
+		for url in (
+			reverse("api_aktywny_punkt", args=[self.sesja.id]),
+			reverse("api_komisja_aktywny_punkt", args=[self.komisja_sesja.id]),
+			reverse("sesja_ekran", args=[self.sesja.id]),
+			reverse("sesja_edytuj", args=[self.sesja.id]),
+		):
+			with self.subTest(url=url):
+				zapisy, _ = self._zapisy(url)
+				self.assertEqual(zapisy, [])
+
+	def test_active_item_is_computed_without_pointer(self):
+		_, response = self._zapisy(reverse("api_aktywny_punkt", args=[self.sesja.id]))
+		self.assertEqual(response.json()["podpunkt_id"], self.podpunkt.id)
+		_, response = self._zapisy(reverse("api_komisja_aktywny_punkt", args=[self.komisja_sesja.id]))
+		self.assertEqual(response.json()["punkt_id"], self.komisja_punkt.id)
+
+	def test_expired_break_is_reported_as_over(self):
+		_, response = self._zapisy(reverse("sesja_ekran", args=[self.sesja.id]))
+		self.assertFalse(response.context["przerwa_trwa"])
+		self.assertEqual(response.context["przerwa_pozostalo"], 0)
+
+		self.sesja.refresh_from_db()
+		self.assertIsNotNone(self.sesja.przerwa_start)
+
+	def test_break_state_is_pure_computation(self):
+		sesja = Sesja(przerwa_start=timezone.now(), przerwa_czas=300)
+		self.assertEqual(sesja.stan_przerwy(teraz=sesja.przerwa_start + timedelta(seconds=100)), (True, 200))
+		self.assertEqual(sesja.stan_przerwy(teraz=sesja.przerwa_start + timedelta(seconds=300)), (False, 0))
+		self.assertEqual(Sesja().stan_przerwy(), (False, 0))
+
+	def test_reconciliation_command_clears_break_and_sets_pointers(self):
+		call_command("uzgodnij_stan_sesji", stdout=io.StringIO())
+
+		self.sesja.refresh_from_db()
+		self.komisja_sesja.refresh_from_db()
+		self.assertIsNone(self.sesja.przerwa_start)
+		self.assertIsNone(self.sesja.przerwa_czas)
+		self.assertEqual(self.sesja.aktywny_podpunkt_id, self.podpunkt.id)
+		self.assertEqual(self.komisja_sesja.aktywny_punkt_id, self.komisja_punkt.id)
+
+	def test_write_path_clears_expired_break(self):
+		self.client.post(reverse("sesja_edytuj", args=[self.sesja.id]), {"zapisz_obecnosc": "1"})
+		self.sesja.refresh_from_db()
+		self.assertIsNone(self.sesja.przerwa_start)
+
+
+class _KlientRedisZastepczy:
+	"""Minimalny zastępnik klienta redis-py: bajty na wyjściu, atomowy INCR."""
+
+	def __init__(self):
+		self.dane = {}
+		self.lock = threading.Lock()
+
+	def get(self, klucz):
+		with self.lock:
+			return self.dane.get(klucz)
+
+	def set(self, klucz, wartosc):
+		with self.lock:
+			self.dane[klucz] = wartosc.encode() if isinstance(wartosc, str) else wartosc
+
+	def delete(self, klucz):
+		with self.lock:
+			self.dane.pop(klucz, None)
+
+	def incr(self, klucz):
+		with self.lock:
+			wartosc = int(self.dane.get(klucz, b"0")) + 1
+			self.dane[klucz] = str(wartosc).encode()
+			return wartosc
+
+	def eval(self, skrypt, liczba_kluczy, klucz, dane):
+		# odpowiednik skryptu Lua RedisBackend.ustaw_wersjonowane, wykonany pod jedną blokadą
+		with self.lock:
+			poprzednia = self.dane.get(klucz)
+			wersja = (json.loads(poprzednia).get("wersja", 0) if poprzednia else 0) + 1
+			self.dane[klucz] = json.dumps({**json.loads(dane), "wersja": wersja}).encode()
+			return wersja
+
+
+class StanWspolnyTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.admin = Uzytkownik.objects.create_user(
+			username="admin_stan",
+			password="test12345",
+			rola="administrator",
+			imie="Adam",
+			nazwisko="Administrator",
+		)
+		cls.sesja = Sesja.objects.create(nazwa="Sesja stanu", data=timezone.now(), aktywna=True)
+
+	def setUp(self):
+		katalog = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, katalog, ignore_errors=True)
+		self.sciezka = f"{katalog}/stan.sqlite3"
+		ustawienia = override_settings(STAN_WSPOLNY_BACKEND="sqlite", STAN_WSPOLNY_SCIEZKA=self.sciezka)
+		ustawienia.enable()
+		self.addCleanup(ustawienia.disable)
+
+	def test_sqlite_backend_is_shared_between_worker_processes(self):
+		skrypt = (
+			"import sys\n"
+			"from core.stan_wspolny import SqliteBackend\n"
+			"b = SqliteBackend(sys.argv[1])\n"
+			"for _ in range(25):\n"
+			"    b.incr('licznik')\n"
+			"b.set('worker:' + sys.argv[2], {'nr': int(sys.argv[2])})\n"
+		)
+		workery = [
+			subprocess.Popen([sys.executable, "-c", skrypt, self.sciezka, str(nr)], cwd=settings.BASE_DIR)
+			for nr in range(4)
+		]
+		for worker in workery:
+			self.assertEqual(worker.wait(timeout=60), 0)
+
+		backend = SqliteBackend(self.sciezka)
+		self.assertEqual(backend.get("licznik"), 100)
+		for nr in range(4):
+			self.assertEqual(backend.get(f"worker:{nr}"), {"nr": nr})
+
+	def test_komunikat_set_in_one_worker_is_seen_by_another(self):
+		kanal = kanal_komunikatu(self.sesja)
+		self.client.force_login(self.admin)
+		self.client.post(reverse("ekran_komunikat"), {"sesja": self.sesja.id, "komunikat": "Przerwa do 12:00"})
+
+		# drugi „worker”: osobne połączenie, bez wspólnej pamięci procesu
+		inny_worker = SqliteBackend(self.sciezka)
+		self.assertEqual(inny_worker.get(kanal)["tekst"], "Przerwa do 12:00")
+
+		inny_worker.set(kanal, {"tekst": "Wznowienie obrad", "wersja": 7})
+		response = self.client.get(reverse("api_ekran_komunikat"), {"sesja": self.sesja.id})
+		self.assertEqual(response.json()["komunikat"], "Wznowienie obrad")
+		response = self.client.get(reverse("sesja_ekran", args=[self.sesja.id]))
+		self.assertEqual(response.context["komunikat"], "Wznowienie obrad")
+
+		self.client.post(f"{reverse('api_ekran_komunikat_clear')}?sesja={self.sesja.id}")
+		self.assertEqual(inny_worker.get(kanal)["tekst"], "")
+
+	def test_membership_version_bump_is_visible_to_other_workers(self):
+		inny_worker = SqliteBackend(self.sciezka)
+		przed = inny_worker.get(czlonkostwo.WERSJA_KEY, 0)
+		Komisja.objects.create(nazwa="Komisja Stanu", przewodniczacy=self.admin)
+		self.assertGreater(inny_worker.get(czlonkostwo.WERSJA_KEY), przed)
+
+	def test_redis_backend_with_compatible_client(self):
+		klient = _KlientRedisZastepczy()
+		workery = [RedisBackend(klient=klient) for _ in range(4)]
+		watki = [
+			threading.Thread(target=lambda b=b: [b.incr("wersja") for _ in range(50)])
+			for b in workery
+		]
+		for watek in watki:
+			watek.start()
+		for watek in watki:
+			watek.join()
+
+		self.assertEqual(workery[0].get("wersja"), 200)
+		workery[1].set("komunikat", "Głosowanie za chwilę")
+		self.assertEqual(workery[2].get("komunikat"), "Głosowanie za chwilę")
+		workery[3].delete("komunikat")
+		self.assertIsNone(workery[0].get("komunikat"))
+		self.assertIn("esir:wersja", klient.dane)
+
+	def test_concurrent_messages_keep_text_and_version_together(self):
+		with tempfile.TemporaryDirectory() as katalog:
+			backendy = {
+				"pamiec": PamiecBackend(),
+				"sqlite": SqliteBackend(f"{katalog}/stan.sqlite3"),
+				"redis": RedisBackend(klient=_KlientRedisZastepczy()),
+			}
+			for nazwa, backend in backendy.items():
+				with self.subTest(backend=nazwa):
+					wersje = []
+
+					def ustaw(i, backend=backend):
+						for j in range(20):
+							wersje.append(backend.ustaw_wersjonowane("komunikat:sesja:1", {"tekst": f"{i}-{j}"}))
+
+					watki = [threading.Thread(target=ustaw, args=(i,)) for i in range(4)]
+					for watek in watki:
+						watek.start()
+					for watek in watki:
+						watek.join()
+
+					self.assertEqual(sorted(wersje), list(range(1, 81)))
+					zapisany = backend.get("komunikat:sesja:1")
+					self.assertEqual(zapisany["wersja"], 80)
+					self.assertRegex(zapisany["tekst"], r"^\d-\d+$")
+
+	def test_default_backend_for_in_memory_database_is_process_local(self):
+		# baza testowa jest plikiem (busy timeout), więc bazę w pamięci symulujemy
+		with mock.patch.object(connection, "is_in_memory_db", return_value=True), override_settings(
+			STAN_WSPOLNY_SCIEZKA=None, STAN_WSPOLNY_BACKEND=None
+		):
+			self.assertIsInstance(stan_wspolny.stan(), stan_wspolny.PamiecBackend)
+
+
+@override_settings(STAN_WSPOLNY_BACKEND="pamiec")
+class KomunikatSesjiTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.admin = Uzytkownik.objects.create_user(
+			username="admin_komunikat",
+			password="test12345",
+			rola="administrator",
+			imie="Adam",
+			nazwisko="Administrator",
+		)
+		cls.przewodniczacy = Uzytkownik.objects.create_user(
+			username="przew_komunikat",
+			password="test12345",
+			rola="radny",
+			imie="Paweł",
+			nazwisko="Przewodniczący",
+		)
+		cls.radny = Uzytkownik.objects.create_user(
+			username="radny_komunikat",
+			password="test12345",
+			rola="radny",
+			imie="Jan",
+			nazwisko="Radny",
+		)
+		cls.sesja = Sesja.objects.create(nazwa="Sesja A", data=timezone.now(), aktywna=True)
+		cls.inna_sesja = Sesja.objects.create(nazwa="Sesja B", data=timezone.now(), aktywna=False)
+		cls.komisja = Komisja.objects.create(nazwa="Komisja Budżetu", przewodniczacy=cls.przewodniczacy)
+		cls.komisja_sesja = KomisjaSesja.objects.create(komisja=cls.komisja, nazwa="Posiedzenie", data=timezone.now())
+
+	def _wersja_w_stanie(self, url):
+		return self.client.get(url).json()["komunikat_wersja"]
+
+	def test_messages_are_scoped_per_session(self):
+		self.client.force_login(self.admin)
+		self.client.post(reverse("ekran_komunikat"), {"sesja": self.sesja.id, "komunikat": "Tylko rada"})
+		self.client.post(reverse("ekran_komunikat"), {"komisja_sesja": self.komisja_sesja.id, "komunikat": "Tylko komisja"})
+
+		api = reverse("api_ekran_komunikat")
+		self.assertEqual(self.client.get(api, {"sesja": self.sesja.id}).json()["komunikat"], "Tylko rada")
+		self.assertEqual(self.client.get(api, {"sesja": self.inna_sesja.id}).json()["komunikat"], "")
+		self.assertEqual(self.client.get(api, {"komisja_sesja": self.komisja_sesja.id}).json()["komunikat"], "Tylko komisja")
+		# bez parametru: aktywna sesja rady
+		self.assertEqual(self.client.get(api).json()["komunikat"], "Tylko rada")
+
+	def test_state_snapshot_carries_message_version(self):
+		url = reverse("api_aktywny_punkt", args=[self.sesja.id])
+		url_komisji = reverse("api_komisja_aktywny_punkt", args=[self.komisja_sesja.id])
+		przed = self._wersja_w_stanie(url)
+		przed_komisji = self._wersja_w_stanie(url_komisji)
+
+		self.client.force_login(self.admin)
+		self.client.post(reverse("ekran_komunikat"), {"sesja": self.sesja.id, "komunikat": "Przerwa"})
+		self.assertEqual(self._wersja_w_stanie(url), przed + 1)
+		self.assertEqual(self._wersja_w_stanie(url_komisji), przed_komisji)
+
+		response = self.client.post(f"{reverse('api_ekran_komunikat_clear')}?sesja={self.sesja.id}")
+		self.assertEqual(response.json()["wersja"], przed + 2)
+		self.assertEqual(self._wersja_w_stanie(url), przed + 2)
+
+	def test_screen_gets_channel_urls(self):
+		self.client.force_login(self.przewodniczacy)
+		response = self.client.get(reverse("komisja_sesja_ekran", args=[self.komisja.id, self.komisja_sesja.id]))
+		self.assertEqual(response.context["api_komunikat_url"], f"{reverse('api_ekran_komunikat')}?komisja_sesja={self.komisja_sesja.id}")
+
+	def test_committee_chair_can_set_only_own_committee_message(self):
+		self.client.force_login(self.przewodniczacy)
+		self.client.post(reverse("ekran_komunikat"), {"komisja_sesja": self.komisja_sesja.id, "komunikat": "Głosujemy"})
+		response = self.client.get(reverse("api_ekran_komunikat"), {"komisja_sesja": self.komisja_sesja.id})
+		self.assertEqual(response.json()["komunikat"], "Głosujemy")
+
+		response = self.client.post(reverse("ekran_komunikat"), {"sesja": self.sesja.id, "komunikat": "Nie wolno"})
+		self.assertRedirects(response, reverse("radny"), fetch_redirect_response=False)
+
+		self.client.force_login(self.radny)
+		response = self.client.post(f"{reverse('api_ekran_komunikat_clear')}?komisja_sesja={self.komisja_sesja.id}")
+		self.assertEqual(response.status_code, 403)
+
+
+class TokenEkranuTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.admin = Uzytkownik.objects.create_user(
+			username="admin_token",
+			password="test12345",
+			rola="administrator",
+			imie="Adam",
+			nazwisko="Administrator",
+		)
+		cls.przewodniczacy = Uzytkownik.objects.create_user(
+			username="przew_token",
+			password="test12345",
+			rola="radny",
+			imie="Paweł",
+			nazwisko="Przewodniczący",
+		)
+		cls.sesja = Sesja.objects.create(nazwa="Sesja z rzutnikiem", data=timezone.now(), aktywna=True)
+		cls.inna_sesja = Sesja.objects.create(nazwa="Inna sesja", data=timezone.now(), aktywna=False)
+		cls.punkt = PunktObrad.objects.create(sesja=cls.sesja, numer=1, tytul="Budżet", aktywny=True)
+		cls.glosowanie = Glosowanie.objects.create(punkt_obrad=cls.punkt, nazwa="Uchwała budżetowa", jawnosc="jawne")
+		cls.komisja = Komisja.objects.create(nazwa="Komisja Rewizyjna", przewodniczacy=cls.przewodniczacy)
+		cls.komisja_sesja = KomisjaSesja.objects.create(komisja=cls.komisja, nazwa="Posiedzenie", data=timezone.now())
+
+	def _zapytania_o_sesje_i_uzytkownika(self, url):
+		with CaptureQueriesContext(connection) as ctx:
+			response = self.client.get(url)
+		return response, [
+			q["sql"] for q in ctx.captured_queries
+			if "django_session" in q["sql"] or "accounts_uzytkownik" in q["sql"]
+		]
+
+	def test_button_mints_link_that_opens_screen_without_login(self):
+		self.client.force_login(self.admin)
+		response = self.client.post(reverse("sesja_ekran_token_wystaw", args=[self.sesja.id]))
+		self.assertRedirects(response, reverse("prezydium_agenda"), fetch_redirect_response=False)
+		tekst = [str(m) for m in get_messages(response.wsgi_request)][0]
+		url = tekst.split(": ", 1)[1].replace("http://testserver", "")
+
+		self.client.logout()
+		response = self.client.get(url)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.context["sesja"], self.sesja)
+		self.assertFalse(response.context["is_admin"])
+
+	def test_state_endpoints_with_token_skip_session_and_user(self):
+		token = wystaw(self.sesja)
+		# zalogowany rzutnik z ciasteczkiem sesji – z tokenem i tak nie czytamy sesji ani użytkownika
+		self.client.force_login(self.admin)
+		for url in (
+			reverse("sesja_ekran_token", args=[token]),
+			f"{reverse('api_aktywny_punkt', args=[self.sesja.id])}?token={token}",
+			f"{reverse('api_wyniki', args=[self.glosowanie.id])}?token={token}",
+		):
+			with self.subTest(url=url):
+				response, zapytania = self._zapytania_o_sesje_i_uzytkownika(url)
+				self.assertEqual(response.status_code, 200)
+				self.assertEqual(zapytania, [])
+
+	def test_token_is_scoped_to_one_session(self):
+		token = wystaw(self.inna_sesja)
+		response = self.client.get(reverse("api_aktywny_punkt", args=[self.sesja.id]), {"token": token})
+		self.assertEqual(response.status_code, 403)
+		response = self.client.get(reverse("api_komisja_aktywny_punkt", args=[self.inna_sesja.id]), {"token": token})
+		self.assertEqual(response.status_code, 403)
+
+		token_komisji = wystaw(self.komisja_sesja)
+		response = self.client.get(reverse("api_komisja_aktywny_punkt", args=[self.komisja_sesja.id]), {"token": token_komisji})
+		self.assertEqual(response.status_code, 200)
+
+	def test_expired_and_tampered_tokens_are_rejected(self):
+		wygasly = wystaw(self.sesja, godziny=-1)
+		self.assertEqual(self.client.get(reverse("sesja_ekran_token", args=[wygasly])).status_code, 403)
+		self.assertEqual(
+			self.client.get(reverse("api_aktywny_punkt", args=[self.sesja.id]), {"token": wygasly}).status_code,
+			403,
+		)
+		zmieniony = wystaw(self.sesja)[:-2] + "xx"
+		self.assertEqual(self.client.get(reverse("sesja_ekran_token", args=[zmieniony])).status_code, 403)
+
+	@override_settings(EKRAN_TYLKO_Z_TOKENEM=True)
+	def test_token_only_mode_requires_token_or_login(self):
+		url = reverse("api_aktywny_punkt", args=[self.sesja.id])
+		self.assertEqual(self.client.get(url).status_code, 403)
+		self.assertEqual(self.client.get(url, {"token": wystaw(self.sesja)}).status_code, 200)
+		self.client.force_login(self.admin)
+		self.assertEqual(self.client.get(url).status_code, 200)
+
+	def test_command_prints_screen_link(self):
+		out = io.StringIO()
+		call_command("wystaw_token_ekranu", komisja_sesja=self.komisja_sesja.id, stdout=out)
+		sciezka = out.getvalue().strip()
+		token = sciezka.rstrip("/").rsplit("/", 1)[1]
+		self.assertEqual(odczytaj(token), ("komisjasesja", self.komisja_sesja.id))
+		self.assertEqual(self.client.get(sciezka).status_code, 200)
+
+
+class OpisHtmlTests(TestCase):
+	def test_renders_paragraphs_lists_and_inline_markup(self):
+		html = opis_html("Wstęp **ważny**\ndruga linia\n\n- *pierwszy*\n• __drugi__\n\n<script>")
+		self.assertEqual(
+			html,
+			"<p>Wstęp <strong>ważny</strong><br>druga linia</p>"
+			"<ul><li><em>pierwszy</em></li><li><u>drugi</u></li></ul>"
+			"<p>&lt;script&gt;</p>",
+		)
+		self.assertEqual(opis_html(""), "")
+		self.assertEqual(opis_html(None), "")
+
+	def test_filter_and_screen_share_memoised_renderer(self):
+		_opis_html.cache_clear()
+		sesja = Sesja.objects.create(nazwa="Sesja opisu", data=timezone.now(), aktywna=True)
+		PunktObrad.objects.create(sesja=sesja, numer=1, tytul="Punkt", opis="- **A**\n- B", aktywny=True)
+
+		for _ in range(3):
+			response = self.client.get(reverse("api_aktywny_punkt", args=[sesja.id]))
+		self.assertEqual(response.json()["opis_html"], format_opis("- **A**\n- B"))
+		info = _opis_html.cache_info()
+		self.assertEqual(info.misses, 1)
+		self.assertEqual(info.hits, 3)
+
+
+class MetrykiTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.admin = Uzytkownik.objects.create_user(
+			username="admin_metryki",
+			password="test12345",
+			rola="administrator",
+			imie="Adam",
+			nazwisko="Administrator",
+		)
+		cls.prezydium = Uzytkownik.objects.create_user(
+			username="prezydium_metryki",
+			password="test12345",
+			rola="prezydium",
+			imie="Anna",
+			nazwisko="Prezydium",
+		)
+		cls.sesja = Sesja.objects.create(nazwa="Sesja metryk", data=timezone.now(), aktywna=True)
+		PunktObrad.objects.create(sesja=cls.sesja, numer=1, tytul="Punkt", aktywny=True)
+
+	def setUp(self):
+		rejestr.wyczysc()
+		self.addCleanup(rejestr.wyczysc)
+
+	def test_records_latency_and_queries_per_url_name(self):
+		for _ in range(3):
+			self.client.get(reverse("api_aktywny_punkt", args=[self.sesja.id]))
+
+		self.client.force_login(self.admin)
+		dane = self.client.get(reverse("metryki")).json()
+		widok = dane["widoki"]["api_aktywny_punkt"]
+		self.assertEqual(widok["liczba"], 3)
+		self.assertGreater(widok["zapytania_srednio"], 0)
+		self.assertGreaterEqual(widok["zapytania_max"], widok["zapytania_srednio"])
+		self.assertIsNotNone(widok["p95_ms"])
+
+	def test_prometheus_text_format(self):
+		self.client.get(reverse("api_aktywny_punkt", args=[self.sesja.id]))
+		self.client.force_login(self.admin)
+		response = self.client.get(reverse("metryki"), {"format": "prometheus"})
+		self.assertTrue(response["Content-Type"].startswith("text/plain"))
+		tekst = response.content.decode()
+		self.assertIn("# TYPE esir_request_duration_seconds histogram", tekst)
+		self.assertIn('esir_request_duration_seconds_count{view="api_aktywny_punkt"} 1', tekst)
+		self.assertIn('esir_sql_queries_total{view="api_aktywny_punkt"}', tekst)
+
+	def test_endpoint_is_admin_only(self):
+		self.client.force_login(self.prezydium)
+		self.assertEqual(self.client.get(reverse("metryki")).status_code, 403)
+
+	@override_settings(METRYKI_PROBKOWANIE=0)
+	def test_sampling_off_records_nothing(self):
+		self.client.get(reverse("api_aktywny_punkt", args=[self.sesja.id]))
+		self.assertEqual(rejestr.calkowite(), {})
+
+	def test_rolling_window_drops_old_slices(self):
+		rejestr = Rejestr(okno_s=120, szczelina_s=60)
+		rejestr.zapisz("api_wyniki", 30, 2, 1.0, teraz=1000)
+		rejestr.zapisz("api_wyniki", 700, 5, 3.0, teraz=1300)
+		okno = rejestr.okno(teraz=1300)["api_wyniki"]
+		self.assertEqual(okno.liczba, 1)
+		self.assertEqual(okno.kwantyl(0.95), 1000)
+		self.assertEqual(rejestr.calkowite()["api_wyniki"].liczba, 2)
+
+
+class BudzetZapytanTests(TestCase):
+	"""Górne limity liczby zapytań SQL dla najczęściej odwiedzanych widoków.
+
+	Dane odpowiadają realnej sesji (40 radnych, 30 punktów z podpunktami,
+	głosowanie na kandydatów, komplet głosów), więc zapytanie N+1 w pętli
+	po radnych lub punktach przekroczy limit o dziesiątki zapytań.
+	"""
+
+	RADNYCH = 40
+	PUNKTOW = 30
+	PODPUNKTOW = 3
+
+	@classmethod
+	def setUpTestData(cls):
+		Uzytkownik.objects.bulk_create([
+			Uzytkownik(username=f"radny_budzet_{i:02d}", rola="radny", imie=f"Imię{i}", nazwisko=f"Nazwisko{i:02d}")
+			for i in range(cls.RADNYCH)
+		])
+		cls.radni = list(Uzytkownik.objects.filter(username__startswith="radny_budzet_").order_by("username"))
+		cls.radny = cls.radni[0]
+		cls.admin = Uzytkownik.objects.create_user(
+			username="admin_budzet", password="test12345", rola="administrator", imie="Adam", nazwisko="Administrator",
+		)
+		cls.prezydium = Uzytkownik.objects.create_user(
+			username="prezydium_budzet", password="test12345", rola="prezydium", imie="Anna", nazwisko="Prezydium",
+		)
+
+		cls.sesja = Sesja.objects.create(nazwa="Sesja budżetowa", data=timezone.now(), aktywna=True, opis="Opis **sesji**")
+		PunktObrad.objects.bulk_create([
+			PunktObrad(sesja=cls.sesja, numer=n, tytul=f"Punkt {n}", opis=f"- opis **{n}**\n- druga linia", aktywny=n == 1)
+			for n in range(1, cls.PUNKTOW + 1)
+		])
+		punkty = list(cls.sesja.punkty.order_by("numer"))
+		PodpunktObrad.objects.bulk_create([
+			PodpunktObrad(punkt_nadrzedny=p, numer=n, tytul=f"Podpunkt {p.numer}.{n}", opis="Opis podpunktu")
+			for p in punkty[1:]
+			for n in range(1, cls.PODPUNKTOW + 1)
+		])
+		Glosowanie.objects.bulk_create([
+			Glosowanie(punkt_obrad=p, nazwa=f"Uchwała {p.numer}", jawnosc="jawne", otwarte=p.numer == 1)
+			for p in punkty
+		])
+		cls.glosowanie = Glosowanie.objects.get(punkt_obrad=punkty[0])
+		cls.glosowanie_tajne = Glosowanie.objects.create(punkt_obrad=punkty[1], nazwa="Tajne", jawnosc="tajne")
+		cls.glosowanie_kandydaci = Glosowanie.objects.create(
+			punkt_obrad=punkty[2], nazwa="Wybór wiceprzewodniczącego", typ="kandydaci", jawnosc="tajne",
+		)
+		Kandydat.objects.bulk_create([
+			Kandydat(punkt_obrad=punkty[2], imie=f"Kandydat{i}", nazwisko=f"Nazwisko{i}") for i in range(4)
+		])
+		kandydaci = list(Kandydat.objects.filter(punkt_obrad=punkty[2]))
+		cls.glosowanie_kandydaci.kandydaci.set(kandydaci)
+
+		opcje = ("za", "przeciw", "wstrzymuje")
+		glosy = []
+		for g in Glosowanie.objects.filter(punkt_obrad__sesja=cls.sesja).exclude(typ="kandydaci"):
+			glosy.extend(Glos(glosowanie=g, uzytkownik=r, glos=opcje[i % 3]) for i, r in enumerate(cls.radni))
+		glosy.extend(
+			Glos(glosowanie=cls.glosowanie_kandydaci, uzytkownik=r, kandydat=kandydaci[i % len(kandydaci)])
+			for i, r in enumerate(cls.radni)
+		)
+		Glos.objects.bulk_create(glosy)
+		Obecnosc.objects.bulk_create([Obecnosc(sesja=cls.sesja, radny=r, obecny=i % 5 != 0) for i, r in enumerate(cls.radni)])
+
+		cls.przewodniczacy = cls.radni[1]
+		cls.komisja = Komisja.objects.create(nazwa="Komisja Budżetowa", przewodniczacy=cls.przewodniczacy)
+		cls.komisja.czlonkowie.set(cls.radni[:12])
+		cls.komisja_sesja = KomisjaSesja.objects.create(komisja=cls.komisja, nazwa="Posiedzenie", data=timezone.now())
+		KomisjaPunktObrad.objects.bulk_create([
+			KomisjaPunktObrad(sesja=cls.komisja_sesja, numer=n, tytul=f"Punkt komisji {n}", aktywny=n == 1)
+			for n in range(1, 16)
+		])
+		punkty_komisji = list(cls.komisja_sesja.punkty.order_by("numer"))
+		KomisjaPodpunktObrad.objects.bulk_create([
+			KomisjaPodpunktObrad(punkt_nadrzedny=p, numer=n, tytul=f"Podpunkt {p.numer}.{n}")
+			for p in punkty_komisji[1:]
+			for n in range(1, cls.PODPUNKTOW + 1)
+		])
+		KomisjaGlosowanie.objects.bulk_create([
+			KomisjaGlosowanie(punkt_obrad=p, nazwa=f"Opinia {p.numer}", otwarte=p.numer == 1) for p in punkty_komisji
+		])
+		cls.komisja_glosowanie = KomisjaGlosowanie.objects.get(punkt_obrad=punkty_komisji[0])
+		KomisjaGlos.objects.bulk_create([
+			KomisjaGlos(glosowanie=g, uzytkownik=r, glos=opcje[i % 3])
+			for g in KomisjaGlosowanie.objects.filter(punkt_obrad__sesja=cls.komisja_sesja)
+			for i, r in enumerate(cls.radni[:12])
+		])
+
+	def setUp(self):
+		cache.clear()
+
+	def _zapytania(self, url, user=None):
+		if user is None:
+			self.client.logout()
+		else:
+			self.client.force_login(user)
+		with CaptureQueriesContext(connection) as ctx:
+			response = self.client.get(url)
+		self.assertEqual(response.status_code, 200, url)
+		return ctx.captured_queries
+
+	def assertBudzet(self, url, limit, user=None):
+		zapytania = self._zapytania(url, user)
+		if len(zapytania) > limit:
+			lista = "\n".join(f"  {q['sql'][:160]}" for q in zapytania)
+			self.fail(f"{url}: {len(zapytania)} zapytań SQL (limit {limit}):\n{lista}")
+
+	# Limit = liczba zapytań zmierzona na danych z setUpTestData. Jeśli zmiana
+	# świadomie dokłada zapytanie, podnieś limit w tym samym commicie.
+	BUDZETY = {
+		"radny": 8,
+		"sesja_edytuj": 12,
+		"api_aktywny_punkt": 7,
+		"api_wyniki": 5,
+		"api_wyniki_kandydaci": 4,
+		"api_lista_glosow_jawne": 3,
+		"wyniki_publiczne": 6,
+		"prezydium_agenda": 5,
+		"obecnosci_prezidium": 6,
+		"komisja_szczegoly": 8,
+		"komisja_sesja_edytuj": 9,
+		"komisja_sesja_glosowania": 7,
+		"api_komisja_aktywny_punkt": 8,
+		"api_komisja_wyniki": 2,
+		"api_komisja_lista_glosow_jawne": 3,
+	}
+
+	def test_budzety_widokow(self):
+		widoki = self._widoki()
+		self.assertEqual({nazwa for nazwa, _, _ in widoki}, set(self.BUDZETY))
+		for nazwa, url, user in widoki:
+			with self.subTest(widok=nazwa):
+				self.assertBudzet(url, self.BUDZETY[nazwa], user)
+
+	def test_liczba_zapytan_nie_zalezy_od_liczby_radnych(self):
+		widoki = [w for w in self._widoki() if w[0] in ("obecnosci_prezidium", "api_lista_glosow_jawne", "wyniki_publiczne")]
+		przed = {nazwa: len(self._zapytania(url, user)) for nazwa, url, user in widoki}
+
+		nowi = Uzytkownik.objects.bulk_create([
+			Uzytkownik(username=f"radny_dodatkowy_{i:02d}", rola="radny", imie="Dodatkowy", nazwisko=f"Radny{i:02d}")
+			for i in range(20)
+		])
+		Obecnosc.objects.bulk_create([Obecnosc(sesja=self.sesja, radny=r, obecny=True) for r in nowi])
+		Glos.objects.bulk_create([Glos(glosowanie=self.glosowanie, uzytkownik=r, glos="za") for r in nowi])
+
+		for nazwa, url, user in widoki:
+			with self.subTest(widok=nazwa):
+				self.assertEqual(len(self._zapytania(url, user)), przed[nazwa])
+
+	def _widoki(self):
+		k, ks = self.komisja.id, self.komisja_sesja.id
+		return [
+			("radny", reverse("radny"), self.radny),
+			("sesja_edytuj", reverse("sesja_edytuj", args=[self.sesja.id]), self.prezydium),
+			("api_aktywny_punkt", reverse("api_aktywny_punkt", args=[self.sesja.id]), None),
+			("api_wyniki", reverse("api_wyniki", args=[self.glosowanie.id]), None),
+			("api_wyniki_kandydaci", reverse("api_wyniki", args=[self.glosowanie_kandydaci.id]), None),
+			("api_lista_glosow_jawne", reverse("api_lista_glosow_jawne", args=[self.glosowanie.id]), None),
+			("wyniki_publiczne", reverse("wyniki"), None),
+			("prezydium_agenda", reverse("prezydium_agenda"), self.prezydium),
+			("obecnosci_prezidium", reverse("obecnosci_prezidium"), self.prezydium),
+			("komisja_szczegoly", reverse("komisja_szczegoly", args=[k]), self.przewodniczacy),
+			("komisja_sesja_edytuj", reverse("komisja_sesja_edytuj", args=[k, ks]), self.przewodniczacy),
+			("komisja_sesja_glosowania", reverse("komisja_sesja_glosowania", args=[k, ks]), self.radni[5]),
+			("api_komisja_aktywny_punkt", reverse("api_komisja_aktywny_punkt", args=[ks]), None),
+			("api_komisja_wyniki", reverse("api_komisja_wyniki", args=[self.komisja_glosowanie.id]), None),
+			("api_komisja_lista_glosow_jawne", reverse("api_komisja_lista_glosow_jawne", args=[self.komisja_glosowanie.id]), None),
+		]
+
+
+class DaneSyntetyczneTests(TestCase):
+	def _generuj(self, *args):
+		out = io.StringIO()
+		call_command("generuj_dane_syntetyczne", "--sesje", "2", "--punkty", "10", "--radni", "6", "--komisje", "2", "--wnioski", "2", *args, stdout=out)
+		return out.getvalue()
+
+	def test_generuje_powtarzalne_dane(self):
+		self._generuj("--aktywna")
+		self.assertEqual(Sesja.objects.filter(nazwa__startswith="[synt]").count(), 2)
+		self.assertEqual(PunktObrad.objects.filter(sesja__nazwa__startswith="[synt]").count(), 20)
+		self.assertEqual(Glos.objects.count(), 20 * 6)
+		self.assertEqual(Glosowanie.objects.filter(typ="kandydaci").count(), 2)
+		self.assertEqual(Wniosek.objects.count(), 12)
+		self.assertEqual(Sesja.objects.get(aktywna=True).nazwa, "[synt] Sesja 002")
+		glosy = list(Glos.objects.order_by("id").values_list("glos", "kandydat__imie"))
+
+		# ponowne generowanie bez --wyczysc jest blokowane, z --wyczysc daje te same dane
+		with self.assertRaises(CommandError):
+			self._generuj()
+		self._generuj("--wyczysc", "--aktywna")
+		self.assertEqual(list(Glos.objects.order_by("id").values_list("glos", "kandydat__imie")), glosy)
+		self.assertEqual(Uzytkownik.objects.filter(username__startswith="synt.").count(), 7)
+
+	def test_pomiar_zapisuje_json(self):
+		self._generuj("--aktywna")
+		katalog = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, katalog)
+		plik = os.path.join(katalog, "pomiar.json")
+
+		call_command("zmierz_wydajnosc", "--powtorzenia", "1", "--rozgrzewka", "0", "--wyjscie", plik, stdout=io.StringIO())
+		with open(plik, encoding="utf-8") as f:
+			raport = json.load(f)
+		self.assertIn("api_aktywny_punkt", raport["widoki"])
+		self.assertIn("api_komisja_wyniki", raport["widoki"])
+		self.assertGreater(raport["widoki"].pop("protokol_pdf")["strony"], 0)
+		for nazwa, wynik in raport["widoki"].items():
+			self.assertEqual(wynik["status"], 200, nazwa)
+			self.assertGreater(wynik["zapytania"], 0, nazwa)
+
+		# sztucznie szybszy poprzedni pomiar → regresja
+		for wynik in raport["widoki"].values():
+			wynik["mediana_ms"] = wynik["mediana_ms"] / 100
+		with open(plik, "w", encoding="utf-8") as f:
+			json.dump(raport, f)
+		with self.assertRaisesMessage(CommandError, "Regresje wydajności"):
+			call_command("zmierz_wydajnosc", "--powtorzenia", "1", "--rozgrzewka", "0", "--porownaj", plik, stdout=io.StringIO())
+
+
+class IndeksyZapytanTests(TestCase):
+	"""EXPLAIN QUERY PLAN dla gorących zapytań – czy SQLite sięga po właściwy indeks."""
+
+	def setUp(self):
+		if connection.vendor != "sqlite":
+			self.skipTest("plany zapytań sprawdzane tylko na SQLite")
+
+	def assertIndeks(self, queryset, nazwa):
+		plan = queryset.explain()
+		self.assertIn(f"INDEX {nazwa}", plan, plan)
+
+	def test_aktywna_sesja(self):
+		self.assertIndeks(Sesja.objects.filter(aktywna=True), "sesja_aktywna_idx")
+
+	def test_aktywny_punkt_sesji(self):
+		self.assertIndeks(PunktObrad.objects.filter(sesja_id=1, aktywny=True), "punkt_sesja_aktywny_idx")
+
+	def test_biezace_glosowanie_punktu(self):
+		qs = Glosowanie.objects.filter(punkt_obrad_id=1, podpunkt_obrad__isnull=True).order_by("-otwarte", "-utworzone", "-id")
+		self.assertIndeks(qs, "glosowanie_punkt_stan_idx")
+		self.assertIndeks(Glosowanie.objects.filter(punkt_obrad_id=1, podpunkt_obrad__isnull=True, otwarte=True), "glosowanie_punkt_stan_idx")
+
+	def test_zliczanie_glosow(self):
+		qs = Glos.objects.filter(glosowanie_id=1).values("glos").annotate(count=Count("glos")).order_by()
+		self.assertIn("COVERING INDEX glos_glosowanie_glos_idx", qs.explain())
+		qs = Glos.objects.filter(glosowanie_id=1, kandydat__isnull=False).values("kandydat_id").annotate(liczba=Count("id")).order_by()
+		self.assertIn("COVERING INDEX glos_glosowanie_kandydat_idx", qs.explain())
+
+	def test_obecni_na_sesji(self):
+		self.assertIndeks(Obecnosc.objects.filter(sesja_id=1, obecny=True).order_by(), "obecnosc_sesja_obecny_idx")
+
+	def test_wnioski_radnego(self):
+		self.assertIndeks(Wniosek.objects.filter(radny_id=1), "wniosek_radny_data_idx")
+
+
+class ProfilerTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.admin = Uzytkownik.objects.create_user(username="admin_profil", password="x", rola="administrator", imie="A", nazwisko="Admin")
+		cls.radny = Uzytkownik.objects.create_user(username="radny_profil", password="x", rola="radny", imie="R", nazwisko="Radny")
+		cls.sesja = Sesja.objects.create(nazwa="Sesja profilowana", aktywna=True)
+
+	def setUp(self):
+		media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+		media_override = override_settings(MEDIA_ROOT=media_root)
+		media_override.enable()
+		self.addCleanup(media_override.disable)
+
+	def _profile(self):
+		return profiler.lista()
+
+	def test_administrator_zapisuje_profil_z_sql(self):
+		self.client.force_login(self.admin)
+		response = self.client.get(reverse("api_aktywny_punkt", args=[self.sesja.id]), {"_profil": "1"})
+		self.assertEqual(response.status_code, 200)
+
+		profile = self._profile()
+		self.assertEqual(len(profile), 1)
+		self.assertEqual(response["X-Profil"], profile[0]["nazwa"])
+		self.assertEqual(profile[0]["widok"], "api_aktywny_punkt")
+		profil = profiler.wczytaj(profile[0]["nazwa"])
+		self.assertTrue(any("core_sesja" in q["sql"] for q in profil["zapytania"]))
+		self.assertIn("cumulative", profil["statystyki"])
+
+		lista = self.client.get(reverse("profile_lista"))
+		self.assertContains(lista, "api_aktywny_punkt")
+		szczegoly = self.client.get(reverse("profil_szczegoly", args=[profile[0]["nazwa"]]))
+		self.assertContains(szczegoly, "core_sesja")
+
+	def test_naglowek_tez_wyzwala(self):
+		self.client.force_login(self.admin)
+		self.client.get(reverse("radny"), HTTP_X_PROFIL="1")
+		self.assertEqual(len(self._profile()), 1)
+
+	def test_bez_wyzwalacza_lub_bez_roli_nic_nie_jest_zapisywane(self):
+		self.client.force_login(self.admin)
+		response = self.client.get(reverse("radny"))
+		self.assertNotIn("X-Profil", response)
+
+		self.client.force_login(self.radny)
+		self.client.get(reverse("radny"), {"_profil": "1"})
+		self.client.logout()
+		self.client.get(reverse("api_aktywny_punkt", args=[self.sesja.id]), {"_profil": "1"})
+		self.assertEqual(self._profile(), [])
+
+		self.client.force_login(self.radny)
+		self.assertEqual(self.client.get(reverse("profile_lista")).status_code, 403)
+
+	@override_settings(PROFILER_LIMIT=2)
+	def test_bufor_cykliczny(self):
+		self.client.force_login(self.admin)
+		nazwy = [
+			self.client.get(reverse("api_aktywny_punkt", args=[self.sesja.id]), {"_profil": "1"})["X-Profil"]
+			for _ in range(3)
+		]
+		self.assertEqual([p["nazwa"] for p in self._profile()], nazwy[:0:-1])
+
+	def test_nieznany_profil(self):
+		self.client.force_login(self.admin)
+		self.assertEqual(self.client.get(reverse("profil_szczegoly", args=["..secret"])).status_code, 404)
+		self.assertEqual(self.client.get(reverse("profil_szczegoly", args=["20260101-000000-000000-abc"])).status_code, 404)
+
+
+class PanelWydajnosciTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.prezydium = Uzytkownik.objects.create_user(username="prezydium_wyd", password="x", rola="prezydium", imie="P", nazwisko="Prezydium")
+		cls.radny = Uzytkownik.objects.create_user(username="radny_wyd", password="x", rola="radny", imie="R", nazwisko="Radny")
+		cls.sesja = Sesja.objects.create(nazwa="Sesja wydajności", aktywna=True)
+		cls.punkt = PunktObrad.objects.create(sesja=cls.sesja, numer=1, tytul="Punkt", aktywny=True)
+		cls.glosowanie = Glosowanie.objects.create(punkt_obrad=cls.punkt, nazwa="Budżet", otwarte=True)
+
+	def setUp(self):
+		for wyczysc in (metryki.rejestr.wyczysc, metryki.zdarzenia.wyczysc, metryki.ekrany.wyczysc):
+			wyczysc()
+			self.addCleanup(wyczysc)
+
+	def test_panel_laczy_ruch_glosowanie_i_odpytywanie(self):
+		teraz = 1_000_000.0
+		for czas in (8, 9, 12, 400):
+			metryki.rejestr.zapisz("oddaj_glos", czas, teraz=teraz)
+		for _ in range(55):
+			metryki.rejestr.zapisz("api_aktywny_punkt", 3, teraz=teraz)
+		metryki.rejestr.zapisz("api_wyniki", 30, teraz=teraz)
+		metryki.zdarzenia.zapisz(metryki.zapis_glosu(7), 4, teraz=teraz)
+		metryki.zdarzenia.zapisz(metryki.BLOKADA_BAZY, 120, teraz=teraz)
+
+		dane = metryki.panel(glosowanie_id=7, teraz=teraz)
+		self.assertEqual(dane["zadania_na_s"], 1.0)
+		self.assertEqual(dane["glosowanie"]["liczba"], 4)
+		self.assertEqual(dane["glosowanie"]["p95_ms"], 500)
+		self.assertEqual(dane["odpytywanie"]["liczba"], 56)
+		self.assertEqual(dane["odpytywanie"]["p95_ms"], 5)
+		self.assertEqual(dane["blokady"], {"liczba": 1, "czas_ms": 120.0})
+		self.assertEqual(dane["zapis_glosu"]["liczba"], 1)
+		self.assertIsNone(metryki.panel(teraz=teraz)["zapis_glosu"])
+
+	def test_ekrany_licza_roznych_klientow_i_wygasaja(self):
+		ekrany = Ekrany(limit=2)
+		ekrany.odnotuj("a", teraz=100)
+		ekrany.odnotuj("b", teraz=110)
+		ekrany.odnotuj("a", teraz=120)
+		self.assertEqual(ekrany.aktywne(sekundy=30, teraz=125), 2)
+		self.assertEqual(ekrany.aktywne(sekundy=30, teraz=145), 1)
+		ekrany.odnotuj("c", teraz=146)
+		ekrany.odnotuj("d", teraz=147)
+		self.assertEqual(ekrany.aktywne(sekundy=30, teraz=147), 2)
+
+	def test_blokada_bazy_liczona_z_bledu_i_wolnego_zapisu(self):
+		licznik = _LicznikSql()
+
+		def zablokowany(*args):
+			raise OperationalError("database is locked")
+
+		with self.assertRaises(OperationalError):
+			licznik(zablokowany, "UPDATE core_sesja SET aktywna = 1", (), False, {})
+		licznik(lambda *args: None, "SELECT 1", (), False, {})
+		licznik.prog_blokady_ms = -1
+		licznik(lambda *args: None, "INSERT INTO core_glos VALUES (1)", (), False, {})
+		licznik(lambda *args: None, "SELECT 1", (), False, {})
+		self.assertEqual(metryki.zdarzenia.okno()[metryki.BLOKADA_BAZY].liczba, 2)
+
+	def test_api_pokazuje_ekrany_i_zapis_glosu_otwartego_glosowania(self):
+		for agent in ("rzutnik-1", "rzutnik-2"):
+			klient = Client(HTTP_USER_AGENT=agent)
+			klient.get(reverse("api_aktywny_punkt", args=[self.sesja.id]))
+			klient.get(reverse("api_aktywny_punkt", args=[self.sesja.id]))
+
+		self.client.force_login(self.radny)
+		self.client.post(reverse("oddaj_glos", args=[self.glosowanie.id]), {"glos": "za"}, HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+		self.assertEqual(self.client.get(reverse("api_prezydium_wydajnosc")).status_code, 403)
+
+		self.client.force_login(self.prezydium)
+		dane = self.client.get(reverse("api_prezydium_wydajnosc")).json()
+		self.assertEqual(dane["ekrany"], 2)
+		self.assertEqual(dane["otwarte_glosowanie"]["id"], self.glosowanie.id)
+		self.assertEqual(dane["zapis_glosu"]["liczba"], 1)
+		self.assertEqual(dane["glosowanie"]["liczba"], 1)
+		self.assertEqual(dane["odpytywanie"]["liczba"], 4)
+
+		response = self.client.get(reverse("prezydium_wydajnosc"))
+		self.assertContains(response, "Wydajność systemu")
+		self.assertContains(response, reverse("api_prezydium_wydajnosc"))
+
+
+class DashboardPrezydiumTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.prezydium = Uzytkownik.objects.create_user(username="prezydium_dash", password="x", rola="prezydium", imie="P", nazwisko="Prezydium")
+		teraz = timezone.now()
+		cls.dawna = Sesja.objects.create(nazwa="Sesja archiwalna", data=teraz - timedelta(days=30), aktywna=False)
+		cls.usunieta = Sesja.objects.create(nazwa="Sesja usunięta", data=teraz + timedelta(days=1), aktywna=False, jest_usunieta=True)
+		cls.nastepna = Sesja.objects.create(nazwa="Sesja nadchodząca", data=teraz + timedelta(days=3), aktywna=False)
+		cls.pozniejsza = Sesja.objects.create(nazwa="Sesja późniejsza", data=teraz + timedelta(days=10), aktywna=False)
+		for numer in range(1, 4):
+			PunktObrad.objects.create(sesja=cls.nastepna, numer=numer, tytul=f"Punkt {numer}")
+		cls.punkt = PunktObrad.objects.create(sesja=cls.dawna, numer=1, tytul="Archiwalny")
+
+	def setUp(self):
+		cache.clear()
+		self.client.force_login(self.prezydium)
+
+	def test_najblizsza_to_nastepna_nieusunieta_sesja(self):
+		response = self.client.get(reverse("prezydium_dashboard"))
+		self.assertEqual(response.context["najblizsza"], self.nastepna)
+		self.assertEqual(response.context["najblizsza"].liczba_punktow, 3)
+		self.assertEqual(response.context["liczba_sesji"], 4)
+		self.assertEqual(response.context["liczba_punktow"], 4)
+
+	def test_liczniki_z_cache_uniewazniane_zapisem(self):
+		self.client.get(reverse("prezydium_dashboard"))
+		with CaptureQueriesContext(connection) as ctx:
+			response = self.client.get(reverse("prezydium_dashboard"))
+		self.assertFalse([q for q in ctx.captured_queries if "COUNT(*)" in q["sql"] and "core_glosowanie" in q["sql"]])
+		self.assertEqual(response.context["liczba_glosowan_otwartych"], 0)
+
+		glosowanie = Glosowanie.objects.create(punkt_obrad=self.punkt, nazwa="Nowe", otwarte=True)
+		self.assertEqual(self.client.get(reverse("prezydium_dashboard")).context["liczba_glosowan_otwartych"], 1)
+		glosowanie.otwarte = False
+		glosowanie.save(update_fields=["otwarte"])
+		self.assertEqual(self.client.get(reverse("prezydium_dashboard")).context["liczba_glosowan_otwartych"], 0)
+		self.nastepna.delete()
+		self.assertEqual(self.client.get(reverse("prezydium_dashboard")).context["liczba_sesji"], 3)
+
+	def test_najblizsza_korzysta_z_indeksu_daty(self):
+		if connection.vendor != "sqlite":
+			self.skipTest("plany zapytań sprawdzane tylko na SQLite")
+		plan = Sesja.objects.filter(data__gte=timezone.now(), jest_usunieta=False).order_by("data").explain()
+		self.assertIn("sesja_data_idx", plan)
+
+
+class RazPoCommicieTests(TestCase):
+	def test_zgloszenia_z_transakcji_trafiaja_do_funkcji_raz(self):
+		wywolania = []
+		with self.captureOnCommitCallbacks(execute=True):
+			raz_po_commicie("test", wywolania.append, 1)
+			raz_po_commicie("test", wywolania.append, 1, 2)
+			raz_po_commicie("inny", wywolania.append, "x")
+		self.assertEqual(wywolania, [{1, 2}, {"x"}])
+
+	def test_po_wycofaniu_savepointu_kolejne_zgloszenie_planuje_ponownie(self):
+		wywolania = []
+		with self.captureOnCommitCallbacks(execute=True):
+			with self.assertRaises(RuntimeError), transaction.atomic():
+				raz_po_commicie("test", wywolania.append, 1)
+				raise RuntimeError
+			raz_po_commicie("test", wywolania.append, 2)
+		# wartość z wycofanego savepointu zostaje – funkcje uzgadniają stan z bazą, więc to nieszkodliwe
+		self.assertEqual(wywolania, [{1, 2}])
+
+
+@override_settings(KADENCJE=(("2020-2025", "2020-01-01"), ("2025-2030", "2025-01-01")))
+class StatystykiRadnychTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.prezydium = Uzytkownik.objects.create_user(username="prezydium_stat", password="x", rola="prezydium", imie="P", nazwisko="Prezydium")
+		cls.radny = Uzytkownik.objects.create_user(username="radny_stat", password="x", rola="radny", imie="Jan", nazwisko="Statystyczny")
+		strefa = timezone.get_current_timezone()
+		cls.stara = Sesja.objects.create(nazwa="Sesja 2022", data=datetime(2022, 3, 1, 10, tzinfo=strefa), aktywna=False)
+		cls.nowa = Sesja.objects.create(nazwa="Sesja 2026", data=datetime(2026, 3, 1, 10, tzinfo=strefa), aktywna=False)
+		cls.punkt_stary = PunktObrad.objects.create(sesja=cls.stara, numer=1, tytul="Budżet")
+		cls.punkt_nowy = PunktObrad.objects.create(sesja=cls.nowa, numer=1, tytul="Wybory")
+
+	def _wiersze(self):
+		return {
+			(s.uzytkownik_id, s.kadencja): {pole: getattr(s, pole) for pole in LICZNIKI}
+			for s in StatystykaRadnego.objects.all()
+		}
+
+	def _zdarzenia(self):
+		Obecnosc.objects.create(sesja=self.stara, radny=self.radny, obecny=True)
+		Obecnosc.objects.create(sesja=self.nowa, radny=self.radny, obecny=False)
+		g1 = Glosowanie.objects.create(punkt_obrad=self.punkt_stary, nazwa="Budżet")
+		g2 = Glosowanie.objects.create(punkt_obrad=self.punkt_nowy, nazwa="Wybory", typ="kandydaci")
+		kandydat = Kandydat.objects.create(punkt_obrad=self.punkt_nowy, imie="Ewa", nazwisko="Kandydatka")
+		Glos.objects.create(glosowanie=g1, uzytkownik=self.radny, glos="przeciw")
+		Glos.objects.create(glosowanie=g1, uzytkownik=self.prezydium, glos="za")
+		Glos.objects.create(glosowanie=g2, uzytkownik=self.radny, kandydat=kandydat)
+		return g1
+
+	def test_przyrosty_zgodne_z_przebudowa(self):
+		self._zdarzenia()
+		Wniosek.objects.create(radny=self.radny, tresc="Wniosek o ławki")
+		przyrostowo = self._wiersze()
+
+		biezaca = statystyki.biezaca_kadencja()
+		self.assertEqual(przyrostowo[(self.radny.id, "2020-2025")]["glosy_przeciw"], 1)
+		self.assertEqual(przyrostowo[(self.radny.id, "2020-2025")]["obecnosci"], 1)
+		self.assertEqual(przyrostowo[(self.radny.id, "2025-2030")]["nieobecnosci"], 1)
+		self.assertEqual(przyrostowo[(self.radny.id, "2025-2030")]["glosy_na_kandydatow"], 1)
+		self.assertEqual(przyrostowo[(self.radny.id, biezaca)]["wnioski"], 1)
+		self.assertEqual(przyrostowo[(self.prezydium.id, "2020-2025")]["glosy_za"], 1)
+
+		statystyki.przebuduj()
+		self.assertEqual(self._wiersze(), przyrostowo)
+
+	def test_zmiana_obecnosci_przenosi_licznik(self):
+		obecnosc = Obecnosc.objects.create(sesja=self.stara, radny=self.radny, obecny=False)
+		# dwa żądania wczytały ten sam stan i oba ustawiają obecność – liczy się tylko zmiana potwierdzona przez UPDATE
+		pierwsze = Obecnosc.objects.get(pk=obecnosc.pk)
+		drugie = Obecnosc.objects.get(pk=obecnosc.pk)
+		self.assertTrue(pierwsze.ustaw(True))
+		self.assertFalse(drugie.ustaw(True))
+		wiersz = self._wiersze()[(self.radny.id, "2020-2025")]
+		self.assertEqual((wiersz["obecnosci"], wiersz["nieobecnosci"]), (1, 0))
+
+		# zwykły save() nie zna poprzedniej wartości – radny liczony od nowa po commicie
+		with self.captureOnCommitCallbacks(execute=True):
+			pierwsze.obecny = False
+			pierwsze.save()
+		wiersz = self._wiersze()[(self.radny.id, "2020-2025")]
+		self.assertEqual((wiersz["obecnosci"], wiersz["nieobecnosci"]), (0, 1))
+
+	def test_usuniecie_przelicza_po_zatwierdzeniu(self):
+		glosowanie = self._zdarzenia()
+		with self.captureOnCommitCallbacks(execute=True):
+			glosowanie.delete()
+		wiersze = self._wiersze()
+		self.assertEqual(wiersze[(self.radny.id, "2020-2025")]["glosy_przeciw"], 0)
+		self.assertEqual(wiersze[(self.radny.id, "2020-2025")]["obecnosci"], 1)
+		self.assertNotIn((self.prezydium.id, "2020-2025"), wiersze)
+
+	def test_usuniecie_sesji_kasuje_glosy_bez_zapytan_na_wiersz(self):
+		radni = Uzytkownik.objects.bulk_create([
+			Uzytkownik(username=f"radny_masowy{i}", rola="radny", imie="R", nazwisko=f"Masowy{i}") for i in range(40)
+		])
+		glosowanie = Glosowanie.objects.create(punkt_obrad=self.punkt_stary, nazwa="Masowe")
+		Glos.objects.bulk_create([Glos(glosowanie=glosowanie, uzytkownik=r, glos="za") for r in radni])
+		Obecnosc.objects.bulk_create([Obecnosc(sesja=self.stara, radny=r, obecny=True) for r in radni])
+		statystyki.przebuduj()
+
+		with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as ctx:
+			self.stara.delete()
+
+		# głosy i obecności znikają jednym DELETE po kluczu obcym (fast-delete), bez wczytywania wierszy
+		zapytania = [q["sql"] for q in ctx.captured_queries]
+		self.assertFalse([q for q in zapytania if q.startswith('SELECT "core_glos"."id"') or q.startswith('SELECT "core_obecnosc"."id"')])
+		self.assertTrue([q for q in zapytania if q.startswith('DELETE FROM "core_glos" WHERE "core_glos"."glosowanie_id" IN')])
+		self.assertFalse(StatystykaRadnego.objects.filter(uzytkownik__in=radni).exists())
+
+	def test_komenda_przebudowy(self):
+		self._zdarzenia()
+		StatystykaRadnego.objects.all().delete()
+		out = StringIO()
+		call_command("przebuduj_statystyki_radnych", stdout=out)
+		self.assertIn("Zapisano wierszy statystyk: 3", out.getvalue())
+		self.assertEqual(self._wiersze()[(self.radny.id, "2025-2030")]["glosy_na_kandydatow"], 1)
+
+	def test_widoki_czytaja_tabele_statystyk(self):
+		self._zdarzenia()
+		self.client.force_login(self.prezydium)
+
+		response = self.client.get(reverse("prezydium_uczestnik_szczegoly", args=[self.radny.id]))
+		self.assertEqual(len(response.context["statystyki"]), 2)
+		self.assertEqual(response.context["razem"].obecnosci + response.context["razem"].nieobecnosci, 2)
+
+		url = reverse("prezydium_statystyki_radnych")
+		with self.assertNumQueries(4):
+			response = self.client.get(url, {"kadencja": "2020-2025", "format": "json"})
+		radni = {r["id"]: r for r in response.json()["radni"]}
+		self.assertEqual(radni[self.radny.id]["glosy_przeciw"], 1)
+		self.assertEqual(radni[self.radny.id]["frekwencja"], 100.0)
+		self.assertEqual(radni[self.prezydium.id]["glosy_za"], 1)
+		self.assertContains(self.client.get(url), "Statystyczny Jan")
+
+
+class MigawkiSesjiTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.prezydium = Uzytkownik.objects.create_user(username="prezydium_migawki", password="x", rola="prezydium", imie="Piotr", nazwisko="Prezes")
+		cls.radny = Uzytkownik.objects.create_user(username="radny_migawki", password="x", rola="radny", imie="Jan", nazwisko="Archiwalny")
+		cls.sesja = Sesja.objects.create(nazwa="Sesja do zamknięcia", data=timezone.now(), aktywna=False)
+		punkt = PunktObrad.objects.create(sesja=cls.sesja, numer=1, tytul="Budżet")
+		podpunkt = PodpunktObrad.objects.create(punkt_nadrzedny=punkt, numer=1, tytul="Poprawka")
+		wybory = PunktObrad.objects.create(sesja=cls.sesja, numer=2, tytul="Wybór skarbnika")
+		jawne = Glosowanie.objects.create(punkt_obrad=punkt, nazwa="Przyjęcie budżetu")
+		poprawka = Glosowanie.objects.create(punkt_obrad=punkt, podpunkt_obrad=podpunkt, nazwa="Poprawka", wiekszosc="bezwzgledna", liczba_uprawnionych=2)
+		tajne = Glosowanie.objects.create(punkt_obrad=wybory, nazwa="Wybór", typ="kandydaci", jawnosc="tajne")
+		kandydat = Kandydat.objects.create(punkt_obrad=wybory, imie="Ewa", nazwisko="Skarbnik")
+		tajne.kandydaci.add(kandydat)
+		Glos.objects.create(glosowanie=jawne, uzytkownik=cls.radny, glos="za")
+		Glos.objects.create(glosowanie=jawne, uzytkownik=cls.prezydium, glos="przeciw")
+		Glos.objects.create(glosowanie=poprawka, uzytkownik=cls.radny, glos="za")
+		Glos.objects.create(glosowanie=tajne, uzytkownik=cls.radny, kandydat=kandydat)
+		Obecnosc.objects.create(sesja=cls.sesja, radny=cls.radny, obecny=True)
+		Obecnosc.objects.create(sesja=cls.sesja, radny=cls.prezydium, obecny=False)
+		cls.wniosek = Wniosek.objects.create(radny=cls.radny, punkt_obrad=punkt, tresc="Wniosek do budżetu")
+		cls.jawne, cls.tajne = jawne, tajne
+
+	def _rekordy(self):
+		return list(_iter_glosowania([self.sesja.id]))
+
+	def test_zamkniecie_tworzy_niezmienna_migawke(self):
+		self.sesja.zamknij()
+		self.sesja.zamknij()
+		migawka = MigawkaSesji.objects.get(sesja=self.sesja)
+		punkt, wybory = migawka.dane["punkty"]
+		budzet = punkt["glosowania"][0]
+		self.assertEqual((budzet["za"], budzet["przeciw"], budzet["przeszedl"]), (1, 1, False))
+		self.assertEqual(budzet["glosy_imienne"], {str(self.radny.id): "za", str(self.prezydium.id): "przeciw"})
+		self.assertEqual(punkt["podpunkty"][0]["glosowania"][0]["prog"], 2)
+		self.assertEqual(wybory["glosowania"][0]["kandydaci"][0]["glosy"], 1)
+		self.assertEqual(wybory["glosowania"][0]["glosy_imienne"], {})
+		self.assertEqual(migawka.dane["obecnosc"], {str(self.radny.id): True, str(self.prezydium.id): False})
+		self.assertTrue(Sesja.objects.get(id=self.sesja.id).jest_zamknieta)
+
+		Glos.objects.filter(glosowanie=self.jawne).update(glos="za")
+		self.assertEqual(MigawkaSesji.objects.get(sesja=self.sesja).dane, migawka.dane)
+		with self.assertRaises(ValueError):
+			migawka.save()
+
+	def test_protokol_i_eksport_czytaja_migawke_po_przycieciu(self):
+		przed = self._rekordy()
+		dokument = migawki.zbuduj(self.sesja)
+		with self.captureOnCommitCallbacks(execute=True):
+			self.sesja.zamknij(przytnij=True)
+
+		self.assertFalse(PunktObrad.objects.filter(sesja=self.sesja).exists())
+		self.assertFalse(Obecnosc.objects.filter(sesja=self.sesja).exists())
+		self.assertIsNone(Wniosek.objects.get(id=self.wniosek.id).punkt_obrad_id)
+		self.assertEqual(self._rekordy(), przed)
+		self.assertEqual(migawki.dane_sesji(self.sesja), dokument)
+		with CaptureQueriesContext(connection) as ctx:
+			self.assertTrue(protokol_pdf_bytes(self.sesja).startswith(b"%PDF"))
+		self.assertFalse([q for q in ctx.captured_queries if "core_glos" in q["sql"]])
+
+	def test_statystyki_radnych_uwzgledniaja_przycieta_sesje(self):
+		def wiersze():
+			return sorted(StatystykaRadnego.objects.values_list(
+				"uzytkownik_id", "kadencja", "obecnosci", "nieobecnosci", "glosy_za", "glosy_przeciw", "glosy_na_kandydatow", "wnioski",
+			))
+
+		przed = wiersze()
+		with self.captureOnCommitCallbacks(execute=True):
+			self.sesja.zamknij(przytnij=True)
+		self.assertEqual(wiersze(), przed)
+		statystyki.przebuduj()
+		self.assertEqual(wiersze(), przed)
+
+	def test_strona_wynikow_i_zamkniecie_z_listy_sesji(self):
+		self.client.force_login(self.prezydium)
+		response = self.client.post(reverse("zamknij_sesje", args=[self.sesja.id]))
+		self.assertRedirects(response, reverse("prezydium_sesje"), fetch_redirect_response=False)
+		self.assertTrue(hasattr(Sesja.objects.get(id=self.sesja.id), "migawka"))
+
+		self.client.force_login(self.radny)
+		response = self.client.get(reverse("sesja_wyniki", args=[self.sesja.id]))
+		self.assertContains(response, "Przyjęcie budżetu")
+		self.assertContains(response, "Skarbnik Ewa")
+		self.assertContains(response, "PRZECIW")
+		self.assertContains(response, "lista imienna niedostępna")
+
+	def test_zamknietej_sesji_nie_mozna_aktywowac_ani_edytowac(self):
+		self.sesja.zamknij()
+		self.client.force_login(self.prezydium)
+
+		self.client.post(reverse("ustaw_sesje_aktywna", args=[self.sesja.id]))
+		self.assertFalse(Sesja.objects.get(id=self.sesja.id).aktywna)
+		with self.assertRaises(ValueError):
+			self.sesja.ustaw_aktywna()
+
+		punkt = self.jawne.punkt_obrad
+		self.assertRedirects(self.client.get(reverse("sesja_edytuj", args=[self.sesja.id])), reverse("prezydium_sesje"))
+		self.client.post(reverse("sesja_edytuj", args=[self.sesja.id]), {"dodaj_punkt": "1", "tytul": "Dopisany"})
+		self.client.post(reverse("usun_punkt_obrad", args=[punkt.id]))
+		self.assertEqual(PunktObrad.objects.filter(sesja=self.sesja).count(), 2)
+
+		response = self.client.post(reverse("toggle_glosowanie", args=[self.jawne.id]))
+		self.assertEqual(response.status_code, 409)
+		response = self.client.post(reverse("obecnosci_toggle_prezidium", args=[self.sesja.id, self.radny.id]))
+		self.assertEqual(response.status_code, 409)
+		self.assertTrue(Obecnosc.objects.get(sesja=self.sesja, radny=self.radny).obecny)
+
+		Glosowanie.objects.filter(id=self.jawne.id).update(otwarte=True)
+		self.client.force_login(self.radny)
+		Glos.objects.filter(glosowanie=self.jawne, uzytkownik=self.radny).delete()
+		response = self.client.post(
+			reverse("oddaj_glos", args=[self.jawne.id]), {"glos": "za"}, HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+		)
+		self.assertEqual(response.status_code, 400)
+		self.assertFalse(Glos.objects.filter(glosowanie=self.jawne, uzytkownik=self.radny).exists())
+
+	def test_aktywnej_sesji_z_otwartym_glosowaniem_nie_mozna_zamknac(self):
+		Sesja.objects.filter(id=self.sesja.id).update(aktywna=True)
+		Glosowanie.objects.filter(id=self.jawne.id).update(otwarte=True)
+		self.client.force_login(self.prezydium)
+
+		self.client.post(reverse("zamknij_sesje", args=[self.sesja.id]))
+		self.assertFalse(Sesja.objects.get(id=self.sesja.id).jest_zamknieta)
+
+		Glosowanie.objects.filter(id=self.jawne.id).update(otwarte=False)
+		self.client.post(reverse("zamknij_sesje", args=[self.sesja.id]))
+		sesja = Sesja.objects.get(id=self.sesja.id)
+		self.assertTrue(sesja.jest_zamknieta)
+		self.assertFalse(sesja.aktywna)
+
+	def test_komenda_zamraza_i_przycina_zamkniete_sesje(self):
+		Sesja.objects.filter(id=self.sesja.id).update(jest_zamknieta=True)
+		out = StringIO()
+		call_command("zamroz_zamkniete_sesje", "--przytnij", stdout=out)
+		self.assertIn("Utworzono migawek: 1", out.getvalue())
+		self.assertFalse(Glos.objects.filter(glosowanie__punkt_obrad__sesja=self.sesja).exists())
+		self.assertEqual(len(self._rekordy()), 3)
+
+
+class PublikacjaWynikowTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		cls.prezydium = Uzytkownik.objects.create_user(username="prezydium_publikacja", password="x", rola="prezydium", imie="Paula", nazwisko="Publikująca")
+		cls.radny = Uzytkownik.objects.create_user(username="radny_publikacja", password="x", rola="radny", imie="Jan", nazwisko="Jawny")
+		cls.sesja = Sesja.objects.create(nazwa="Sesja sporna", data=timezone.now(), aktywna=False)
+		punkt = PunktObrad.objects.create(sesja=cls.sesja, numer=1, tytul="Likwidacja szkoły")
+		cls.glosowanie = Glosowanie.objects.create(punkt_obrad=punkt, nazwa="Uchwała o likwidacji", otwarte=True)
+		Glos.objects.create(glosowanie=cls.glosowanie, uzytkownik=cls.radny, glos="przeciw")
+
+	def setUp(self):
+		self.media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+		media_override = override_settings(MEDIA_ROOT=self.media_root)
+		media_override.enable()
+		self.addCleanup(media_override.disable)
+		self.katalog = Path(self.media_root) / "wyniki"
+		self.client.force_login(self.prezydium)
+
+	def _wyniki(self):
+		return json.loads((self.katalog / f"sesja-{self.sesja.id}" / "wyniki.json").read_text(encoding="utf-8"))
+
+	def _lista(self):
+		return json.loads((self.katalog / "sesje.json").read_text(encoding="utf-8"))["sesje"]
+
+	def test_publikacja_tworzy_statyczne_strony_i_json(self):
+		url = reverse("opublikuj_sesje", args=[self.sesja.id])
+		with self.captureOnCommitCallbacks(execute=True):
+			self.client.post(url)
+
+		strona = (self.katalog / f"sesja-{self.sesja.id}" / "index.html").read_text(encoding="utf-8")
+		self.assertIn("Uchwała o likwidacji", strona)
+		self.assertIn("Jawny Jan", strona)
+		glosowanie = self._wyniki()["punkty"][0]["glosowania"][0]
+		self.assertEqual(glosowanie["przeciw"], 1)
+		self.assertEqual([s["id"] for s in self._lista()], [self.sesja.id])
+		self.assertIn("Sesja sporna", (self.katalog / "index.html").read_text(encoding="utf-8"))
+
+		with self.captureOnCommitCallbacks(execute=True):
+			self.client.post(url)
+		self.assertFalse((self.katalog / f"sesja-{self.sesja.id}").exists())
+		self.assertEqual(self._lista(), [])
+
+	def test_zamkniecie_glosowania_i_sesji_odswieza_wydanie(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			self.sesja.opublikowana = True
+			self.sesja.save()
+		self.assertTrue(self._wyniki()["punkty"][0]["glosowania"][0]["otwarte"])
+
+		with self.captureOnCommitCallbacks(execute=True):
+			self.glosowanie.otwarte = False
+			self.glosowanie.save()
+		self.assertFalse(self._wyniki()["punkty"][0]["glosowania"][0]["otwarte"])
+
+		with self.captureOnCommitCallbacks(execute=True):
+			self.sesja.zamknij()
+		self.assertTrue(self._wyniki()["zamknieta"])
+
+		with self.captureOnCommitCallbacks(execute=True):
+			self.sesja.delete()
+		self.assertEqual(self._lista(), [])
+
+	def test_zmiana_obecnosci_odswieza_wydanie(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			self.sesja.opublikowana = True
+			self.sesja.save()
+		self.assertEqual(self._wyniki()["obecnosc"], {})
+
+		with self.captureOnCommitCallbacks(execute=True):
+			obecnosc = Obecnosc.objects.create(sesja=self.sesja, radny=self.radny, obecny=True)
+		self.assertEqual(self._wyniki()["obecnosc"], {str(self.radny.id): True})
+
+		with self.captureOnCommitCallbacks(execute=True):
+			obecnosc.ustaw(False)
+		self.assertEqual(self._wyniki()["obecnosc"], {str(self.radny.id): False})
+
+	def test_zmiana_porzadku_obrad_odswieza_wydanie(self):
+		Sesja.objects.filter(id=self.sesja.id).update(opublikowana=True)
+		strona = self.katalog / f"sesja-{self.sesja.id}" / "index.html"
+		punkt = PunktObrad.objects.get(sesja=self.sesja)
+
+		with self.captureOnCommitCallbacks(execute=True):
+			punkt.tytul = "Przekształcenie szkoły"
+			punkt.save()
+			PodpunktObrad.objects.create(punkt_nadrzedny=punkt, numer=1, tytul="Opinia kuratora")
+		tresc = strona.read_text(encoding="utf-8")
+		self.assertIn("Przekształcenie szkoły", tresc)
+		self.assertIn("Opinia kuratora", tresc)
+		self.assertNotIn("Likwidacja szkoły", tresc)
+
+		with self.captureOnCommitCallbacks(execute=True):
+			self.glosowanie.delete()
+		self.assertEqual(self._wyniki()["punkty"][0]["glosowania"], [])
+
+	def test_komenda_renderuje_opublikowane_sesje(self):
+		Sesja.objects.filter(id=self.sesja.id).update(opublikowana=True)
+		out = StringIO()
+		call_command("opublikuj_wyniki", stdout=out)
+		self.assertIn("Opublikowano sesji: 1", out.getvalue())
+		self.assertEqual(self._wyniki()["sesja"]["nazwa"], "Sesja sporna")
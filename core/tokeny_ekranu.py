@@ -0,0 +1,58 @@
+"""Podpisane tokeny ekranu (rzutnika) – dostęp tylko do odczytu bez logowania.
+
+Token wskazuje jedną sesję rady albo komisji i ma datę ważności. Podpis to
+HMAC z SECRET_KEY (django.core.signing), więc weryfikacja nie sięga do bazy:
+ekran z tokenem nie ładuje wiersza django_session ani użytkownika przy
+każdym odpytaniu stanu. Tokenu nie da się odwołać przed wygaśnięciem –
+dlatego wystawiamy go na czas posiedzenia (EKRAN_TOKEN_GODZINY).
+"""
+
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.http import JsonResponse
+
+SALT = "core.tokeny_ekranu"
+RODZAJE = {"sesja", "komisjasesja"}
+
+
+def _domyslne_godziny():
+    return int(getattr(settings, "EKRAN_TOKEN_GODZINY", 12))
+
+
+def wystaw(sesja, godziny=None):
+    """Token dla Sesja/KomisjaSesja ważny przez podaną liczbę godzin."""
+    godziny = _domyslne_godziny() if godziny is None else godziny
+    dane = {"r": sesja._meta.model_name, "id": sesja.pk, "exp": int(time.time() + godziny * 3600)}
+    return signing.dumps(dane, salt=SALT)
+
+
+def odczytaj(token):
+    """Zwraca (rodzaj, sesja_id) z ważnego tokenu albo None."""
+    try:
+        dane = signing.loads(token, salt=SALT)
+    except signing.BadSignature:
+        return None
+    if not isinstance(dane, dict) or dane.get("r") not in RODZAJE:
+        return None
+    if int(dane.get("exp", 0)) < time.time():
+        return None
+    return dane["r"], int(dane["id"])
+
+
+def odmowa_dostepu(request, rodzaj, sesja_id):
+    """None, jeśli żądanie może czytać stan ekranu sesji; w przeciwnym razie odpowiedź 403.
+
+    Z tokenem w parametrze ``token`` sprawdzany jest tylko podpis (bez sesji
+    i użytkownika). Bez tokenu zachowanie zależy od EKRAN_TYLKO_Z_TOKENEM:
+    domyślnie endpointy stanu pozostają publiczne, jak dotąd.
+    """
+    token = request.GET.get("token")
+    if token:
+        if odczytaj(token) == (rodzaj, int(sesja_id)):
+            return None
+        return JsonResponse({"error": "Nieprawidłowy lub wygasły token ekranu"}, status=403)
+    if getattr(settings, "EKRAN_TYLKO_Z_TOKENEM", False) and not request.user.is_authenticated:
+        return JsonResponse({"error": "Brak uprawnień"}, status=403)
+    return None
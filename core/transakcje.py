@@ -0,0 +1,51 @@
+"""Zbiorcze odkładanie pracy do zatwierdzenia transakcji.
+
+Sygnały modeli zgłaszają identyfikatory (radnych do przeliczenia, sesji do
+ponownej publikacji) wiele razy w jednej transakcji, np. przy usuwaniu
+kaskadowym. raz_po_commicie zbiera je w zbiorze przypisanym do klucza
+i połączenia, a po commicie funkcja dostaje cały zbiór jeden raz.
+
+Każde zgłoszenie rejestruje przez transaction.on_commit lekki callback;
+pierwszy wykonany opróżnia zbiór, kolejne nie mają już nic do zrobienia.
+Nie trzeba więc wiedzieć, czy callback z wcześniejszego zgłoszenia nadal
+czeka (po rollbacku Django go porzuca). Wartości z wycofanej transakcji
+zostają w zbiorze i trafią do funkcji przy następnym commicie – dlatego
+funkcje muszą uzgadniać stan z bazą (przeliczać, publikować od nowa),
+a nie nanosić przyrosty.
+"""
+
+import threading
+from functools import partial
+
+from django.db import transaction
+
+_oczekujace = threading.local()
+
+
+def _zbiory():
+    if getattr(_oczekujace, "zbiory", None) is None:
+        _oczekujace.zbiory = {}
+    return _oczekujace.zbiory
+
+
+def _wykonaj(klucz, fn):
+    wartosci = _zbiory().pop(klucz, None)
+    if wartosci:
+        fn(wartosci)
+
+
+def raz_po_commicie(klucz, fn, *wartosci, using=None):
+    """Wywołuje ``fn(zbiór wartości)`` raz po zatwierdzeniu bieżącej transakcji.
+
+    Poza blokiem atomic ``fn`` wykonywana jest od razu. Zbiory są osobne
+    dla każdego połączenia (aliasu bazy) i klucza.
+    """
+    if not wartosci:
+        return
+    polaczenie = transaction.get_connection(using)
+    if not polaczenie.in_atomic_block:
+        fn(set(wartosci))
+        return
+    klucz = (polaczenie.alias, klucz)
+    _zbiory().setdefault(klucz, set()).update(wartosci)
+    transaction.on_commit(partial(_wykonaj, klucz, fn), using=polaczenie.alias)
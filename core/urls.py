@@ -33,6 +33,7 @@ urlpatterns = [
     ),
     path("protokol/wybor/", views.protokol_sesji_wybor, name="protokol_sesji_wybor"),
     path("protokol/pdf/", views.protokol_sesji_pdf_wybor, name="protokol_sesji_pdf_wybor"),
+    path("protokol/archiwum/", views.protokoly_archiwum_zip, name="protokoly_archiwum_zip"),
     # Landing page (public)
     path("", views.landing, name="landing"),
     # Panel główny (przekierowuje wg roli)
@@ -76,6 +77,11 @@ urlpatterns = [
         views.prezydium_uczestnicy,
         name="prezydium_uczestnicy",
     ),
+    path(
+        "prezydium/radni/statystyki/",
+        views.prezydium_statystyki_radnych,
+        name="prezydium_statystyki_radnych",
+    ),
     path(
         "prezydium/radni/<int:user_id>/",
         views.prezydium_uczestnik_szczegoly,
@@ -100,6 +106,17 @@ urlpatterns = [
         views.usun_sesje,
         name="usun_sesje",
     ),
+    path(
+        "sesje/<int:sesja_id>/zamknij/",
+        views.zamknij_sesje,
+        name="zamknij_sesje",
+    ),
+    path(
+        "sesje/<int:sesja_id>/opublikuj/",
+        views.opublikuj_sesje,
+        name="opublikuj_sesje",
+    ),
+    path("sesje/<int:sesja_id>/wyniki/", views.sesja_wyniki, name="sesja_wyniki"),
 
     # RADNY
     path("radny/", views.radny, name="radny"),
@@ -131,6 +148,7 @@ urlpatterns = [
     path("wyniki/", views.wyniki_publiczne, name="wyniki"),
     # Ekran sesji
     path("sesja/<int:sesja_id>/ekran/", views.sesja_ekran, name="sesja_ekran"),
+    path("sesja/<int:sesja_id>/ekran/token/", views.sesja_ekran_token_wystaw, name="sesja_ekran_token_wystaw"),
     path("api/sesja/<int:sesja_id>/aktywny-punkt/", views.api_aktywny_punkt, name="api_aktywny_punkt"),
     path(
         "punkty/<int:punkt_id>/ustaw-aktywny/",
@@ -157,6 +175,7 @@ path(
     path("wnioski/<int:wniosek_id>/pdf/", views.wniosek_pdf, name="wniosek_pdf"),
     path("prezydium/wnioski/", views.wnioski_prezidium, name="wnioski_prezidium"),
     path("prezydium/wnioski/<int:wniosek_id>/zatwierdz/", views.wniosek_zatwierdz, name="wniosek_zatwierdz"),
+    path("prezydium/wnioski/zbiorczo/", views.wnioski_zbiorczo, name="wnioski_zbiorczo"),
 
     # OBECNOŚĆ / QUORUM
     path("prezydium/obecnosci/", views.obecnosci_prezidium, name="obecnosci_prezidium"),
@@ -188,6 +207,29 @@ path(
     path("komisje/<int:komisja_id>/wnioski/", views.komisja_wnioski, name="komisja_wnioski"),
     path("prezydium/komisje/skrzynka/", views.komisja_skrzynka_rady, name="komisja_skrzynka_rady"),
     path("prezydium/komisje/wniosek/<int:wniosek_id>/wyslij/", views.komisja_wniosek_wyslij_do_rady, name="komisja_wniosek_wyslij_do_rady"),
+    path("prezydium/komisje/wnioski/zbiorczo/", views.komisja_wnioski_zbiorczo, name="komisja_wnioski_zbiorczo"),
+
+    # WYSZUKIWANIE
+    path("szukaj/", views.szukaj, name="szukaj"),
+
+    # ZADANIA W TLE (PDF / eksporty)
+    path("zadania/protokol/", views.zadanie_protokol_zlec, name="zadanie_protokol_zlec"),
+    path("zadania/wnioski/", views.zadanie_wnioski_zlec, name="zadanie_wnioski_zlec"),
+    path("zadania/archiwum/", views.zadanie_archiwum_zlec, name="zadanie_archiwum_zlec"),
+    path("zadania/<int:zadanie_id>/", views.zadanie_szczegoly, name="zadanie_szczegoly"),
+    path("zadania/<int:zadanie_id>/pobierz/", views.zadanie_pobierz, name="zadanie_pobierz"),
+    path("api/zadania/<int:zadanie_id>/", views.api_zadanie_status, name="api_zadanie_status"),
+
+    # METRYKI ŻĄDAŃ (administrator)
+    path("administrator/metryki/", views.metryki, name="metryki"),
+
+    # PANEL WYDAJNOŚCI (prezydium / operator)
+    path("prezydium/wydajnosc/", views.prezydium_wydajnosc, name="prezydium_wydajnosc"),
+    path("api/prezydium/wydajnosc/", views.api_prezydium_wydajnosc, name="api_prezydium_wydajnosc"),
+
+    # PROFILE ŻĄDAŃ (administrator, ?_profil=1)
+    path("administrator/profile/", views.profile_lista, name="profile_lista"),
+    path("administrator/profile/<str:nazwa>/", views.profil_szczegoly, name="profil_szczegoly"),
 
     # ADMINISTRATOR – panel sterowania sesją (jedno miejsce)
     path(
@@ -199,6 +241,8 @@ path(
     # Łatwy dostęp do ekranu sesji
     path("ekran/sesja/", views.sesja_ekran_aktywna, name="sesja_ekran_aktywna"),
     path("ekran/sesja/<int:sesja_id>/", views.sesja_ekran, name="sesja_ekran_alias"),
+    # Ekran rzutnika z podpisanym tokenem (bez logowania)
+    path("ekran/t/<str:token>/", views.sesja_ekran_token, name="sesja_ekran_token"),
 ]
 
 # Serwowanie dokumentacji MKDocs jako statycznych plików
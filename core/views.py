@@ -6,49 +6,85 @@ from .permissions import require_manage_session
 # Panel wyboru sesji do generowania protokołu PDF
 from .models import Sesja
 
+
 # Wyświetlanie komunikatu na ekranie sesji bez punktu obrad
-from django.core.cache import cache
+def _sesja_komunikatu(dane):
+    """Sesja/KomisjaSesja wskazana parametrem ``sesja``/``komisja_sesja``; domyślnie aktywna sesja rady."""
+    from .models import KomisjaSesja
+
+    komisja_sesja_id = str(dane.get("komisja_sesja") or "")
+    sesja_id = str(dane.get("sesja") or "")
+    if komisja_sesja_id.isdigit():
+        return get_object_or_404(KomisjaSesja.objects.select_related("komisja"), id=komisja_sesja_id)
+    if sesja_id.isdigit():
+        return get_object_or_404(Sesja, id=sesja_id)
+    return Sesja.objects.filter(aktywna=True).order_by("-data").first()
+
+
+def _moze_ustawic_komunikat(user, sesja):
+    if isinstance(sesja, Sesja):
+        return _can_manage_session(user)
+    return _can_manage_session(user) or _can_manage_komisja(user, sesja.komisja)
+
+
+def _parametr_komunikatu(sesja):
+    """Parametr GET wskazujący kanał komunikatu danej sesji (np. ``sesja=5``)."""
+    klucz = "sesja" if isinstance(sesja, Sesja) else "komisja_sesja"
+    return f"{klucz}={sesja.id}"
+
 
 @login_required
 @require_http_methods(["GET", "POST"])
-@require_manage_session(on_fail="redirect", redirect_to="radny")
 def ekran_komunikat(request):
+    sesja = _sesja_komunikatu(request.POST if request.method == "POST" else request.GET)
+    if not (_moze_ustawic_komunikat(request.user, sesja) if sesja else _can_manage_session(request.user)):
+        return redirect("radny")
+
     komunikat = ""
-    if request.method == "POST":
-        if "usun_komunikat" in request.POST:
-            cache.set("ekran_komunikat_global", "", timeout=None)
-            komunikat = ""
+    if sesja is not None:
+        kanal = stan_wspolny.kanal_komunikatu(sesja)
+        if request.method == "POST":
+            if "usun_komunikat" in request.POST:
+                komunikat = ""
+            else:
+                komunikat = request.POST.get("komunikat", "")
+            stan_wspolny.ustaw_komunikat(kanal, komunikat)
         else:
-            komunikat = request.POST.get("komunikat", "")
-            cache.set("ekran_komunikat_global", komunikat, timeout=None)
-    else:
-        komunikat = cache.get("ekran_komunikat_global", "")
-    return render(request, "core/ekran_komunikat.html", {"komunikat": komunikat})
+            komunikat = stan_wspolny.komunikat(kanal)["tekst"]
+    elif request.method == "POST":
+        messages.warning(request, "Brak aktywnej sesji – komunikat nie został ustawiony.")
+    return render(request, "core/ekran_komunikat.html", {
+        "komunikat": komunikat,
+        "sesja": sesja,
+        "jest_komisja": sesja is not None and not isinstance(sesja, Sesja),
+    })
 
 # Widok publiczny ekranu komunikatu
 def ekran_komunikat_publiczny(request):
-    from django.core.cache import cache
-    komunikat = cache.get("ekran_komunikat_global", "")
+    sesja = _sesja_komunikatu(request.GET)
+    komunikat = stan_wspolny.komunikat(stan_wspolny.kanal_komunikatu(sesja))["tekst"] if sesja else ""
     return render(request, "core/ekran_komunikat_publiczny.html", {"komunikat": komunikat})
 
-# API endpoint to clear the global message (admin/prezydium only)
+# API endpoint to clear the session message (admin/prezydium or committee chair)
 from django.views.decorators.csrf import csrf_exempt
 @csrf_exempt
 @require_http_methods(["POST"])
 def api_ekran_komunikat_clear(request):
-    if not request.user.is_authenticated or not _can_manage_session(request.user):
+    sesja = _sesja_komunikatu(request.GET)
+    if not request.user.is_authenticated or sesja is None or not _moze_ustawic_komunikat(request.user, sesja):
         return JsonResponse({"ok": False, "error": "Brak uprawnień"}, status=403)
-    from django.core.cache import cache
-    cache.set("ekran_komunikat_global", "", timeout=None)
-    return JsonResponse({"ok": True})
+    wersja = stan_wspolny.ustaw_komunikat(stan_wspolny.kanal_komunikatu(sesja), "")
+    return JsonResponse({"ok": True, "wersja": wersja})
 
-# API endpoint for AJAX polling of the global message
+# API endpoint: treść komunikatu sesji; ekrany pobierają ją tylko po zmianie komunikat_wersja w stanie sesji
 from django.http import JsonResponse
 @require_http_methods(["GET"])
 def api_ekran_komunikat(request):
-    from django.core.cache import cache
-    komunikat = cache.get("ekran_komunikat_global", "")
-    return JsonResponse({"komunikat": komunikat})
+    sesja = _sesja_komunikatu(request.GET)
+    if sesja is None:
+        return JsonResponse({"komunikat": "", "wersja": 0})
+    stan = stan_wspolny.komunikat(stan_wspolny.kanal_komunikatu(sesja))
+    return JsonResponse({"komunikat": stan["tekst"], "wersja": stan["wersja"]})
 
 
 def custom_404(request, exception):
@@ -69,6 +105,9 @@ def custom_404(request, exception):
 def usun_punkt_obrad(request, punkt_id):
     punkt = get_object_or_404(PunktObrad, id=punkt_id)
     sesja = punkt.sesja
+    odmowa = _odmowa_dla_zamknietej(request, sesja)
+    if odmowa:
+        return odmowa
     sesja_id = sesja.id
     if sesja.aktywny_podpunkt_id and punkt.podpunkty.filter(id=sesja.aktywny_podpunkt_id).exists():
         sesja.aktywny_podpunkt = None
@@ -84,6 +123,9 @@ def usun_punkt_obrad(request, punkt_id):
 def przesun_punkt_obrad(request, punkt_id, kierunek):
     punkt = get_object_or_404(PunktObrad, id=punkt_id)
     sesja = punkt.sesja
+    odmowa = _odmowa_dla_zamknietej(request, sesja)
+    if odmowa:
+        return odmowa
     if kierunek == "up":
         poprzedni = (
             PunktObrad.objects.filter(sesja=sesja, numer__lt=punkt.numer)
@@ -121,23 +163,55 @@ def protokol_sesji_wybor(request):
 def protokol_sesji_pdf_wybor(request):
     sesja_id = request.GET.get("sesja_id")
     sesja = get_object_or_404(Sesja, id=sesja_id)
-    return _protokol_pdf_response_for_session(sesja)
+    return _protokol_pdf_cached_response(request, sesja)
+
+# Archiwum protokołów (ZIP) za rok lub zakres dat
+@login_required
+@require_manage_session(on_fail="forbidden")
+def protokoly_archiwum_zip(request):
+    from django.http import HttpResponseBadRequest, StreamingHttpResponse
+    from .archiwum import iter_archiwum_zip, sesje_w_zakresie, zakres_dat
+
+    try:
+        od, do = zakres_dat(
+            rok=request.GET.get("rok"),
+            od=request.GET.get("od"),
+            do=request.GET.get("do"),
+        )
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    sesja_ids = list(sesje_w_zakresie(od, do).values_list("id", flat=True))
+    # bez puli procesów w procesie serwera WWW – równolegle renderuje zadanie „archiwum” (W tle)
+    resp = StreamingHttpResponse(iter_archiwum_zip(sesja_ids, procesy=1), content_type="application/zip")
+    resp["Content-Disposition"] = f'attachment; filename="protokoly_{od.isoformat()}_{do.isoformat()}.zip"'
+    resp["Cache-Control"] = "no-store"
+    return resp
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from .models import Kandydat
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponseForbidden, HttpResponse
+from django.http import Http404, JsonResponse, HttpResponseForbidden, HttpResponse
 from django.views.decorators.http import require_http_methods, require_POST, require_GET
-from django.db.models import Count, Q, Prefetch
+from django.db.models import Case, Count, F, Q, Prefetch, Value, When, prefetch_related_objects
 from django.utils import timezone
 from datetime import datetime, date, time
-import re
-from django.utils.html import escape
 
-from .models import Sesja, PunktObrad, PodpunktObrad, Glosowanie, Glos, Wniosek, Komisja, KomisjaSesja, KomisjaPunktObrad, KomisjaPodpunktObrad, KomisjaWniosek, KomisjaGlosowanie, KomisjaGlos
+from .models import Sesja, PunktObrad, PodpunktObrad, Glosowanie, Glos, Wniosek, Komisja, KomisjaSesja, KomisjaPunktObrad, KomisjaPodpunktObrad, KomisjaWniosek, KomisjaGlosowanie, KomisjaGlos, IndeksWyszukiwania, StatystykaRadnego
 from .forms import SesjaCreateForm, PunktForm, PodpunktForm, GlosowanieForm, WniosekForm, KomisjaForm, KomisjaSesjaForm, KomisjaPunktForm, KomisjaPodpunktForm, KomisjaWniosekForm, KomisjaGlosowanieForm
 from accounts.models import Uzytkownik
+from .czlonkostwo import komisje_uzytkownika
+from .stronicowanie import chce_json, json_strony, strona_z_zadania
+from .opis import formatuj_inline, opis_html
+from . import metryki as rejestr_metryk
+from . import migawki
+from . import podsumowanie
+from .pdf_dokumenty import protokol_pdf_bytes, protokol_pdf_filename, wnioski_pdf_bytes
+from . import publikacja
+from . import stan_wspolny
+from . import statystyki
+from . import tokeny_ekranu
 from .permissions import (
     has_any_role,
     is_prezydium,
@@ -179,70 +253,58 @@ def _can_manage_komisja(user, komisja):
 def _can_view_komisja(user, komisja):
     if getattr(user, "rola", None) in {"administrator", "prezydium"}:
         return True
-    if user == komisja.przewodniczacy:
-        return True
-    return komisja.czlonkowie.filter(id=user.id).exists()
+    return komisja.id in komisje_uzytkownika(user)
 
 
 def _is_komisja_member(user, komisja):
-    if not getattr(user, "is_authenticated", False):
-        return False
-    if user == komisja.przewodniczacy:
-        return True
-    return komisja.czlonkowie.filter(id=user.id).exists()
+    # członek lub przewodniczący; zbiór komisji użytkownika jest w cache (core.czlonkostwo)
+    return komisja.id in komisje_uzytkownika(user)
 
 
-def _format_opis_inline(text):
-    rendered = escape(text)
-    rendered = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", rendered)
-    rendered = re.sub(r"\*(.+?)\*", r"<em>\1</em>", rendered)
-    rendered = re.sub(r"__(.+?)__", r"<u>\1</u>", rendered)
-    return rendered
+def _odmowa_dla_zamknietej(request, sesja, json=False):
+    """Odpowiedź odmowy dla zmian w zamkniętej sesji (jej stan jest zamrożony w migawce), inaczej None."""
+    if sesja is None or not sesja.jest_zamknieta:
+        return None
+    komunikat = "Sesja jest zamknięta – jej porządek obrad, głosowania i obecności nie mogą być zmieniane."
+    if json:
+        return JsonResponse({"error": komunikat}, status=409)
+    messages.error(request, komunikat)
+    return redirect("prezydium_sesje")
 
 
-def _format_punkt_opis_html(opis):
-    if not opis:
-        return ""
+def _sesja_na_liscie_json(sesja):
+    return {
+        "id": sesja.id,
+        "nazwa": sesja.nazwa,
+        "data": timezone.localtime(sesja.data).isoformat(),
+        "aktywna": sesja.aktywna,
+        "url_edycji": reverse("sesja_edytuj", args=[sesja.id]),
+    }
 
-    lines = (opis or "").replace("\r\n", "\n").replace("\r", "\n").split("\n")
-    html = []
-    in_list = False
-    paragraph_buffer = []
-
-    def flush_paragraph():
-        nonlocal paragraph_buffer
-        if paragraph_buffer:
-            html.append(f"<p>{'<br>'.join(paragraph_buffer)}</p>")
-            paragraph_buffer = []
-
-    for raw_line in lines:
-        line = raw_line.strip()
-        if not line:
-            flush_paragraph()
-            if in_list:
-                html.append("</ul>")
-                in_list = False
-            continue
-
-        list_match = re.match(r"^[-*•]\s+(.+)$", line)
-        if list_match:
-            flush_paragraph()
-            if not in_list:
-                html.append("<ul>")
-                in_list = True
-            html.append(f"<li>{_format_opis_inline(list_match.group(1))}</li>")
-            continue
-
-        if in_list:
-            html.append("</ul>")
-            in_list = False
-        paragraph_buffer.append(_format_opis_inline(line))
-
-    flush_paragraph()
-    if in_list:
-        html.append("</ul>")
 
-    return "".join(html)
+def _wniosek_json(w):
+    return {
+        "id": w.id,
+        "sygnatura": w.sygnatura,
+        "typ": w.typ,
+        "tresc": w.tresc,
+        "data": timezone.localtime(w.data).isoformat(),
+        "zatwierdzony": w.zatwierdzony,
+        "punkt": str(w.punkt_obrad) if w.punkt_obrad_id else None,
+    }
+
+
+def _komisja_wniosek_json(w):
+    return {
+        "id": w.id,
+        "komisja_id": w.komisja_id,
+        "typ": w.typ,
+        "tresc": w.tresc,
+        "data": timezone.localtime(w.data).isoformat(),
+        "autor": f"{w.autor.imie} {w.autor.nazwisko}",
+        "zatwierdzony_przez_prezydium": w.zatwierdzony_przez_prezydium,
+        "wyslany_do_rady": w.wyslany_do_rady,
+    }
 
 
 def _format_podpunkty_list_html(podpunkty):
@@ -251,258 +313,44 @@ def _format_podpunkty_list_html(podpunkty):
     html = ["<ul>"]
     for podpunkt in podpunkty:
         html.append(
-            f"<li><strong>{podpunkt.numer}.</strong> {_format_opis_inline(podpunkt.tytul)}</li>"
+            f"<li><strong>{podpunkt.numer}.</strong> {formatuj_inline(podpunkt.tytul)}</li>"
         )
     html.append("</ul>")
     return "".join(html)
 
-def _protokol_pdf_margins_mm():
-    from django.conf import settings
-
-    left = float(getattr(settings, "PROTOKOL_PDF_MARGIN_LEFT_MM", 20))
-    right = float(getattr(settings, "PROTOKOL_PDF_MARGIN_RIGHT_MM", 20))
-    top = float(getattr(settings, "PROTOKOL_PDF_MARGIN_TOP_MM", 20))
-    bottom = float(getattr(settings, "PROTOKOL_PDF_MARGIN_BOTTOM_MM", 20))
-    return left, right, top, bottom
-
-
-def _protokol_pick_latest_vote(glosowania):
-    if not glosowania:
-        return None
-    otwarte = [g for g in glosowania if g.otwarte]
-    source = otwarte if otwarte else glosowania
-    return source[0]
-
-
-def _protokol_vote_lines(glosowanie):
-    meta = (
-        f"Głosowanie: {glosowanie.nazwa} | "
-        f"Typ: {glosowanie.get_typ_display()} | "
-        f"Jawność: {glosowanie.get_jawnosc_display()} | "
-        f"Większość: {glosowanie.get_wiekszosc_display()}"
-    )
-    lines = [meta]
-
-    if glosowanie.typ == "kandydaci":
-        oddane = Glos.objects.filter(glosowanie=glosowanie, kandydat__isnull=False).count()
-        lines.append(f"Oddane głosy na kandydatów: {oddane}")
-
-        rows = (
-            Glos.objects
-            .filter(glosowanie=glosowanie, kandydat__isnull=False)
-            .values("kandydat_id")
-            .annotate(liczba=Count("id"))
-        )
-        counts = {row["kandydat_id"]: row["liczba"] for row in rows}
-
-        kandydaci = list(glosowanie.kandydaci.all().order_by("nazwisko", "imie"))
-        if kandydaci:
-            lines.append("Wyniki kandydatów:")
-            for k in kandydaci:
-                lines.append(f"- {k.nazwisko} {k.imie}: {counts.get(k.id, 0)}")
-        elif oddane > 0:
-            lines.append("Wyniki kandydatów:")
-            fallback = (
-                Glos.objects
-                .filter(glosowanie=glosowanie, kandydat__isnull=False)
-                .values("kandydat__nazwisko", "kandydat__imie")
-                .annotate(liczba=Count("id"))
-                .order_by("-liczba", "kandydat__nazwisko", "kandydat__imie")
-            )
-            for row in fallback:
-                lines.append(f"- {row['kandydat__nazwisko']} {row['kandydat__imie']}: {row['liczba']}")
-        else:
-            lines.append("Brak oddanych głosów.")
-
-        return lines
-
-    r = glosowanie.wynik_podsumowanie()
-    wynik = f"Za: {r['za']}  Przeciw: {r['przeciw']}  Wstrzymuje: {r['wstrzymuje']}"
-    if r.get("prog"):
-        wynik += f"  |  Próg: {r['prog']}"
-    wynik += f"  |  Wynik: {'PRZESZŁO' if r['przeszedl'] else 'NIE PRZESZŁO'}"
-    lines.append(wynik)
-    return lines
-
-
 def _protokol_pdf_response_for_session(sesja):
-    punkt_glosowania_qs = Glosowanie.objects.filter(podpunkt_obrad__isnull=True).order_by("-otwarte", "-utworzone", "-id")
-    podpunkt_glosowania_qs = Glosowanie.objects.filter(podpunkt_obrad__isnull=False).order_by("-otwarte", "-utworzone", "-id")
-    podpunkty_qs = PodpunktObrad.objects.order_by("numer").prefetch_related(
-        Prefetch("glosowania", queryset=podpunkt_glosowania_qs)
-    )
-    punkty = (
-        sesja.punkty
-        .prefetch_related(
-            Prefetch("glosowania", queryset=punkt_glosowania_qs),
-            Prefetch("podpunkty", queryset=podpunkty_qs),
-        )
-        .order_by("numer")
-    )
-
-    from io import BytesIO
-    from reportlab.lib.pagesizes import A4
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.units import mm
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    font_regular = "Helvetica"
-    font_bold = "Helvetica-Bold"
-    try:
-        import os
-        from django.conf import settings
-
-        font_path = os.path.join(settings.BASE_DIR, "core", "static", "core", "fonts", "DejaVuSans.ttf")
-        font_bold_path = os.path.join(settings.BASE_DIR, "core", "static", "core", "fonts", "DejaVuSans-Bold.ttf")
-        if os.path.exists(font_path):
-            pdfmetrics.registerFont(TTFont("DejaVuSans", font_path))
-            font_regular = "DejaVuSans"
-        if os.path.exists(font_bold_path):
-            pdfmetrics.registerFont(TTFont("DejaVuSans-Bold", font_bold_path))
-            font_bold = "DejaVuSans-Bold"
-    except Exception:
-        pass
-
-    margin_left_mm, margin_right_mm, margin_top_mm, margin_bottom_mm = _protokol_pdf_margins_mm()
-    margin_left = margin_left_mm * mm
-    margin_right = margin_right_mm * mm
-    margin_top = margin_top_mm * mm
-    margin_bottom = margin_bottom_mm * mm
-    usable_width = width - margin_left - margin_right
-
-    def new_page(y_start=None):
-        c.showPage()
-        y0 = (height - margin_top) if y_start is None else y_start
-        return y0
-
-    y = height - margin_top
-
-    def draw_wrapped_text(text, *, indent_mm=0, font_name=font_regular, font_size=9, line_step_mm=4.5, paragraph_gap_mm=0):
-        nonlocal y
-
-        if text is None:
-            return
-
-        c.setFont(font_name, font_size)
-        max_width = usable_width - (indent_mm * mm)
-        normalized = str(text).replace("\r\n", "\n").replace("\r", "\n")
-
-        for para in normalized.split("\n"):
-            para = para.strip()
-            if not para:
-                y -= line_step_mm * mm
-                continue
-
-            while para:
-                max_chars = len(para)
-                for i in range(1, len(para) + 1):
-                    if c.stringWidth(para[:i], font_name, font_size) > max_width:
-                        max_chars = i - 1
-                        break
-                if max_chars <= 0:
-                    max_chars = 1
-
-                line = para[:max_chars]
-                para = para[max_chars:].lstrip()
-
-                if y < margin_bottom:
-                    y = new_page()
-                    c.setFont(font_name, font_size)
-
-                c.drawString(margin_left + (indent_mm * mm), y, line)
-                y -= line_step_mm * mm
-
-        if paragraph_gap_mm:
-            y -= paragraph_gap_mm * mm
-
-    def draw_vote(glosowanie, *, indent_mm):
-        nonlocal y
-        if glosowanie is None:
-            draw_wrapped_text("Brak głosowania", indent_mm=indent_mm, font_name=font_regular, font_size=9, line_step_mm=6)
-            return
-
-        for idx, line in enumerate(_protokol_vote_lines(glosowanie)):
-            draw_wrapped_text(
-                line,
-                indent_mm=indent_mm,
-                font_name=font_regular,
-                font_size=9,
-                line_step_mm=5 if glosowanie.typ == "kandydaci" and idx > 0 else 4.8,
-            )
-        y -= 3 * mm
-
-    c.setFont(font_bold, 14)
-    c.drawString(margin_left, y, "Protokół z posiedzenia")
-    y -= 8 * mm
-
-    c.setFont(font_bold, 12)
-    c.drawString(margin_left, y, sesja.nazwa)
-    y -= 6 * mm
-
-    c.setFont(font_regular, 10)
-    c.drawString(margin_left, y, f"Data: {timezone.localtime(sesja.data).strftime('%Y-%m-%d %H:%M')}")
-    y -= 6 * mm
-
-    c.setFont(font_regular, 9)
-    c.drawString(margin_left, y, f"Wygenerowano: {timezone.now().strftime('%Y-%m-%d %H:%M')}")
-    y -= 10 * mm
-
-    c.setFont(font_bold, 11)
-    c.drawString(margin_left, y, "Porządek obrad, podpunkty i wyniki głosowań")
-    y -= 8 * mm
-
-    for p in punkty:
-        if y < margin_bottom:
-            y = new_page()
-
-        c.setFont(font_bold, 10)
-        c.drawString(margin_left, y, f"{p.numer}. {p.tytul}")
-        y -= 5 * mm
-
-        if p.opis:
-            draw_wrapped_text(p.opis, indent_mm=2, font_name=font_regular, font_size=9, line_step_mm=4.5, paragraph_gap_mm=2)
-
-        punkt_gl = _protokol_pick_latest_vote(list(p.glosowania.all()))
-        draw_vote(punkt_gl, indent_mm=2)
-
-        for podpunkt in p.podpunkty.all().order_by("numer"):
-            if y < margin_bottom:
-                y = new_page()
-
-            c.setFont(font_bold, 9)
-            c.drawString(margin_left + 2 * mm, y, f"{p.numer}.{podpunkt.numer}. {podpunkt.tytul}")
-            y -= 4.5 * mm
-
-            if podpunkt.opis:
-                draw_wrapped_text(podpunkt.opis, indent_mm=4, font_name=font_regular, font_size=9, line_step_mm=4.2, paragraph_gap_mm=1)
-
-            podpunkt_gl = _protokol_pick_latest_vote(list(podpunkt.glosowania.all()))
-            draw_vote(podpunkt_gl, indent_mm=4)
-
-        y -= 2 * mm
-
-    c.showPage()
-    c.save()
-
-    pdf = buffer.getvalue()
-    buffer.close()
-
-    safe_name = (sesja.nazwa or "sesja").replace("/", "-")
-    filename = f"protokol_{safe_name}_{timezone.localtime(sesja.data).strftime('%Y-%m-%d')}.pdf"
+    pdf = protokol_pdf_bytes(sesja)
 
     resp = HttpResponse(pdf, content_type="application/pdf")
-    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
+    resp["Content-Disposition"] = f'attachment; filename="{protokol_pdf_filename(sesja)}"'
     resp["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
     resp["Pragma"] = "no-cache"
     resp["Expires"] = "0"
     return resp
 
 
+def _protokol_pdf_cached_response(request, sesja):
+    """Protokół z cache adresowanego treścią; PDF renderowany jest tylko po zmianie danych sesji."""
+    from django.http import FileResponse, HttpResponseNotModified
+
+    from .pdf_cache import get_or_render, protokol_fingerprint
+
+    fingerprint = protokol_fingerprint(sesja)
+    etag = f'"{fingerprint}"'
+    if etag in [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]:
+        resp = HttpResponseNotModified()
+    else:
+        resp = FileResponse(
+            get_or_render(sesja.id, fingerprint, lambda: protokol_pdf_bytes(sesja)),
+            as_attachment=True,
+            filename=protokol_pdf_filename(sesja),
+            content_type="application/pdf",
+        )
+    resp["ETag"] = etag
+    resp["Cache-Control"] = "private, no-cache"
+    return resp
+
+
 def _radny_like_qs():
     """Queryset of users who are allowed to vote like councillors (excluding prezydium)."""
     return Uzytkownik.objects.filter(rola__in=["radny", "administrator"])
@@ -573,23 +421,16 @@ def e_identyfikator(request):
 def prezydium_dashboard(request):
     """
     Prosty dashboard: pokazuje najbliższą sesję, liczbę punktów i otwartych głosowań.
-    """
-    najblizsza = (
-        Sesja.objects.order_by("data")
-        .prefetch_related("punkty__glosowania")
-        .first()
-    )
 
-    liczba_sesji = Sesja.objects.count()
-    liczba_punktow = PunktObrad.objects.count()
-    liczba_glosowan_otwartych = Glosowanie.objects.filter(otwarte=True).count()
+    Liczniki pochodzą z cache (core.podsumowanie); najbliższa sesja to
+    pierwsza nieusunięta z datą od teraz (indeks sesja_data_idx) wraz
+    z liczbą jej punktów.
+    """
+    najblizsza = Sesja.objects.filter(data__gte=timezone.now(), jest_usunieta=False).order_by("data").first()
+    if najblizsza is not None:
+        najblizsza.liczba_punktow = najblizsza.punkty.count()
 
-    context = {
-        "najblizsza": najblizsza,
-        "liczba_sesji": liczba_sesji,
-        "liczba_punktow": liczba_punktow,
-        "liczba_glosowan_otwartych": liczba_glosowan_otwartych,
-    }
+    context = {"najblizsza": najblizsza, **podsumowanie.liczniki()}
     return render(request, "core/prezydium_dashboard.html", context)
 
 
@@ -598,9 +439,12 @@ def prezydium_dashboard(request):
 def prezydium_sesje(request):
     """
     Lista wszystkich sesji z podstawowymi akcjami (bez szczegółowej edycji).
+    Stronicowana kluczowo od najnowszej; ?format=json zwraca kolejną porcję.
     """
-    sesje = Sesja.objects.all().order_by("-data")
-    return render(request, "core/prezydium_sesje.html", {"sesje": sesje})
+    sesje = strona_z_zadania(request, Sesja.objects.all())
+    if chce_json(request):
+        return json_strony(sesje, _sesja_na_liscie_json)
+    return render(request, "core/prezydium_sesje.html", {"sesje": sesje, "strona": sesje})
 
 
 @login_required
@@ -621,6 +465,25 @@ def sesja_nowa(request):
     return render(request, "core/sesja_nowa.html", {"form": form})
 
 
+def _renumeruj_punkty(punkty):
+    """Nadaje punktom i podpunktom kolejne numery 1..n; zwraca True, jeśli coś zapisano.
+
+    Korzysta z podpunktów pobranych przez prefetch_related("podpunkty") – bez zapytania na punkt.
+    """
+    zmieniono = False
+    for idx, punkt in enumerate(punkty, start=1):
+        if punkt.numer != idx:
+            punkt.numer = idx
+            punkt.save(update_fields=["numer"])
+            zmieniono = True
+        for pidx, podpunkt in enumerate(sorted(punkt.podpunkty.all(), key=lambda p: p.numer), start=1):
+            if podpunkt.numer != pidx:
+                podpunkt.numer = pidx
+                podpunkt.save(update_fields=["numer"])
+                zmieniono = True
+    return zmieniono
+
+
 @login_required
 @require_manage_session(on_fail="redirect", redirect_to="radny")
 def sesja_edytuj(request, sesja_id):
@@ -630,12 +493,16 @@ def sesja_edytuj(request, sesja_id):
     - dodawanie głosowań do punktów.
     """
     sesja = get_object_or_404(Sesja, id=sesja_id)
+    odmowa = _odmowa_dla_zamknietej(request, sesja)
+    if odmowa:
+        return odmowa
     from .models import Obecnosc
 
     punkt_form = PunktForm()
     podpunkt_form = PodpunktForm()
     glosowanie_form = GlosowanieForm()
     if request.method == "POST":
+        sesja.wyczysc_wygasla_przerwe()
         if "zapisz_sesje" in request.POST:
             data_raw = (request.POST.get("data") or "").strip()
             czas_raw = (request.POST.get("czas") or "").strip()
@@ -1027,8 +894,7 @@ def sesja_edytuj(request, sesja_id):
                 obj = obecnosci_map.get(osoba.id)
                 if obj:
                     if obj.obecny != obecny_flag:
-                        obj.obecny = obecny_flag
-                        obj.save(update_fields=["obecny", "timestamp"])
+                        obj.ustaw(obecny_flag)
                 else:
                     Obecnosc.objects.create(
                         sesja=sesja,
@@ -1041,36 +907,17 @@ def sesja_edytuj(request, sesja_id):
 
     punkty = list(sesja.punkty.prefetch_related("glosowania", "podpunkty", "podpunkty__glosowania").order_by("numer"))
     # Automatyczna renumeracja punktów (unikalne, rosnące numery)
-    for idx, punkt in enumerate(punkty, start=1):
-        if punkt.numer != idx:
-            punkt.numer = idx
-            punkt.save(update_fields=["numer"])
-        podpunkty = list(punkt.podpunkty.order_by("numer"))
-        for pidx, podpunkt in enumerate(podpunkty, start=1):
-            if podpunkt.numer != pidx:
-                podpunkt.numer = pidx
-                podpunkt.save(update_fields=["numer"])
-    # Ponownie pobierz punkty po renumeracji
-    punkty = list(sesja.punkty.prefetch_related("glosowania", "podpunkty", "podpunkty__glosowania").order_by("numer"))
+    if _renumeruj_punkty(punkty):
+        # Ponownie pobierz punkty po renumeracji
+        punkty = list(sesja.punkty.prefetch_related("glosowania", "podpunkty", "podpunkty__glosowania").order_by("numer"))
     aktywny_punkt = None
     for punkt in punkty:
         if getattr(punkt, "aktywny", False):
             aktywny_punkt = punkt
             break
 
-    # Przerwa info for template
-    przerwa_trwa = False
-    przerwa_pozostalo = 0
-    if sesja.przerwa_start and sesja.przerwa_czas:
-        elapsed = (timezone.now() - sesja.przerwa_start).total_seconds()
-        if elapsed < sesja.przerwa_czas:
-            przerwa_trwa = True
-            przerwa_pozostalo = int(sesja.przerwa_czas - elapsed)
-        else:
-            # Przerwa zakończona, wyczyść
-            sesja.przerwa_start = None
-            sesja.przerwa_czas = None
-            sesja.save(update_fields=["przerwa_start", "przerwa_czas"])
+    # Przerwa info for template (bez zapisu – wygasłą przerwę czyści POST / uzgodnij_stan_sesji)
+    przerwa_trwa, przerwa_pozostalo = sesja.stan_przerwy()
 
     uprawnieni_qs = _uprawnieni_do_glosowania_qs().order_by("nazwisko", "imie")
     uprawnieni = list(uprawnieni_qs)
@@ -1123,6 +970,9 @@ def ustaw_sesje_aktywna(request, sesja_id):
     Ustawia daną sesję jako aktywną, inne sesje dezaktywuje.
     """
     sesja = get_object_or_404(Sesja, id=sesja_id)
+    if sesja.jest_zamknieta:
+        messages.error(request, "Zamkniętej sesji nie można ponownie aktywować.")
+        return redirect("prezydium_sesje")
     Sesja.objects.update(aktywna=False)
     sesja.aktywna = True
     sesja.save()
@@ -1151,6 +1001,36 @@ def usun_sesje(request, sesja_id):
     return redirect("prezydium_sesje")
 
 
+@login_required
+@require_POST
+@require_manage_session(on_fail="redirect", redirect_to="radny")
+def zamknij_sesje(request, sesja_id):
+    sesja = get_object_or_404(Sesja, id=sesja_id)
+    if sesja.jest_zamknieta:
+        messages.info(request, "Sesja jest już zamknięta.")
+    elif sesja.aktywna and Glosowanie.objects.filter(punkt_obrad__sesja=sesja, otwarte=True).exists():
+        messages.error(request, "Sesja ma otwarte głosowanie – zamknij je przed zamknięciem sesji.")
+    else:
+        sesja.zamknij()
+        messages.success(request, "Sesja została zamknięta, a jej wyniki zapisane w archiwum.")
+    return redirect("prezydium_sesje")
+
+
+@login_required
+@require_POST
+@require_manage_session(on_fail="redirect", redirect_to="radny")
+def opublikuj_sesje(request, sesja_id):
+    """Włącza/wyłącza publikację wyników; pliki statyczne tworzy core.publikacja po zapisie."""
+    sesja = get_object_or_404(Sesja, id=sesja_id)
+    sesja.opublikowana = not sesja.opublikowana
+    sesja.save(update_fields=["opublikowana"])
+    if sesja.opublikowana:
+        messages.success(request, f"Wyniki sesji opublikowano pod adresem {publikacja.url_sesji(sesja.id)}")
+    else:
+        messages.success(request, "Publikacja wyników sesji została wycofana.")
+    return redirect("prezydium_sesje")
+
+
 @login_required
 @require_manage_session(on_fail="redirect", redirect_to="radny")
 def porzadek_obrad_prezidium(request):
@@ -1160,6 +1040,9 @@ def porzadek_obrad_prezidium(request):
     sesja = Sesja.objects.filter(aktywna=True).prefetch_related("punkty").first()
 
     if request.method == "POST" and sesja:
+        odmowa = _odmowa_dla_zamknietej(request, sesja)
+        if odmowa:
+            return odmowa
         form = PunktForm(request.POST)
         if form.is_valid():
             punkt = form.save(commit=False)
@@ -1184,19 +1067,25 @@ def prezidium_panel(request):
     Dotychczasowy widok głosowań prezydium – lista sesji, punktów i głosowań + otwieranie/zamykanie.
     Zostaje jako zakładka „Głosowania”.
     """
-    sesje = Sesja.objects.all().prefetch_related("punkty__glosowania")
-    return render(request, "core/prezidium.html", {"sesje": sesje})
+    sesje = strona_z_zadania(request, Sesja.objects.all(), na_stronie=10)
+    # punkty i głosowania tylko dla sesji z bieżącej strony
+    prefetch_related_objects(sesje.obiekty, "punkty__glosowania")
+    if chce_json(request):
+        return json_strony(sesje, _sesja_na_liscie_json)
+    return render(request, "core/prezidium.html", {"sesje": sesje, "strona": sesje})
 
 
 @login_required
 @require_manage_session(on_fail="redirect", redirect_to="radny")
 def nadchodzace_sesje_prezidium(request):
     """
-    Prosta lista sesji (np. aktywnych lub wszystkich) – wykorzystasz w menu 'Nadchodzące sesje'.
-    Na razie pokazuje wszystkie sesje posortowane rosnąco po dacie.
+    Lista nadchodzących sesji (menu 'Nadchodzące sesje') – od najbliższej, rosnąco po dacie.
     """
-    sesje = Sesja.objects.all().order_by("data")
-    return render(request, "core/nadchodzace_sesje_prezidium.html", {"sesje": sesje})
+    nadchodzace = Sesja.objects.filter(data__gte=timezone.now(), jest_usunieta=False)
+    sesje = strona_z_zadania(request, nadchodzace, malejaco=False)
+    if chce_json(request):
+        return json_strony(sesje, _sesja_na_liscie_json)
+    return render(request, "core/nadchodzace_sesje_prezidium.html", {"sesje": sesje, "strona": sesje})
 
 
 @login_required
@@ -1225,7 +1114,58 @@ def prezydium_uczestnik_szczegoly(request, user_id: int):
         rola__in=["radny", "administrator", "prezydium"],
     )
 
-    return render(request, "core/prezydium_uczestnik_szczegoly.html", {"radny": radny})
+    # liczniki z tabeli StatystykaRadnego – kilka wierszy niezależnie od liczby głosów
+    wiersze = list(radny.statystyki.all())
+    razem = StatystykaRadnego(uzytkownik=radny, kadencja="Razem")
+    for pole in statystyki.LICZNIKI:
+        setattr(razem, pole, sum(getattr(w, pole) for w in wiersze))
+
+    return render(request, "core/prezydium_uczestnik_szczegoly.html", {
+        "radny": radny,
+        "statystyki": wiersze,
+        "razem": razem if len(wiersze) > 1 else None,
+    })
+
+
+@login_required
+@require_prezydium_or_admin(on_fail="forbidden")
+def prezydium_statystyki_radnych(request):
+    """Zestawienie obecności, głosów i wniosków radnych w wybranej kadencji."""
+    dostepne = [etykieta for etykieta, _ in statystyki.kadencje()]
+    kadencja = request.GET.get("kadencja")
+    if kadencja is None:
+        kadencja = statystyki.biezaca_kadencja()
+    radni = list(
+        _uprawnieni_do_glosowania_qs()
+        .order_by("nazwisko", "imie")
+        .prefetch_related(Prefetch(
+            "statystyki",
+            queryset=StatystykaRadnego.objects.filter(kadencja=kadencja),
+            to_attr="statystyki_kadencji",
+        ))
+    )
+    for r in radni:
+        r.statystyka = r.statystyki_kadencji[0] if r.statystyki_kadencji else StatystykaRadnego(uzytkownik=r, kadencja=kadencja)
+
+    if chce_json(request):
+        return JsonResponse({
+            "kadencja": kadencja,
+            "radni": [
+                {
+                    "id": r.id,
+                    "imie": r.imie,
+                    "nazwisko": r.nazwisko,
+                    **{pole: getattr(r.statystyka, pole) for pole in statystyki.LICZNIKI},
+                    "frekwencja": r.statystyka.frekwencja,
+                }
+                for r in radni
+            ],
+        })
+    return render(request, "core/prezydium_statystyki_radnych.html", {
+        "radni": radni,
+        "kadencja": kadencja,
+        "kadencje": dostepne,
+    })
 
 
 # --------------------------------------------------
@@ -1307,7 +1247,10 @@ def toggle_glosowanie(request, glosowanie_id):
     Preferowane jest POST (bezpieczniejsze). Dla kompatybilności
     stary JS używający GET nadal zadziała.
     """
-    glosowanie = get_object_or_404(Glosowanie, id=glosowanie_id)
+    glosowanie = get_object_or_404(Glosowanie.objects.select_related("punkt_obrad__sesja"), id=glosowanie_id)
+    odmowa = _odmowa_dla_zamknietej(request, glosowanie.punkt_obrad.sesja, json=True)
+    if odmowa:
+        return odmowa
     glosowanie.otwarte = not glosowanie.otwarte
     glosowanie.save(update_fields=["otwarte"])
     return JsonResponse({"otwarte": glosowanie.otwarte})
@@ -1321,7 +1264,7 @@ def oddaj_glos(request, glosowanie_id):
 
     Zwraca JSON dla żądań AJAX, a dla zwykłych POST-ów zwraca czytelny komunikat HTML.
     """
-    glosowanie = get_object_or_404(Glosowanie, id=glosowanie_id)
+    glosowanie = get_object_or_404(Glosowanie.objects.select_related("punkt_obrad__sesja"), id=glosowanie_id)
 
     def is_ajax(req):
         return req.headers.get("x-requested-with") == "XMLHttpRequest"
@@ -1332,7 +1275,8 @@ def oddaj_glos(request, glosowanie_id):
             return JsonResponse({"error": "Brak uprawnień do głosowania"}, status=403)
         return HttpResponseForbidden("Brak uprawnień do głosowania")
 
-    if not glosowanie.otwarte:
+    # głosowanie w zamkniętej sesji jest zamrożone, nawet jeśli zostało otwarte
+    if not glosowanie.otwarte or glosowanie.punkt_obrad.sesja.jest_zamknieta:
         if is_ajax(request):
             return JsonResponse({"error": "Głosowanie zamknięte"}, status=400)
         messages.error(request, "Głosowanie jest zamknięte.")
@@ -1347,11 +1291,7 @@ def oddaj_glos(request, glosowanie_id):
                 return JsonResponse({"error": "Nieprawidłowy kandydat"}, status=400)
             messages.error(request, "Nieprawidłowy kandydat.")
             return redirect("panel")
-        glos, created = Glos.objects.get_or_create(
-            glosowanie=glosowanie,
-            uzytkownik=request.user,
-            defaults={"kandydat": kandydat},
-        )
+        defaults = {"kandydat": kandydat}
     else:
         wartosc = request.POST.get("glos")
         if wartosc not in ["za", "przeciw", "wstrzymuje"]:
@@ -1359,10 +1299,13 @@ def oddaj_glos(request, glosowanie_id):
                 return JsonResponse({"error": "Nieprawidłowa wartość głosu"}, status=400)
             messages.error(request, "Nieprawidłowa wartość głosu.")
             return redirect("panel")
+        defaults = {"glos": wartosc}
+
+    with rejestr_metryk.czas_zdarzenia(rejestr_metryk.zapis_glosu(glosowanie.id)):
         glos, created = Glos.objects.get_or_create(
             glosowanie=glosowanie,
             uzytkownik=request.user,
-            defaults={"glos": wartosc},
+            defaults=defaults,
         )
 
     if not created:
@@ -1378,13 +1321,27 @@ def oddaj_glos(request, glosowanie_id):
     return redirect("panel")
 
 
+def _glosy_kandydatow(glosowanie):
+    """{kandydat_id: liczba głosów} w głosowaniu – jedno zapytanie zamiast COUNT na kandydata."""
+    rows = (
+        Glos.objects
+        .filter(glosowanie=glosowanie, kandydat__isnull=False)
+        .values("kandydat_id")
+        .annotate(liczba=Count("id"))
+    )
+    return {row["kandydat_id"]: row["liczba"] for row in rows}
+
+
 def api_wyniki(request, glosowanie_id):
     """
     API z podsumowaniem wyników głosowania (Za / Przeciw / Wstrzymuję).
 
     Dla głosowań tajnych: w trakcie (otwarte=True) zwracamy zagregowaną informację bez rozbicia.
     """
-    glosowanie = get_object_or_404(Glosowanie, id=glosowanie_id)
+    glosowanie = get_object_or_404(Glosowanie.objects.select_related("punkt_obrad"), id=glosowanie_id)
+    odmowa = tokeny_ekranu.odmowa_dostepu(request, "sesja", glosowanie.punkt_obrad.sesja_id)
+    if odmowa:
+        return odmowa
 
     # Tajne: w trakcie nie ujawniamy wyników szczegółowych
     if (glosowanie.jawnosc == "tajne" and glosowanie.otwarte and glosowanie.typ != "kandydaci"):
@@ -1402,10 +1359,11 @@ def api_wyniki(request, glosowanie_id):
             kandydaci = glosowanie.kandydaci.all().order_by("nazwisko", "imie")
         else:
             kandydaci = glosowanie.punkt_obrad.kandydaci.all().order_by("nazwisko", "imie")
+        glosy = _glosy_kandydatow(glosowanie)
         wyniki_kandydaci = []
         suma_glosow = 0
         for kandydat in kandydaci:
-            liczba = kandydat.glos_set.filter(glosowanie=glosowanie).count()
+            liczba = glosy.get(kandydat.id, 0)
             suma_glosow += liczba
             wyniki_kandydaci.append({
                 "id": kandydat.id,
@@ -1455,7 +1413,10 @@ def api_lista_glosow_jawne(request, glosowanie_id):
 
     Dla głosowań tajnych zwraca 403.
     """
-    glosowanie = get_object_or_404(Glosowanie, id=glosowanie_id)
+    glosowanie = get_object_or_404(Glosowanie.objects.select_related("punkt_obrad"), id=glosowanie_id)
+    odmowa = tokeny_ekranu.odmowa_dostepu(request, "sesja", glosowanie.punkt_obrad.sesja_id)
+    if odmowa:
+        return odmowa
     if glosowanie.jawnosc != "jawne":
         return JsonResponse({"error": "Głosowanie nie jest jawne"}, status=403)
 
@@ -1495,6 +1456,7 @@ def wyniki_publiczne(request, sesja_id=None):
         punkty = sesja.punkty.prefetch_related(
             "glosowania",
             "glosowania__glos_set",
+            "kandydaci__glos_set",
         )
     else:
         punkty = []
@@ -1502,37 +1464,89 @@ def wyniki_publiczne(request, sesja_id=None):
     return render(request, "core/wyniki.html", {"punkty": punkty})
 
 
+@login_required
+def sesja_wyniki(request, sesja_id):
+    """Wyniki sesji: porządek obrad, wyniki głosowań, listy imienne i obecność.
+
+    Zamknięta sesja czytana jest z migawki (core.migawki), pozostałe z tabel bieżących.
+    """
+    sesja = get_object_or_404(Sesja, id=sesja_id, jest_usunieta=False)
+    kontekst = migawki.kontekst_wynikow(migawki.dane_sesji(sesja))
+    return render(request, "core/sesja_wyniki.html", {"sesja": sesja, **kontekst})
+
+
+def _komunikat_ekranu(sesja):
+    komunikat = stan_wspolny.komunikat(stan_wspolny.kanal_komunikatu(sesja))
+    parametr = _parametr_komunikatu(sesja)
+    return {
+        "komunikat": komunikat["tekst"],
+        "komunikat_wersja": komunikat["wersja"],
+        "api_komunikat_url": f"{reverse('api_ekran_komunikat')}?{parametr}",
+        "api_komunikat_clear_url": f"{reverse('api_ekran_komunikat_clear')}?{parametr}",
+    }
+
+
+def _kontekst_ekranu(sesja, *, is_admin, token=""):
+    if isinstance(sesja, Sesja):
+        przerwa_trwa, przerwa_pozostalo = sesja.stan_przerwy()
+        api = {
+            "api_aktywny_punkt_url": reverse("api_aktywny_punkt", args=[sesja.id]),
+            "api_wyniki_prefix": "/api/wyniki/",
+            "api_glosy_jawne_prefix": "/api/glosy-jawne/",
+        }
+    else:
+        przerwa_trwa, przerwa_pozostalo = False, 0
+        api = {
+            "api_aktywny_punkt_url": reverse("api_komisja_aktywny_punkt", args=[sesja.id]),
+            "api_wyniki_prefix": "/api/komisja/wyniki/",
+            "api_glosy_jawne_prefix": "/api/komisja/glosy-jawne/",
+        }
+    return {
+        "sesja": sesja,
+        **_komunikat_ekranu(sesja),
+        "is_admin": is_admin,
+        "przerwa_trwa": przerwa_trwa,
+        "przerwa_pozostalo": przerwa_pozostalo,
+        "token": token,
+        **api,
+    }
+
+
 @login_required
 def sesja_ekran(request, sesja_id):
     """
     Publiczny ekran sesji wyświetlany na rzutniku w sali obrad.
     """
-    from django.core.cache import cache
     sesja = get_object_or_404(Sesja, id=sesja_id)
-    komunikat = cache.get("ekran_komunikat_global", "")
     is_admin = request.user.is_authenticated and _can_manage_session(request.user)
-    przerwa_trwa = False
-    przerwa_pozostalo = 0
-    if sesja.przerwa_start and sesja.przerwa_czas:
-        from django.utils import timezone
-        elapsed = (timezone.now() - sesja.przerwa_start).total_seconds()
-        if elapsed < sesja.przerwa_czas:
-            przerwa_trwa = True
-            przerwa_pozostalo = int(sesja.przerwa_czas - elapsed)
-        else:
-            sesja.przerwa_start = None
-            sesja.przerwa_czas = None
-            sesja.save(update_fields=["przerwa_start", "przerwa_czas"])
-    return render(request, "core/sesja_ekran.html", {
-        "sesja": sesja,
-        "komunikat": komunikat,
-        "is_admin": is_admin,
-        "przerwa_trwa": przerwa_trwa,
-        "przerwa_pozostalo": przerwa_pozostalo,
-        "api_aktywny_punkt_url": reverse("api_aktywny_punkt", args=[sesja.id]),
-        "api_wyniki_prefix": "/api/wyniki/",
-        "api_glosy_jawne_prefix": "/api/glosy-jawne/",
-    })
+    return render(request, "core/sesja_ekran.html", _kontekst_ekranu(sesja, is_admin=is_admin))
+
+
+def sesja_ekran_token(request, token):
+    """Ekran rzutnika otwierany tokenem (core.tokeny_ekranu) – bez logowania.
+
+    Widok ani odpytywane przez ekran endpointy stanu nie sięgają do
+    request.user, więc nie ładują sesji ani użytkownika z bazy.
+    """
+    odczyt = tokeny_ekranu.odczytaj(token)
+    if odczyt is None:
+        return HttpResponseForbidden("Nieprawidłowy lub wygasły token ekranu")
+    rodzaj, sesja_id = odczyt
+    if rodzaj == "sesja":
+        sesja = get_object_or_404(Sesja, id=sesja_id)
+    else:
+        sesja = get_object_or_404(KomisjaSesja, id=sesja_id)
+    return render(request, "core/sesja_ekran.html", _kontekst_ekranu(sesja, is_admin=False, token=token))
+
+
+@login_required
+@require_POST
+@require_manage_session(on_fail="redirect", redirect_to="radny")
+def sesja_ekran_token_wystaw(request, sesja_id):
+    sesja = get_object_or_404(Sesja, id=sesja_id)
+    url = request.build_absolute_uri(reverse("sesja_ekran_token", args=[tokeny_ekranu.wystaw(sesja)]))
+    messages.success(request, f"Link ekranu bez logowania (tylko odczyt): {url}")
+    return redirect("prezydium_agenda")
 
 
 @login_required
@@ -1553,12 +1567,21 @@ def sesja_ekran_aktywna(request):
     return redirect("sesja_ekran", sesja_id=sesja.id)
 
 
+def _stan_ekranu(sesja, data):
+    """Stan ekranu z wersją komunikatu sesji – treść komunikatu ekran pobiera tylko po jej zmianie."""
+    data["komunikat_wersja"] = stan_wspolny.komunikat(stan_wspolny.kanal_komunikatu(sesja))["wersja"]
+    return JsonResponse(data)
+
+
 @require_GET
 def api_aktywny_punkt(request, sesja_id):
     """
     Zwraca dane aktywnego punktu i ewentualnego głosowania do ekranu sesji.
     Zakładamy, że w danej chwili max 1 punkt jest „aktywny”.
     """
+    odmowa = tokeny_ekranu.odmowa_dostepu(request, "sesja", sesja_id)
+    if odmowa:
+        return odmowa
     sesja = get_object_or_404(Sesja, id=sesja_id)
 
     aktywny_podpunkt = None
@@ -1572,9 +1595,7 @@ def api_aktywny_punkt(request, sesja_id):
             punkt_nadrzedny__sesja=sesja,
             aktywny=True,
         ).prefetch_related("glosowania").order_by("punkt_nadrzedny__numer", "numer").first()
-        if aktywny_podpunkt is not None:
-            sesja.aktywny_podpunkt = aktywny_podpunkt
-            sesja.save(update_fields=["aktywny_podpunkt"])
+        # bez zapisu wskaźnika – endpoint jest odpytywany przez ekrany; uzgadnia go uzgodnij_stan_sesji
 
     if aktywny_podpunkt is not None:
         punkt = aktywny_podpunkt.punkt_nadrzedny
@@ -1591,7 +1612,7 @@ def api_aktywny_punkt(request, sesja_id):
             "tytul": aktywny_podpunkt.tytul,
             "podtytul": f"Punkt {punkt.numer}. {punkt.tytul}",
             "opis": aktywny_podpunkt.opis or "",
-            "opis_html": _format_punkt_opis_html(aktywny_podpunkt.opis or ""),
+            "opis_html": opis_html(aktywny_podpunkt.opis or ""),
             "glosowanie_id": glosowanie.id if glosowanie else None,
             "glosowanie_nazwa": glosowanie.nazwa if glosowanie else "",
             "za": 0,
@@ -1601,10 +1622,10 @@ def api_aktywny_punkt(request, sesja_id):
     else:
         punkt = sesja.punkty.filter(aktywny=True).prefetch_related("glosowania", "podpunkty").order_by("numer").first()
         if not punkt:
-            return JsonResponse({"aktywny": False})
+            return _stan_ekranu(sesja, {"aktywny": False})
 
         podpunkty = list(punkt.podpunkty.order_by("numer"))
-        opis_html = _format_podpunkty_list_html(podpunkty) if podpunkty else _format_punkt_opis_html(punkt.opis or "")
+        html_opisu = _format_podpunkty_list_html(podpunkty) if podpunkty else opis_html(punkt.opis or "")
         glosowanie = getattr(punkt, "glosowanie", None)
         data = {
             "aktywny": True,
@@ -1618,7 +1639,7 @@ def api_aktywny_punkt(request, sesja_id):
             "tytul": punkt.tytul,
             "podtytul": "",
             "opis": punkt.opis or "",
-            "opis_html": opis_html,
+            "opis_html": html_opisu,
             "glosowanie_id": glosowanie.id if glosowanie else None,
             "glosowanie_nazwa": glosowanie.nazwa if glosowanie else "",
             "za": 0,
@@ -1634,10 +1655,11 @@ def api_aktywny_punkt(request, sesja_id):
                 kandydaci = glosowanie.kandydaci.all()
             else:
                 kandydaci = punkt.kandydaci.all()
+            glosy = _glosy_kandydatow(glosowanie)
             wyniki_kandydaci = []
             suma_glosow = 0
             for k in kandydaci:
-                liczba = k.glos_set.filter(glosowanie=glosowanie).count()
+                liczba = glosy.get(k.id, 0)
                 suma_glosow += liczba
                 wyniki_kandydaci.append({
                     "id": k.id,
@@ -1662,7 +1684,7 @@ def api_aktywny_punkt(request, sesja_id):
                 elif w["glos"] == "wstrzymuje":
                     data["wstrzymuje"] = w["count"]
 
-    return JsonResponse(data)
+    return _stan_ekranu(sesja, data)
 
 
 @login_required
@@ -1670,6 +1692,9 @@ def api_aktywny_punkt(request, sesja_id):
 @require_manage_session(on_fail="redirect", redirect_to="radny")
 def ustaw_punkt_aktywny(request, punkt_id):
     punkt = get_object_or_404(PunktObrad, id=punkt_id)
+    odmowa = _odmowa_dla_zamknietej(request, punkt.sesja)
+    if odmowa:
+        return odmowa
     if punkt.aktywny:
         punkt.aktywny = False
         punkt.save(update_fields=["aktywny"])
@@ -1762,11 +1787,12 @@ def wnioski_radny(request):
     else:
         form = WniosekForm()
 
-    wnioski = (
-        Wniosek.objects.filter(radny=request.user)
-        .select_related("punkt_obrad", "punkt_obrad__sesja")
-        .order_by("-data")
+    wnioski = strona_z_zadania(
+        request,
+        Wniosek.objects.filter(radny=request.user).select_related("punkt_obrad", "punkt_obrad__sesja"),
     )
+    if chce_json(request):
+        return json_strony(wnioski, _wniosek_json)
 
     return render(
         request,
@@ -1776,6 +1802,7 @@ def wnioski_radny(request):
             "punkt": punkt,
             "form": form,
             "wnioski": wnioski,
+            "strona": wnioski,
             "mozna_przypiac": punkt is not None,
         },
     )
@@ -1824,6 +1851,69 @@ def wniosek_zatwierdz(request, wniosek_id):
     return redirect("wnioski_prezidium")
 
 
+def _ids_z_formularza(request):
+    """Lista id zaznaczonych pozycji (pole ids, wielokrotne lub „1,2,3”); None przy błędnych danych."""
+    ids = set()
+    for raw in request.POST.getlist("ids"):
+        for part in raw.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if not part.isdigit():
+                return None
+            ids.add(int(part))
+    return sorted(ids)
+
+
+def _zbiorczo_response(request, podsumowanie, redirect_to, komunikat):
+    if request.headers.get("x-requested-with") == "XMLHttpRequest":
+        return JsonResponse(podsumowanie)
+    messages.success(request, f"{komunikat}: {podsumowanie['zmieniono']} z {podsumowanie['wybrano']}.")
+    return redirect(redirect_to)
+
+
+def _zbiorczo_blad(request, redirect_to, komunikat):
+    if request.headers.get("x-requested-with") == "XMLHttpRequest":
+        return JsonResponse({"error": komunikat}, status=400)
+    messages.error(request, komunikat)
+    return redirect(redirect_to)
+
+
+def _zbiorcza_aktualizacja(model, ids, akcja, zmiany, do_zmiany):
+    """Jeden UPDATE ... WHERE id IN (...) w transakcji; zwraca kompaktowe podsumowanie."""
+    with transaction.atomic():
+        qs = model.objects.filter(id__in=ids)
+        znalezione = qs.count()
+        zmieniono = qs.filter(do_zmiany).update(**zmiany)
+    return {
+        "akcja": akcja,
+        "wybrano": len(ids),
+        "zmieniono": zmieniono,
+        "bez_zmian": znalezione - zmieniono,
+        "nie_znaleziono": len(ids) - znalezione,
+    }
+
+
+@login_required
+@require_POST
+@require_prezydium_only(on_fail="forbidden")
+def wnioski_zbiorczo(request):
+    """Zatwierdź lub odrzuć wiele wniosków naraz (pole ids, akcja=zatwierdz|odrzuc)."""
+    akcja = request.POST.get("akcja")
+    ids = _ids_z_formularza(request)
+    if akcja not in {"zatwierdz", "odrzuc"} or not ids:
+        return _zbiorczo_blad(request, "wnioski_prezidium", "Wybierz wnioski i akcję (zatwierdz/odrzuc).")
+
+    zatwierdzony = akcja == "zatwierdz"
+    podsumowanie = _zbiorcza_aktualizacja(
+        Wniosek, ids, akcja,
+        zmiany={"zatwierdzony": zatwierdzony},
+        do_zmiany=~Q(zatwierdzony=zatwierdzony),
+    )
+    komunikat = "Zatwierdzono wnioski" if zatwierdzony else "Cofnięto zatwierdzenie wniosków"
+    return _zbiorczo_response(request, podsumowanie, "wnioski_prezidium", komunikat)
+
+
 @login_required
 @require_http_methods(["GET", "POST"])
 @require_prezydium_only(on_fail="redirect", redirect_to="radny")
@@ -1841,11 +1931,14 @@ def reset_danych_testowych(request):
             return redirect("reset_danych_testowych")
 
         # kasuj od najniższych zależności
-        Glos.objects.all().delete()
-        Wniosek.objects.all().delete()
-        Glosowanie.objects.all().delete()
-        PunktObrad.objects.all().delete()
-        Sesja.objects.all().delete()
+        with transaction.atomic():
+            statystyki.odnotuj_do_przeliczenia(Glos.objects.values_list("uzytkownik_id", flat=True).distinct())
+            statystyki.odnotuj_do_przeliczenia(Wniosek.objects.values_list("radny_id", flat=True).distinct())
+            Glos.objects.all().delete()
+            Wniosek.objects.all().delete()
+            Glosowanie.objects.all().delete()
+            PunktObrad.objects.all().delete()
+            Sesja.objects.all().delete()
 
         messages.success(request, "Usunięto wszystkie sesje, punkty, głosowania, głosy i wnioski. Możesz zacząć od zera.")
         return redirect("prezydium_sesje")
@@ -1932,13 +2025,15 @@ def ustaw_obecnosc(request):
 def obecnosci_toggle_prezidium(request, sesja_id, radny_id):
     """Prezydium ręcznie przełącza obecność danego uprawnionego w danej sesji."""
     sesja = get_object_or_404(Sesja, id=sesja_id)
+    odmowa = _odmowa_dla_zamknietej(request, sesja, json=True)
+    if odmowa:
+        return odmowa
     radny = get_object_or_404(Uzytkownik, id=radny_id, rola__in=["radny", "administrator", "prezydium"])
 
     from .models import Obecnosc
 
     obj, _ = Obecnosc.objects.get_or_create(sesja=sesja, radny=radny)
-    obj.obecny = not obj.obecny
-    obj.save(update_fields=["obecny", "timestamp"])
+    obj.ustaw(not obj.obecny)
 
     uprawnieni = _uprawnieni_do_glosowania_qs().count()
     obecni = Obecnosc.objects.filter(sesja=sesja, obecny=True).count()
@@ -1966,7 +2061,7 @@ def komisje_moje(request):
     if user.rola in {"administrator", "prezydium"}:
         komisje = Komisja.objects.select_related("przewodniczacy").all()
     else:
-        komisje = Komisja.objects.filter(Q(czlonkowie=user) | Q(przewodniczacy=user)).distinct()
+        komisje = Komisja.objects.filter(id__in=komisje_uzytkownika(user))
 
     return render(
         request,
@@ -2431,16 +2526,8 @@ def komisja_sesja_edytuj(request, komisja_id, sesja_id):
             return redirect("komisja_sesja_edytuj", komisja_id=komisja.id, sesja_id=sesja.id)
 
     punkty = list(sesja.punkty.prefetch_related("glosowania", "podpunkty", "podpunkty__glosowania").order_by("numer"))
-    for idx, punkt in enumerate(punkty, start=1):
-        if punkt.numer != idx:
-            punkt.numer = idx
-            punkt.save(update_fields=["numer"])
-        podpunkty = list(punkt.podpunkty.order_by("numer"))
-        for pidx, podpunkt in enumerate(podpunkty, start=1):
-            if podpunkt.numer != pidx:
-                podpunkt.numer = pidx
-                podpunkt.save(update_fields=["numer"])
-    punkty = list(sesja.punkty.prefetch_related("glosowania", "podpunkty", "podpunkty__glosowania").order_by("numer"))
+    if _renumeruj_punkty(punkty):
+        punkty = list(sesja.punkty.prefetch_related("glosowania", "podpunkty", "podpunkty__glosowania").order_by("numer"))
 
     return render(
         request,
@@ -2586,7 +2673,10 @@ def komisja_oddaj_glos(request, glosowanie_id):
 
 @require_GET
 def api_komisja_wyniki(request, glosowanie_id):
-    glosowanie = get_object_or_404(KomisjaGlosowanie, id=glosowanie_id)
+    glosowanie = get_object_or_404(KomisjaGlosowanie.objects.select_related("punkt_obrad"), id=glosowanie_id)
+    odmowa = tokeny_ekranu.odmowa_dostepu(request, "komisjasesja", glosowanie.punkt_obrad.sesja_id)
+    if odmowa:
+        return odmowa
 
     if glosowanie.jawnosc == "tajne" and glosowanie.otwarte:
         total = KomisjaGlos.objects.filter(glosowanie=glosowanie).count()
@@ -2620,6 +2710,9 @@ def api_komisja_lista_glosow_jawne(request, glosowanie_id):
         KomisjaGlosowanie.objects.select_related("punkt_obrad__sesja__komisja"),
         id=glosowanie_id,
     )
+    odmowa = tokeny_ekranu.odmowa_dostepu(request, "komisjasesja", glosowanie.punkt_obrad.sesja_id)
+    if odmowa:
+        return odmowa
     if glosowanie.jawnosc != "jawne":
         return JsonResponse({"error": "Głosowanie nie jest jawne"}, status=403)
 
@@ -2649,31 +2742,21 @@ def api_komisja_lista_glosow_jawne(request, glosowanie_id):
 
 @login_required
 def komisja_sesja_ekran(request, komisja_id, sesja_id):
-    from django.core.cache import cache
-
     komisja = get_object_or_404(Komisja, id=komisja_id)
     sesja = get_object_or_404(KomisjaSesja, id=sesja_id, komisja=komisja)
 
     if not _can_view_komisja(request.user, komisja):
         return HttpResponseForbidden("Brak uprawnień")
 
-    komunikat = cache.get("ekran_komunikat_global", "")
     is_admin = _can_manage_komisja(request.user, komisja)
-
-    return render(request, "core/sesja_ekran.html", {
-        "sesja": sesja,
-        "komunikat": komunikat,
-        "is_admin": is_admin,
-        "przerwa_trwa": False,
-        "przerwa_pozostalo": 0,
-        "api_aktywny_punkt_url": reverse("api_komisja_aktywny_punkt", args=[sesja.id]),
-        "api_wyniki_prefix": "/api/komisja/wyniki/",
-        "api_glosy_jawne_prefix": "/api/komisja/glosy-jawne/",
-    })
+    return render(request, "core/sesja_ekran.html", _kontekst_ekranu(sesja, is_admin=is_admin))
 
 
 @require_GET
 def api_komisja_aktywny_punkt(request, sesja_id):
+    odmowa = tokeny_ekranu.odmowa_dostepu(request, "komisjasesja", sesja_id)
+    if odmowa:
+        return odmowa
     sesja = get_object_or_404(KomisjaSesja, id=sesja_id)
 
     aktywny_podpunkt = None
@@ -2687,9 +2770,6 @@ def api_komisja_aktywny_punkt(request, sesja_id):
             punkt_nadrzedny__sesja=sesja,
             aktywny=True,
         ).prefetch_related("glosowania").order_by("punkt_nadrzedny__numer", "numer").first()
-        if aktywny_podpunkt is not None:
-            sesja.aktywny_podpunkt = aktywny_podpunkt
-            sesja.save(update_fields=["aktywny_podpunkt"])
 
     if aktywny_podpunkt is not None:
         punkt = aktywny_podpunkt.punkt_nadrzedny
@@ -2706,7 +2786,7 @@ def api_komisja_aktywny_punkt(request, sesja_id):
             "tytul": aktywny_podpunkt.tytul,
             "podtytul": f"Punkt {punkt.numer}. {punkt.tytul}",
             "opis": aktywny_podpunkt.opis or "",
-            "opis_html": _format_punkt_opis_html(aktywny_podpunkt.opis or ""),
+            "opis_html": opis_html(aktywny_podpunkt.opis or ""),
             "glosowanie_id": glosowanie.id if glosowanie else None,
             "glosowanie_nazwa": glosowanie.nazwa if glosowanie else "",
             "za": 0,
@@ -2719,15 +2799,12 @@ def api_komisja_aktywny_punkt(request, sesja_id):
             punkt = sesja.punkty.filter(id=sesja.aktywny_punkt_id).prefetch_related("glosowania", "podpunkty").first()
         if punkt is None:
             punkt = sesja.punkty.filter(aktywny=True).prefetch_related("glosowania", "podpunkty").order_by("numer").first()
-            if punkt is not None:
-                sesja.aktywny_punkt = punkt
-                sesja.save(update_fields=["aktywny_punkt"])
 
         if not punkt:
-            return JsonResponse({"aktywny": False})
+            return _stan_ekranu(sesja, {"aktywny": False})
 
         podpunkty = list(punkt.podpunkty.order_by("numer"))
-        opis_html = _format_podpunkty_list_html(podpunkty) if podpunkty else _format_punkt_opis_html(punkt.opis or "")
+        html_opisu = _format_podpunkty_list_html(podpunkty) if podpunkty else opis_html(punkt.opis or "")
         glosowanie = getattr(punkt, "glosowanie", None)
         data = {
             "aktywny": True,
@@ -2741,7 +2818,7 @@ def api_komisja_aktywny_punkt(request, sesja_id):
             "tytul": punkt.tytul,
             "podtytul": "",
             "opis": punkt.opis or "",
-            "opis_html": opis_html,
+            "opis_html": html_opisu,
             "glosowanie_id": glosowanie.id if glosowanie else None,
             "glosowanie_nazwa": glosowanie.nazwa if glosowanie else "",
             "za": 0,
@@ -2763,7 +2840,7 @@ def api_komisja_aktywny_punkt(request, sesja_id):
             elif w["glos"] == "wstrzymuje":
                 data["wstrzymuje"] = w["count"]
 
-    return JsonResponse(data)
+    return _stan_ekranu(sesja, data)
 
 
 @login_required
@@ -2785,16 +2862,24 @@ def komisja_wnioski(request, komisja_id):
     else:
         form = KomisjaWniosekForm()
 
-    wnioski = komisja.wnioski.select_related("autor").all()
-    return render(request, "core/komisja_wnioski.html", {"komisja": komisja, "form": form, "wnioski": wnioski})
+    wnioski = strona_z_zadania(request, komisja.wnioski.select_related("autor"))
+    if chce_json(request):
+        return json_strony(wnioski, _komisja_wniosek_json)
+    return render(
+        request,
+        "core/komisja_wnioski.html",
+        {"komisja": komisja, "form": form, "wnioski": wnioski, "strona": wnioski},
+    )
 
 
 @login_required
 @require_prezydium_only(on_fail="forbidden")
 def komisja_skrzynka_rady(request):
     """Skrzynka prezydium: wnioski komisji do zatwierdzenia/wysłania do rady."""
-    qs = KomisjaWniosek.objects.select_related("komisja", "autor").all()
-    return render(request, "core/komisja_skrzynka_rady.html", {"wnioski": qs})
+    wnioski = strona_z_zadania(request, KomisjaWniosek.objects.select_related("komisja", "autor"))
+    if chce_json(request):
+        return json_strony(wnioski, _komisja_wniosek_json)
+    return render(request, "core/komisja_skrzynka_rady.html", {"wnioski": wnioski, "strona": wnioski})
 
 
 @login_required
@@ -2812,6 +2897,46 @@ def komisja_wniosek_wyslij_do_rady(request, wniosek_id):
     return redirect("komisja_skrzynka_rady")
 
 
+@login_required
+@require_POST
+@require_prezydium_only(on_fail="forbidden")
+def komisja_wnioski_zbiorczo(request):
+    """Zatwierdź, odrzuć lub wyślij do rady wiele wniosków komisji naraz.
+
+    Wysłanych do rady wniosków nie da się już odrzucić – są pomijane (bez_zmian).
+    Wysłanie zachowuje datę zatwierdzenia wniosków zatwierdzonych wcześniej.
+    """
+    akcja = request.POST.get("akcja")
+    ids = _ids_z_formularza(request)
+    if akcja not in {"zatwierdz", "odrzuc", "wyslij"} or not ids:
+        return _zbiorczo_blad(request, "komisja_skrzynka_rady", "Wybierz wnioski i akcję (zatwierdz/odrzuc/wyslij).")
+
+    teraz = timezone.now()
+    if akcja == "wyslij":
+        zmiany = {
+            "zatwierdzony_przez_prezydium": True,
+            "data_zatwierdzenia": Case(
+                When(zatwierdzony_przez_prezydium=True, then=F("data_zatwierdzenia")),
+                default=Value(teraz),
+            ),
+            "wyslany_do_rady": True,
+            "data_wyslania": teraz,
+        }
+        do_zmiany = Q(wyslany_do_rady=False)
+        komunikat = "Wysłano do rady"
+    elif akcja == "zatwierdz":
+        zmiany = {"zatwierdzony_przez_prezydium": True, "data_zatwierdzenia": teraz}
+        do_zmiany = Q(zatwierdzony_przez_prezydium=False)
+        komunikat = "Zatwierdzono wnioski komisji"
+    else:
+        zmiany = {"zatwierdzony_przez_prezydium": False, "data_zatwierdzenia": None}
+        do_zmiany = Q(zatwierdzony_przez_prezydium=True, wyslany_do_rady=False)
+        komunikat = "Odrzucono wnioski komisji"
+
+    podsumowanie = _zbiorcza_aktualizacja(KomisjaWniosek, ids, akcja, zmiany=zmiany, do_zmiany=do_zmiany)
+    return _zbiorczo_response(request, podsumowanie, "komisja_skrzynka_rady", komunikat)
+
+
 @login_required
 @require_GET
 @require_radny_like(on_fail="redirect", redirect_to="prezydium_dashboard")
@@ -2854,103 +2979,7 @@ def wniosek_pdf(request, wniosek_id):
 
 
 def _wnioski_pdf_response(*, title: str, wnioski: list[Wniosek], filename: str):
-    """Generuje PDF dla listy wniosków. Wykorzystuje ReportLab."""
-    from io import BytesIO
-    from reportlab.lib.pagesizes import A4
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.units import mm
-
-    # fonty z obsługą polskich znaków (TTF)
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    # Rejestracja fontu (jeśli plik istnieje)
-    font_regular = "Helvetica"
-    font_bold = "Helvetica-Bold"
-    try:
-        import os
-        from django.conf import settings
-
-        font_path = os.path.join(settings.BASE_DIR, "core", "static", "core", "fonts", "DejaVuSans.ttf")
-        font_bold_path = os.path.join(settings.BASE_DIR, "core", "static", "core", "fonts", "DejaVuSans-Bold.ttf")
-        if os.path.exists(font_path):
-            pdfmetrics.registerFont(TTFont("DejaVuSans", font_path))
-            font_regular = "DejaVuSans"
-        if os.path.exists(font_bold_path):
-            pdfmetrics.registerFont(TTFont("DejaVuSans-Bold", font_bold_path))
-            font_bold = "DejaVuSans-Bold"
-    except Exception:
-        # fallback do Helvetica (bez PL znaków) jeśli coś pójdzie nie tak
-        pass
-
-    y = height - 20 * mm
-    c.setFont(font_bold, 14)
-    c.drawString(20 * mm, y, title)
-    y -= 10 * mm
-
-    c.setFont(font_regular, 9)
-    c.drawString(20 * mm, y, f"Wygenerowano: {timezone.now().strftime('%Y-%m-%d %H:%M')}")
-    y -= 12 * mm
-
-    for w in wnioski:
-        if y < 25 * mm:
-            c.showPage()
-            y = height - 20 * mm
-
-        c.setFont(font_bold, 11)
-        c.drawString(20 * mm, y, f"Sygnatura: {w.sygnatura}   |   Typ: {w.get_typ_display()}   |   Data: {w.data.strftime('%Y-%m-%d %H:%M')}")
-        y -= 6 * mm
-
-        c.setFont(font_regular, 10)
-        c.drawString(20 * mm, y, f"Autor: {w.radny.imie} {w.radny.nazwisko}")
-        y -= 6 * mm
-
-        if w.punkt_obrad_id:
-            sesja_nazwa = getattr(getattr(w.punkt_obrad, "sesja", None), "nazwa", "")
-            c.setFont(font_regular, 9)
-            c.drawString(20 * mm, y, f"Sesja: {sesja_nazwa} | Punkt: {w.punkt_obrad.numer}. {w.punkt_obrad.tytul}")
-            y -= 6 * mm
-        else:
-            c.setFont(font_regular, 9)
-            c.drawString(20 * mm, y, "Poza sesją")
-            y -= 6 * mm
-
-        # treść (proste łamanie wierszy)
-        c.setFont(font_regular, 10)
-        max_chars = 110
-        text = (w.tresc or "").replace("\r\n", "\n").replace("\r", "\n")
-        for para in text.split("\n"):
-            para = para.strip()
-            if not para:
-                y -= 4 * mm
-                continue
-            while len(para) > max_chars:
-                line = para[:max_chars]
-                para = para[max_chars:]
-                c.drawString(20 * mm, y, line)
-                y -= 5 * mm
-                if y < 25 * mm:
-                    c.showPage()
-                    y = height - 20 * mm
-                    c.setFont(font_regular, 10)
-            c.drawString(20 * mm, y, para)
-            y -= 5 * mm
-            if y < 25 * mm:
-                c.showPage()
-                y = height - 20 * mm
-                c.setFont(font_regular, 10)
-
-        y -= 6 * mm
-
-    c.showPage()
-    c.save()
-
-    pdf = buffer.getvalue()
-    buffer.close()
+    pdf = wnioski_pdf_bytes(title=title, wnioski=wnioski)
 
     resp = HttpResponse(pdf, content_type="application/pdf")
     resp["Content-Disposition"] = f'attachment; filename="{filename}"'
@@ -2974,4 +3003,272 @@ def protokol_sesji_pdf(request):
     if not sesja:
         return HttpResponse("Brak aktywnej sesji.", content_type="text/plain")
 
-    return _protokol_pdf_response_for_session(sesja)
+    return _protokol_pdf_cached_response(request, sesja)
+
+
+# --------------------------------------------------
+# Zadania w tle (PDF / eksporty)
+# --------------------------------------------------
+
+def _zadanie_json(zadanie):
+    return {
+        "id": zadanie.id,
+        "typ": zadanie.typ,
+        "status": zadanie.status,
+        "status_opis": zadanie.get_status_display(),
+        "blad": zadanie.blad,
+        "status_url": reverse("api_zadanie_status", args=[zadanie.id]),
+        "download_url": reverse("zadanie_pobierz", args=[zadanie.id]) if zadanie.status == "gotowe" else None,
+    }
+
+
+def _zadanie_zlecone_response(request, zadanie):
+    if request.headers.get("x-requested-with") == "XMLHttpRequest":
+        return JsonResponse(_zadanie_json(zadanie), status=202)
+    return redirect("zadanie_szczegoly", zadanie_id=zadanie.id)
+
+
+def _get_zadanie_for_user(user, zadanie_id):
+    from .models import ZadanieEksportu
+
+    zadanie = get_object_or_404(ZadanieEksportu, id=zadanie_id)
+    if zadanie.zlecil_id != user.id and getattr(user, "rola", None) != "administrator":
+        return None
+    return zadanie
+
+
+@login_required
+@require_POST
+@require_manage_session(on_fail="forbidden")
+def zadanie_protokol_zlec(request):
+    """Zleca wygenerowanie protokołu sesji w tle."""
+    from . import zadania
+
+    sesja = get_object_or_404(Sesja, id=request.POST.get("sesja_id"))
+    zadanie = zadania.zlec("protokol", request.user, sesja_id=sesja.id)
+    return _zadanie_zlecone_response(request, zadanie)
+
+
+@login_required
+@require_POST
+@require_manage_session(on_fail="forbidden")
+def zadanie_archiwum_zlec(request):
+    """Zleca przygotowanie archiwum protokołów (ZIP) w tle."""
+    from . import zadania
+    from .archiwum import zakres_dat
+
+    try:
+        od, do = zakres_dat(
+            rok=request.POST.get("rok"),
+            od=request.POST.get("od"),
+            do=request.POST.get("do"),
+        )
+    except ValueError as exc:
+        messages.error(request, str(exc))
+        return redirect("protokol_sesji_wybor")
+
+    zadanie = zadania.zlec("archiwum", request.user, od=od.isoformat(), do=do.isoformat())
+    return _zadanie_zlecone_response(request, zadanie)
+
+
+@login_required
+@require_POST
+@require_radny_like(on_fail="forbidden")
+def zadanie_wnioski_zlec(request):
+    """Zleca wygenerowanie PDF ze wszystkimi wnioskami zalogowanego radnego."""
+    from . import zadania
+
+    wniosek_ids = list(Wniosek.objects.filter(radny=request.user).values_list("id", flat=True))
+    zadanie = zadania.zlec(
+        "wnioski",
+        request.user,
+        wniosek_ids=wniosek_ids,
+        tytul=f"Wnioski radnego: {request.user.imie} {request.user.nazwisko}",
+        nazwa_pliku="wnioski_moje.pdf",
+    )
+    return _zadanie_zlecone_response(request, zadanie)
+
+
+@login_required
+@require_GET
+def zadanie_szczegoly(request, zadanie_id):
+    zadanie = _get_zadanie_for_user(request.user, zadanie_id)
+    if zadanie is None:
+        return HttpResponseForbidden("Brak uprawnień")
+    return render(request, "core/zadanie.html", {"zadanie": zadanie, "zadanie_json": _zadanie_json(zadanie)})
+
+
+@login_required
+@require_GET
+def api_zadanie_status(request, zadanie_id):
+    zadanie = _get_zadanie_for_user(request.user, zadanie_id)
+    if zadanie is None:
+        return JsonResponse({"error": "Brak uprawnień"}, status=403)
+    return JsonResponse(_zadanie_json(zadanie))
+
+
+@login_required
+@require_GET
+def zadanie_pobierz(request, zadanie_id):
+    from django.http import FileResponse, Http404
+
+    zadanie = _get_zadanie_for_user(request.user, zadanie_id)
+    if zadanie is None:
+        return HttpResponseForbidden("Brak uprawnień")
+    if zadanie.status != "gotowe" or not zadanie.plik:
+        raise Http404("Plik nie jest jeszcze gotowy")
+    return FileResponse(zadanie.plik.open("rb"), as_attachment=True, filename=zadanie.nazwa_pliku)
+
+
+# --------------------------------------------------
+# Wyszukiwanie (wnioski, porządek obrad)
+# --------------------------------------------------
+
+def _szukaj_querysets(user):
+    """Querysety obiektów, które użytkownik może zobaczyć w wynikach wyszukiwania."""
+    wnioski = Wniosek.objects.select_related("radny", "punkt_obrad__sesja")
+    if not _is_prezydium(user):
+        wnioski = wnioski.filter(radny=user)
+
+    komisja_wnioski = KomisjaWniosek.objects.select_related("komisja", "autor")
+    if getattr(user, "rola", None) not in {"administrator", "prezydium"}:
+        komisja_wnioski = komisja_wnioski.filter(komisja_id__in=komisje_uzytkownika(user))
+
+    return {
+        "wniosek": wnioski,
+        "komisja_wniosek": komisja_wnioski,
+        "punkt": PunktObrad.objects.filter(sesja__jest_usunieta=False).select_related("sesja"),
+        "podpunkt": PodpunktObrad.objects.filter(punkt_nadrzedny__sesja__jest_usunieta=False).select_related(
+            "punkt_nadrzedny__sesja"
+        ),
+    }
+
+
+def _wynik_wyszukiwania(rodzaj, obj, user):
+    url = None
+    if rodzaj == "wniosek":
+        tytul = f"{obj.sygnatura} – {obj.get_typ_display()}"
+        kontekst = f"{obj.radny.imie} {obj.radny.nazwisko}, {timezone.localtime(obj.data):%Y-%m-%d}"
+        tekst = obj.tresc
+        url = reverse("wniosek_pdf", args=[obj.id])
+    elif rodzaj == "komisja_wniosek":
+        tytul = f"{obj.komisja.nazwa} – {obj.get_typ_display()}"
+        kontekst = f"{obj.autor.imie} {obj.autor.nazwisko}, {timezone.localtime(obj.data):%Y-%m-%d}"
+        tekst = obj.tresc
+        url = reverse("komisja_wnioski", args=[obj.komisja_id])
+    else:
+        punkt = obj if rodzaj == "punkt" else obj.punkt_nadrzedny
+        sesja = punkt.sesja
+        numer = f"{punkt.numer}" if rodzaj == "punkt" else f"{punkt.numer}.{obj.numer}"
+        tytul = f"Pkt {numer}. {obj.tytul}"
+        kontekst = f"{sesja.nazwa}, {timezone.localtime(sesja.data):%Y-%m-%d}"
+        tekst = obj.opis
+        if _can_manage_session(user):
+            url = reverse("sesja_edytuj", args=[sesja.id])
+    return {
+        "rodzaj": rodzaj,
+        "rodzaj_display": dict(IndeksWyszukiwania.RODZAJ_CHOICES)[rodzaj],
+        "id": obj.id,
+        "tytul": tytul,
+        "kontekst": kontekst,
+        "fragment": (tekst or "")[:240],
+        "url": url,
+    }
+
+
+@login_required
+@require_GET
+def szukaj(request):
+    from .wyszukiwanie import szukaj as szukaj_w_indeksie
+
+    q = (request.GET.get("q") or "").strip()
+    querysets = _szukaj_querysets(request.user)
+    rodzaj = request.GET.get("rodzaj")
+    if rodzaj in querysets:
+        querysets = {rodzaj: querysets[rodzaj]}
+
+    wyniki = [
+        _wynik_wyszukiwania(r, obj, request.user)
+        for r, obj in (szukaj_w_indeksie(q, querysets) if q else [])
+    ]
+    if request.GET.get("format") == "json":
+        return JsonResponse({"q": q, "wyniki": wyniki})
+    return render(
+        request,
+        "core/szukaj.html",
+        {"q": q, "rodzaj": rodzaj or "", "wyniki": wyniki, "rodzaje": IndeksWyszukiwania.RODZAJ_CHOICES},
+    )
+
+
+# --------------------------------------------------
+# Metryki żądań (core.metryki / core.middleware.MetrykiMiddleware)
+# --------------------------------------------------
+
+@login_required
+@require_GET
+@require_roles("administrator", on_fail="json")
+def metryki(request):
+    """Histogramy czasu i zapytań SQL per nazwa URL: JSON (okno kroczące) albo Prometheus."""
+    if request.GET.get("format") == "prometheus":
+        return HttpResponse(rejestr_metryk.jako_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
+    return JsonResponse(rejestr_metryk.jako_json())
+
+
+def _dane_panelu_wydajnosci():
+    glosowanie = (
+        Glosowanie.objects
+        .filter(otwarte=True, punkt_obrad__sesja__aktywna=True)
+        .order_by("-utworzone", "-id")
+        .first()
+    )
+    dane = rejestr_metryk.panel(glosowanie_id=glosowanie.id if glosowanie else None)
+    dane["otwarte_glosowanie"] = {"id": glosowanie.id, "nazwa": glosowanie.nazwa} if glosowanie else None
+    return dane
+
+
+@login_required
+@require_GET
+@require_manage_session(on_fail="redirect", redirect_to="radny")
+def prezydium_wydajnosc(request):
+    """Panel wydajności dla operatora sesji – odświeżany co 2 s jak ekrany."""
+    return render(request, "core/prezydium_wydajnosc.html", {
+        "dane": _dane_panelu_wydajnosci(),
+        "prog_blokady_ms": rejestr_metryk.prog_blokady_ms(),
+    })
+
+
+@login_required
+@require_GET
+@require_manage_session(on_fail="json")
+def api_prezydium_wydajnosc(request):
+    return JsonResponse(_dane_panelu_wydajnosci())
+
+
+# --------------------------------------------------
+# Profile żądań (core.profiler / core.middleware.ProfilerMiddleware)
+# --------------------------------------------------
+
+@login_required
+@require_GET
+@require_roles("administrator", on_fail="forbidden")
+def profile_lista(request):
+    from . import profiler
+
+    return render(request, "core/profile_lista.html", {
+        "profile": profiler.lista(),
+        "limit": profiler.limit(),
+        "parametr": profiler.PARAMETR,
+    })
+
+
+@login_required
+@require_GET
+@require_roles("administrator", on_fail="forbidden")
+def profil_szczegoly(request, nazwa):
+    from . import profiler
+
+    profil = profiler.wczytaj(nazwa)
+    if profil is None:
+        raise Http404("Nie ma takiego profilu")
+    zapytania = sorted(profil["zapytania"], key=lambda q: q["czas_ms"], reverse=True)
+    return render(request, "core/profil_szczegoly.html", {"nazwa": nazwa, "profil": profil, "zapytania": zapytania})
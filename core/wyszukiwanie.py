@@ -0,0 +1,212 @@
+"""Wyszukiwanie pełnotekstowe we wnioskach i porządku obrad.
+
+Każdy indeksowany obiekt ma jeden wiersz w IndeksWyszukiwania z tekstem
+po normalizacji (małe litery, polskie znaki zamienione na łacińskie), więc
+„zazolc” znajdzie „Zażółć”. Nad tą tabelą migracja zakłada:
+- w SQLite: tabelę FTS5 (external content) aktualizowaną triggerami,
+- w PostgreSQL: indeks GIN na to_tsvector('simple', tekst).
+Na innych bazach wyszukiwanie działa przez LIKE (bez indeksu).
+
+Wiersze indeksu odświeżane są sygnałami post_save/post_delete modeli.
+QuerySet.update() i bulk_create()/bulk_update() sygnałów nie wysyłają:
+kod zmieniający nimi pola tekstowe (ZRODLA) musi sam wywołać indeksuj()
+albo przebuduj() – tak robi np. generuj_dane_syntetyczne – a w razie
+wątpliwości indeks odtwarza komenda przebuduj_indeks_wyszukiwania.
+"""
+
+import re
+import unicodedata
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+
+from .models import IndeksWyszukiwania, KomisjaWniosek, PodpunktObrad, PunktObrad, Wniosek
+
+FTS_TABLE = "core_indekswyszukiwania_fts"
+MAX_TOKENOW = 8
+
+_POLSKIE = str.maketrans("ąćęłńóśźż", "acelnoszz")
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalizuj(text):
+    """Małe litery, bez diakrytyków (także „ł”, którego Unicode nie rozkłada)."""
+    text = (text or "").lower().translate(_POLSKIE)
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokeny(fraza):
+    return _TOKEN_RE.findall(normalizuj(fraza))[:MAX_TOKENOW]
+
+
+# --------------------------------------------------
+# Źródła indeksu: model -> (rodzaj, pola tekstowe)
+# --------------------------------------------------
+
+ZRODLA = {
+    Wniosek: ("wniosek", ("sygnatura", "tresc")),
+    KomisjaWniosek: ("komisja_wniosek", ("tresc",)),
+    PunktObrad: ("punkt", ("tytul", "opis")),
+    PodpunktObrad: ("podpunkt", ("tytul", "opis")),
+}
+
+
+def tekst_obiektu(obj):
+    _, pola = ZRODLA[type(obj)]
+    return normalizuj("\n".join(getattr(obj, pole) or "" for pole in pola))
+
+
+def indeksuj(obj):
+    rodzaj, _ = ZRODLA[type(obj)]
+    IndeksWyszukiwania.objects.update_or_create(
+        rodzaj=rodzaj,
+        obiekt_id=obj.pk,
+        defaults={"tekst": tekst_obiektu(obj)},
+    )
+
+
+def _po_zapisie(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    _, pola = ZRODLA[sender]
+    # np. save(update_fields=["aktywny"]) nie zmienia tekstu – nie ruszamy indeksu
+    if update_fields is not None and not set(update_fields) & set(pola):
+        return
+    indeksuj(instance)
+
+
+def _po_usunieciu(sender, instance, **kwargs):
+    rodzaj, _ = ZRODLA[sender]
+    IndeksWyszukiwania.objects.filter(rodzaj=rodzaj, obiekt_id=instance.pk).delete()
+
+
+def podlacz_sygnaly():
+    for model in ZRODLA:
+        post_save.connect(_po_zapisie, sender=model, dispatch_uid=f"wyszukiwanie_save_{model.__name__}")
+        post_delete.connect(_po_usunieciu, sender=model, dispatch_uid=f"wyszukiwanie_delete_{model.__name__}")
+
+
+def przebuduj():
+    """Buduje indeks od zera; zwraca liczbę zaindeksowanych obiektów."""
+    IndeksWyszukiwania.objects.all().delete()
+    liczba = 0
+    for model, (rodzaj, pola) in ZRODLA.items():
+        wiersze = []
+        for row in model.objects.values_list("pk", *pola).iterator():
+            wiersze.append(IndeksWyszukiwania(rodzaj=rodzaj, obiekt_id=row[0], tekst=normalizuj("\n".join(v or "" for v in row[1:]))))
+        IndeksWyszukiwania.objects.bulk_create(wiersze, batch_size=500)
+        liczba += len(wiersze)
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return liczba
+
+
+# --------------------------------------------------
+# Zapytania
+# --------------------------------------------------
+
+def _warunek_zakresu(zakres, kolumna_rodzaju, kolumna_id):
+    """Warunek SQL (i parametry) ograniczający trafienia do obiektów z querysetów zakresu."""
+    czesci, params = [], []
+    for rodzaj, qs in zakres.items():
+        try:
+            sub_sql, sub_params = qs.order_by().values("pk").query.sql_with_params()
+        except EmptyResultSet:
+            # np. filtr komisja_id__in=[] – z tego rodzaju nic nie jest widoczne
+            continue
+        czesci.append(f"({kolumna_rodzaju} = %s AND {kolumna_id} IN ({sub_sql}))")
+        params.extend([rodzaj, *sub_params])
+    return "(" + (" OR ".join(czesci) or "1 = 0") + ")", params
+
+
+def _trafienia_sqlite(tok, zakres, limit):
+    dopasowanie = " ".join(f'"{t}"*' for t in tok)
+    sql = (
+        f"SELECT i.rodzaj, i.obiekt_id FROM {FTS_TABLE} f "
+        f"JOIN core_indekswyszukiwania i ON i.id = f.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s"
+    )
+    params = [dopasowanie]
+    if zakres:
+        warunek, warunek_params = _warunek_zakresu(zakres, "i.rodzaj", "i.obiekt_id")
+        sql += f" AND {warunek}"
+        params.extend(warunek_params)
+    sql += " ORDER BY f.rank LIMIT %s"
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _trafienia_postgresql(tok, zakres, limit):
+    zapytanie = " & ".join(f"{t}:*" for t in tok)
+    sql = (
+        "SELECT rodzaj, obiekt_id FROM core_indekswyszukiwania "
+        "WHERE to_tsvector('simple', tekst) @@ to_tsquery('simple', %s)"
+    )
+    params = [zapytanie]
+    if zakres:
+        warunek, warunek_params = _warunek_zakresu(zakres, "rodzaj", "obiekt_id")
+        sql += f" AND {warunek}"
+        params.extend(warunek_params)
+    sql += " ORDER BY ts_rank(to_tsvector('simple', tekst), to_tsquery('simple', %s)) DESC LIMIT %s"
+    params.extend([zapytanie, limit])
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _trafienia_like(tok, zakres, limit):
+    qs = IndeksWyszukiwania.objects.all()
+    if zakres:
+        warunek = Q()
+        for rodzaj, zrodlo in zakres.items():
+            warunek |= Q(rodzaj=rodzaj, obiekt_id__in=zrodlo.order_by().values("pk"))
+        qs = qs.filter(warunek)
+    for t in tok:
+        qs = qs.filter(tekst__contains=t)
+    return list(qs.order_by("-id").values_list("rodzaj", "obiekt_id")[:limit])
+
+
+def trafienia(fraza, zakres=None, limit=50):
+    """Lista (rodzaj, obiekt_id) dopasowanych dokumentów, od najtrafniejszych.
+
+    zakres: {rodzaj: queryset} – ogranicza trafienia (już w zapytaniu do
+    indeksu) do podanych rodzajów i obiektów z querysetów.
+    """
+    tok = tokeny(fraza)
+    if not tok or zakres == {}:
+        return []
+    if connection.vendor == "sqlite":
+        return _trafienia_sqlite(tok, zakres, limit)
+    if connection.vendor == "postgresql":
+        return _trafienia_postgresql(tok, zakres, limit)
+    return _trafienia_like(tok, zakres, limit)
+
+
+def szukaj(fraza, querysets, limit=50):
+    """Zwraca [(rodzaj, obiekt)] dla trafień widocznych w podanych querysetach.
+
+    querysets: {rodzaj: queryset} – zwykle już zawężony do uprawnień użytkownika;
+    rodzaje bez querysetu są pomijane. Widoczność sprawdzana jest w zapytaniu
+    do indeksu, więc niewidoczne trafienia nie wypierają widocznych z limitu.
+    """
+    hits = trafienia(fraza, zakres=querysets, limit=limit)
+    ids = {}
+    for rodzaj, obiekt_id in hits:
+        ids.setdefault(rodzaj, []).append(obiekt_id)
+    obiekty = {
+        rodzaj: querysets[rodzaj].in_bulk(lista)
+        for rodzaj, lista in ids.items()
+    }
+    wyniki = []
+    for rodzaj, obiekt_id in hits:
+        # obiekt mógł zniknąć między zapytaniami
+        obj = obiekty[rodzaj].get(obiekt_id)
+        if obj is not None:
+            wyniki.append((rodzaj, obj))
+    return wyniki
@@ -0,0 +1,196 @@
+"""Lekka kolejka zadań eksportu (PDF, archiwa) oparta o bazę danych.
+
+Zadanie zapisywane jest jako wiersz ZadanieEksportu. Wykonać je może:
+- pula wątków w procesie aplikacji (domyślnie, ZADANIA_W_PROCESIE=True),
+- osobny proces: ``manage.py przetwarzaj_zadania``.
+
+Przejęcie zadania to warunkowy UPDATE (oczekuje -> w_toku), więc kilka
+wykonawców może działać równolegle bez zewnętrznego brokera.
+
+Zakończone zadania (wraz z plikami w MEDIA_ROOT/zadania/) usuwa
+usun_zakonczone() po ZADANIA_PRZECHOWUJ_DNI dniach (domyślnie 7);
+wywołuje ją przetwarzaj_zadania.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import ZadanieEksportu
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+_executor = None
+_executor_lock = threading.Lock()
+_watek = threading.local()
+
+
+def handler(typ):
+    """Rejestruje funkcję wykonującą zadania danego typu.
+
+    Funkcja dostaje słownik parametrów i zwraca krotkę (nazwa_pliku, dane),
+    gdzie dane to bajty albo otwarty plik binarny (dla dużych eksportów).
+    """
+
+    def decorator(func):
+        HANDLERS[typ] = func
+        return func
+
+    return decorator
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(getattr(settings, "ZADANIA_WATKI", 2)),
+                    thread_name_prefix="zadania",
+                )
+    return _executor
+
+
+def _wykonaj_w_watku(zadanie_id):
+    close_old_connections()
+    _watek.w_aplikacji = True
+    try:
+        wykonaj(zadanie_id)
+    finally:
+        _watek.w_aplikacji = False
+        close_old_connections()
+
+
+def w_procesie_aplikacji():
+    """Czy bieżące zadanie wykonuje pula wątków procesu aplikacji (a nie przetwarzaj_zadania)."""
+    return getattr(_watek, "w_aplikacji", False)
+
+
+def zlec(typ, zlecil, **parametry):
+    """Tworzy zadanie i (opcjonalnie) przekazuje je puli wątków po zatwierdzeniu transakcji."""
+    if typ not in HANDLERS:
+        raise ValueError(f"Nieznany typ zadania: {typ}")
+    zadanie = ZadanieEksportu.objects.create(typ=typ, zlecil=zlecil, parametry=parametry)
+    if getattr(settings, "ZADANIA_W_PROCESIE", True):
+        transaction.on_commit(lambda: _get_executor().submit(_wykonaj_w_watku, zadanie.id))
+    return zadanie
+
+
+def wykonaj(zadanie_id):
+    """Wykonuje zadanie, jeśli nikt inny go jeszcze nie przejął. Zwraca True po przejęciu."""
+    przejete = ZadanieEksportu.objects.filter(id=zadanie_id, status="oczekuje").update(
+        status="w_toku",
+        rozpoczete=timezone.now(),
+    )
+    if not przejete:
+        return False
+
+    zadanie = ZadanieEksportu.objects.get(id=zadanie_id)
+    try:
+        nazwa_pliku, dane = HANDLERS[zadanie.typ](zadanie.parametry)
+        plik = ContentFile(dane) if isinstance(dane, bytes) else File(dane)
+        try:
+            zadanie.plik.save(f"{zadanie.id}/{nazwa_pliku}", plik, save=False)
+        finally:
+            plik.close()
+        zadanie.nazwa_pliku = nazwa_pliku
+        zadanie.status = "gotowe"
+        zadanie.blad = ""
+    except Exception as exc:
+        logger.exception("Zadanie eksportu #%s zakończone błędem", zadanie_id)
+        zadanie.status = "blad"
+        zadanie.blad = str(exc) or exc.__class__.__name__
+    zadanie.zakonczone = timezone.now()
+    zadanie.save(update_fields=["plik", "nazwa_pliku", "status", "blad", "zakonczone"])
+    return True
+
+
+def wykonaj_oczekujace(limit=None):
+    """Wykonuje oczekujące zadania w kolejności zlecenia; zwraca liczbę wykonanych."""
+    ids = ZadanieEksportu.objects.filter(status="oczekuje").order_by("utworzone", "id").values_list("id", flat=True)
+    if limit:
+        ids = ids[:limit]
+    return sum(1 for zadanie_id in list(ids) if wykonaj(zadanie_id))
+
+
+def odzyskaj_porzucone(po_minutach=30):
+    """Przywraca do kolejki zadania „w toku”, których wykonawca zniknął (np. restart workera)."""
+    granica = timezone.now() - timedelta(minutes=po_minutach)
+    return ZadanieEksportu.objects.filter(status="w_toku", rozpoczete__lt=granica).update(
+        status="oczekuje",
+        rozpoczete=None,
+    )
+
+
+@handler("protokol")
+def _protokol(parametry):
+    from .models import Sesja
+    from .pdf_cache import get_or_render, protokol_fingerprint
+    from .pdf_dokumenty import protokol_pdf_bytes, protokol_pdf_filename
+
+    sesja = Sesja.objects.get(id=parametry["sesja_id"])
+    with get_or_render(sesja.id, protokol_fingerprint(sesja), lambda: protokol_pdf_bytes(sesja)) as fh:
+        return protokol_pdf_filename(sesja), fh.read()
+
+
+@handler("wnioski")
+def _wnioski(parametry):
+    from .models import Wniosek
+    from .pdf_dokumenty import wnioski_pdf_bytes
+
+    wnioski = (
+        Wniosek.objects.filter(id__in=parametry["wniosek_ids"])
+        .select_related("punkt_obrad", "punkt_obrad__sesja", "radny")
+        .order_by("-data")
+    )
+    return parametry["nazwa_pliku"], wnioski_pdf_bytes(title=parametry["tytul"], wnioski=list(wnioski))
+
+
+@handler("archiwum")
+def _archiwum(parametry):
+    import tempfile
+
+    from .archiwum import iter_archiwum_zip, sesje_w_zakresie, zakres_dat
+
+    od, do = zakres_dat(od=parametry["od"], do=parametry["do"])
+    sesja_ids = sesje_w_zakresie(od, do).values_list("id", flat=True)
+    # archiwum trafia na dysk kawałkami, nie do pamięci
+    tmp = tempfile.TemporaryFile()
+    # pula procesów tylko w osobnym wykonawcy (przetwarzaj_zadania), nie w procesie serwera WWW
+    for chunk in iter_archiwum_zip(sesja_ids, procesy=1 if w_procesie_aplikacji() else None):
+        tmp.write(chunk)
+    tmp.seek(0)
+    return f"protokoly_{od.isoformat()}_{do.isoformat()}.zip", tmp
+
+
+def usun_zakonczone(po_dniach=None):
+    """Usuwa zakończone (gotowe/błąd) zadania starsze niż po_dniach razem z plikami; zwraca ich liczbę."""
+    if po_dniach is None:
+        po_dniach = int(getattr(settings, "ZADANIA_PRZECHOWUJ_DNI", 7))
+    granica = timezone.now() - timedelta(days=po_dniach)
+    stare = ZadanieEksportu.objects.filter(status__in=["gotowe", "blad"], zakonczone__lt=granica)
+    usuniete = 0
+    for zadanie in stare.only("id", "plik").iterator():
+        if zadanie.plik:
+            _usun_plik(zadanie.plik)
+        usuniete += ZadanieEksportu.objects.filter(id=zadanie.id).delete()[0]
+    return usuniete
+
+
+def _usun_plik(plik):
+    storage, nazwa = plik.storage, plik.name
+    storage.delete(nazwa)
+    # pusty katalog zadania (zadania/<id>/) – tylko w magazynie plików na dysku
+    try:
+        os.rmdir(os.path.dirname(storage.path(nazwa)))
+    except (NotImplementedError, OSError):
+        pass